@@ -7,13 +7,16 @@ from django.urls.exceptions import NoReverseMatch
 from edc_base.modeladmin_mixins import audit_fieldset_tuple, audit_fields
 
 from ..admin_site import plot_admin
+from ..blind_index import blind_index
 from ..forms import PlotForm
-from ..modeladmin_mixins import ModelAdminMixin
+from ..modeladmin_mixins import CoalescedHistoryModelAdminMixin
+from ..modeladmin_mixins import KeysetPaginatorModelAdminMixin, ModelAdminMixin
 from ..models import Plot
 
 
 @admin.register(Plot, site=plot_admin)
-class PlotAdmin(ModelAdminMixin):
+class PlotAdmin(CoalescedHistoryModelAdminMixin, KeysetPaginatorModelAdminMixin,
+                ModelAdminMixin):
 
     form = PlotForm
     date_hierarchy = 'modified'
@@ -91,12 +94,23 @@ class PlotAdmin(ModelAdminMixin):
 
     search_fields = (
         'plot_identifier',
-        'cso_number',
         'map_area',
         'section',
         'status',
         'id') + audit_fields
 
+    def get_search_results(self, request, queryset, search_term):
+        """Adds plots with a CSO number equal to the search term
+        through cso_number_index.
+        """
+        cso_number_queryset = queryset.filter(
+            cso_number_index=blind_index(search_term))
+        queryset, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        if search_term.strip():
+            queryset |= cso_number_queryset
+        return queryset, use_distinct
+
     def get_readonly_fields(self, request, obj=None):
         return super().get_readonly_fields(request, obj=obj) + (
             'plot_identifier', 'htc', 'rss', 'selected',
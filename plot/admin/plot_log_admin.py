@@ -6,18 +6,21 @@ from edc_base.modeladmin_mixins import audit_fieldset_tuple
 
 from ..admin_site import plot_admin
 from ..forms import PlotLogForm
-from ..modeladmin_mixins import ModelAdminMixin
+from ..modeladmin_mixins import CoalescedHistoryModelAdminMixin
+from ..modeladmin_mixins import KeysetPaginatorModelAdminMixin, ModelAdminMixin
 from ..models import PlotLog
 
 
 @admin.register(PlotLog, site=plot_admin)
-class PlotLogAdmin(ModelAdminMixin):
+class PlotLogAdmin(CoalescedHistoryModelAdminMixin, KeysetPaginatorModelAdminMixin,
+                   ModelAdminMixin):
     form = PlotLogForm
     instructions = []
     date_hierarchy = 'modified'
     list_per_page = 15
+    list_select_related = ('plot', )
     list_display = (
-        'plot',
+        'plot', 'entry_count', 'last_log_status', 'last_report_datetime',
         'modified', 'user_modified', 'hostname_modified')
 
     fieldsets = (
@@ -27,4 +30,4 @@ class PlotLogAdmin(ModelAdminMixin):
         return super().get_readonly_fields(request, obj=obj) + ('plot', )
 
     search_fields = ('plot__plot_identifier', 'plot__pk')
-    list_filter = ('hostname_created', 'modified', 'user_modified')
+    list_filter = ('last_log_status', 'hostname_created', 'modified', 'user_modified')
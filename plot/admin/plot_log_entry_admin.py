@@ -8,12 +8,14 @@ from edc_base.modeladmin_mixins import audit_fieldset_tuple, audit_fields
 
 from ..admin_site import plot_admin
 from ..forms import PlotLogEntryForm
-from ..modeladmin_mixins import ModelAdminMixin
+from ..modeladmin_mixins import CoalescedHistoryModelAdminMixin
+from ..modeladmin_mixins import KeysetPaginatorModelAdminMixin, ModelAdminMixin
 from ..models import PlotLogEntry, PlotLog
 
 
 @admin.register(PlotLogEntry, site=plot_admin)
-class PlotLogEntryAdmin(ModelAdminMixin):
+class PlotLogEntryAdmin(CoalescedHistoryModelAdminMixin, KeysetPaginatorModelAdminMixin,
+                        ModelAdminMixin):
     form = PlotLogEntryForm
     date_hierarchy = 'modified'
     fieldsets = (
@@ -27,6 +29,7 @@ class PlotLogEntryAdmin(ModelAdminMixin):
         audit_fieldset_tuple)
 
     list_per_page = 15
+    list_select_related = ('plot_log__plot', )
     list_display = (
         'plot_log',
         'log_status',
@@ -5,6 +5,7 @@ from dateutil.relativedelta import relativedelta
 from django.apps import AppConfig as DjangoAppConfig, apps as django_apps
 from django.utils import timezone
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 from edc_base.utils import get_utcnow
 from edc_constants.constants import CLOSED, OPEN
@@ -32,20 +33,32 @@ class AppConfig(DjangoAppConfig):
         timezone.now() - relativedelta(years=1),
         timezone.now() + relativedelta(years=1))
     max_households = 9
+    identifier_block_size = 25  # see plot_identifier_allocator
+    bulk_create_households = True  # see CreateHouseholdsModelMixin
+    coalesce_history = False  # see CoalescedHistoryModelAdminMixin
+    instrumentation = False  # see plot.instrumentation, plot_stats
     special_locations = ['clinic', 'mobile']  # see plot.location_name
     add_plot_map_areas = ['test_community']
     supervisor_groups = ['field_supervisor']
 
     def ready(self):
+        from django.core import serializers
         from plot.signals import (
             plot_creates_households_on_post_save,
             update_plot_on_post_save)
+        from plot.instrumentation import instrumentation
+        instrumentation.enabled = self.instrumentation
+        serializers.register_serializer('plot_json', 'plot.serializers')
+        if 'json' not in getattr(settings, 'SERIALIZATION_MODULES', {}):
+            # edc_sync deserializes incoming transactions as json
+            serializers.register_serializer('json', 'plot.serializers')
 
     @property
     def anonymous_plot_identifier(self):
-        from edc_map.site_mappers import site_mappers
+        from .mapper_snapshot import site_mapper_snapshot
         edc_device_app_config = django_apps.get_app_config('edc_device')
-        return f'{site_mappers.current_map_code}{edc_device_app_config.device_id}00-00'
+        map_code = site_mapper_snapshot.get().current_mapper.map_code
+        return f'{map_code}{edc_device_app_config.device_id}00-00'
 
     def excluded_plot(self, obj):
         """Returns True if the plot is excluded from being surveyed.
@@ -56,6 +69,21 @@ class AppConfig(DjangoAppConfig):
             excluded_plot = True
         return excluded_plot
 
+    @property
+    def blind_index_key(self):
+        """Returns the key of the blind indexes, e.g. cso_number_index.
+
+        settings.PLOT_BLIND_INDEX_KEY must be the same on the server
+        and every client so that indexes match after sync, unlike
+        SECRET_KEY. Changing the key requires rebuild_cso_number_index.
+        """
+        try:
+            return settings.PLOT_BLIND_INDEX_KEY
+        except AttributeError:
+            raise ImproperlyConfigured(
+                'Missing settings.PLOT_BLIND_INDEX_KEY. Set the same key on '
+                'the server and every client.')
+
     @property
     def study_site_name(self):
         return None
@@ -0,0 +1,151 @@
+# coding=utf-8
+
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from .mapper_snapshot import site_mapper_snapshot
+from .models import Plot
+from .plot_importer import PlotImporter, Point
+
+BenchmarkResult = namedtuple(
+    'BenchmarkResult', 'workflow plots queries seconds peak_memory')
+
+
+def seed_plots(count, map_area=None, seed=None):
+    """Imports random plots in the map area until there are count
+    plots and returns the number imported.
+    """
+    mapper = site_mapper_snapshot.get().get_mapper(
+        map_area or site_mapper_snapshot.get().current_map_area)
+    existing = Plot.objects.all().count()
+    if existing >= count:
+        return 0
+    rng = random.Random(seed or count)
+    degrees = min(mapper.radius / 111.32, 0.5) / 2  # stay well inside the radius
+    importer = PlotImporter(map_area=mapper.map_area, batch_size=1000, ess=False)
+    importer.import_points(
+        Point(n, mapper.center_lat + rng.uniform(-degrees, degrees),
+              mapper.center_lon + rng.uniform(-degrees, degrees))
+        for n in range(count - existing))
+    return importer.created
+
+
+class WorkflowBenchmark:
+
+    """Measures the queries, best wall time and peak Python memory
+    of a workflow.
+
+    Each run calls setup(), not measured, then func(setup result)
+    in a savepoint that is rolled back so that every run starts
+    from the same data. The wall time is the best of `repeat` runs
+    with nothing else traced. The queries and peak memory are from
+    one more run, as tracemalloc and the query log slow the run.
+
+        benchmark = WorkflowBenchmark(repeat=3)
+        result = benchmark.measure('make_plot', plots, func)
+    """
+
+    def __init__(self, repeat=None):
+        self.repeat = repeat or 3
+
+    def measure(self, workflow, plots, func, setup=None):
+        timings = [self.run(func, setup, self.timed) for _ in range(self.repeat)]
+        queries, peak_memory = self.run(func, setup, self.traced)
+        return BenchmarkResult(workflow, plots, queries, min(timings), peak_memory)
+
+    def run(self, func, setup, measure):
+        with transaction.atomic():
+            args = setup() if setup else None
+            result = measure(lambda: func(args) if setup else func())
+            transaction.set_rollback(True)
+        return result
+
+    def timed(self, func):
+        """Returns the wall time of func in seconds.
+        """
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    def traced(self, func):
+        """Returns the number of queries and the peak Python memory
+        in bytes of func.
+        """
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                func()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return len(context.captured_queries), peak_memory
+
+
+class Baseline:
+
+    """Results stored as JSON per database vendor, plots and workflow,
+    and the comparison of new results with them.
+
+    A result regresses if it is not in the baseline, has more
+    queries than the baseline, or
+    takes more than time_factor times the time plus time_slack, or
+    more than memory_factor times the peak memory.
+    """
+
+    time_factor = 2.0
+    time_slack = 0.05  # seconds
+    memory_factor = 1.5
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+
+    def get(self, result, vendor=None):
+        return self.results.get(vendor or connection.vendor, {}).get(
+            str(result.plots), {}).get(result.workflow)
+
+    def compare(self, result, vendor=None):
+        """Returns a list of the regressions of the result, empty if
+        none. A result not in the baseline is a regression, record
+        the baseline with update() first.
+        """
+        baseline = self.get(result, vendor)
+        label = f'{result.workflow} at {result.plots} plots'
+        if not baseline:
+            return [f'{label}: no baseline for {vendor or connection.vendor} '
+                    f'in {self.path}']
+        regressions = []
+        if result.queries > baseline['queries']:
+            regressions.append(
+                f'{label}: {result.queries} queries, baseline {baseline["queries"]}')
+        if result.seconds > baseline['seconds'] * self.time_factor + self.time_slack:
+            regressions.append(
+                f'{label}: {result.seconds:.3f}s, baseline {baseline["seconds"]:.3f}s')
+        if result.peak_memory > baseline['peak_memory'] * self.memory_factor:
+            regressions.append(
+                f'{label}: {result.peak_memory} bytes, '
+                f'baseline {baseline["peak_memory"]} bytes')
+        return regressions
+
+    def update(self, result, vendor=None):
+        self.results.setdefault(vendor or connection.vendor, {}).setdefault(
+            str(result.plots), {})[result.workflow] = dict(
+                queries=result.queries,
+                seconds=round(result.seconds, 4),
+                peak_memory=result.peak_memory)
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.results, f, indent=2, sort_keys=True)
+            f.write('\n')
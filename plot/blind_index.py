@@ -0,0 +1,80 @@
+# coding=utf-8
+
+import hashlib
+import hmac
+
+from django.apps import apps as django_apps
+from django.db.models import Case, CharField, Value, When
+from django.utils.encoding import force_bytes
+from django.utils.text import slugify
+
+from edc_base.utils import get_utcnow
+
+from .instrumentation import instrumented
+
+
+def normalize(value):
+    return ''.join(str(value).split()).upper()
+
+
+@instrumented('plot.blind_index')
+def blind_index(value, key=None):
+    """Returns the keyed hash (HMAC-SHA256) of the normalized value,
+    or None if the value is empty.
+
+    The key defaults to the plot AppConfig.blind_index_key.
+    """
+    if value is None or not normalize(value):
+        return None
+    key = key or django_apps.get_app_config('plot').blind_index_key
+    return hmac.new(
+        force_bytes(key), normalize(value).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def update_cso_number_index(plot_model_cls, batch_size=None, key=None):
+    """Recalculates cso_number_index for all plots with one UPDATE
+    per batch of changed plots and returns the number of plots
+    updated.
+
+    For a new key or plots saved without Plot.save, e.g. bulk
+    created or synced. modified is set on the plots updated so that
+    the change feed sends them, see ChangeFeed.
+    """
+    batch_size = batch_size or 500
+    values = []
+    for pk, cso_number, cso_number_index in plot_model_cls.objects.values_list(
+            'pk', 'cso_number', 'cso_number_index').iterator():
+        value = blind_index(cso_number, key=key)
+        if value != cso_number_index:
+            values.append((pk, value))
+    updated = 0
+    for index in range(0, len(values), batch_size):
+        batch = values[index:index + batch_size]
+        updated += plot_model_cls.objects.filter(
+            pk__in=[pk for pk, _ in batch]).update(
+                cso_number_index=Case(
+                    *[When(pk=pk, then=Value(value)) for pk, value in batch],
+                    output_field=CharField()),
+                modified=get_utcnow())
+    return updated
+
+
+def update_search_slugs(model_cls, fields, batch_size=None):
+    """Rebuilds the slug of all rows from the fields with one
+    UPDATE per batch and returns the number of rows updated.
+
+    For slugs written when get_search_slug_fields included
+    cso_number, in plaintext. Works on historical models too.
+    """
+    batch_size = batch_size or 500
+    values = [(pk, '|'.join(slugify(value or '') for value in row))
+              for pk, *row in model_cls._default_manager.values_list(
+                  'pk', *fields).iterator()]
+    updated = 0
+    for index in range(0, len(values), batch_size):
+        batch = values[index:index + batch_size]
+        updated += model_cls._default_manager.filter(
+            pk__in=[pk for pk, _ in batch]).update(slug=Case(
+                *[When(pk=pk, then=Value(value)) for pk, value in batch],
+                output_field=CharField()))
+    return updated
@@ -0,0 +1,127 @@
+# coding=utf-8
+
+import time
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, FloatField, Value, When
+
+from edc_base.utils import get_utcnow
+
+from .history import bulk_create_historical_records, send_post_save
+from .mapper_snapshot import site_mapper_snapshot
+from .models import Plot
+from .plot_summary import plot_summary_values, summary_values, update_plot_summary
+from .spatial import pairwise_distances
+
+
+class BulkPlotConfirmationError(Exception):
+    pass
+
+
+class BulkPlotConfirmation:
+
+    """Recalculates distance_from_target and confirmed for all
+    plots in a map area.
+
+    Coordinates are loaded into numpy arrays and the distances of
+    the confirmation points from the target points are calculated
+    in one pass. A plot is confirmed if its confirmation point is
+    within target_radius (km). Only changed plots are written, with
+    one UPDATE per batch, and get a historical record, post_save and
+    their difference in PlotSummary.
+
+    Confirmed plots that would be unconfirmed are left as they are,
+    with their confirmation point and households, and counted in
+    `out_of_radius`, as Plot.save would refuse to save them. Target
+    points outside of the mapper radius are counted in
+    `outside_map_area`.
+
+        confirmation = BulkPlotConfirmation(map_area='test_community')
+        confirmation.run()
+    """
+
+    update_fields = ['confirmed', 'distance_from_target', 'modified']
+    tolerance = 0.01  # meters
+
+    def __init__(self, map_area=None, batch_size=1000):
+        snapshot = site_mapper_snapshot.get()
+        if map_area not in snapshot.map_areas:
+            raise BulkPlotConfirmationError(
+                f'Invalid map area. Got \'{map_area}\'. Site mapper expects one '
+                f'of map_areas={sorted(snapshot.map_areas)}.')
+        self.map_area = map_area
+        self.mapper = snapshot.get_mapper(map_area)
+        self.batch_size = batch_size
+        self.plots = 0
+        self.confirmed = 0
+        self.changed = 0
+        self.out_of_radius = 0
+        self.outside_map_area = 0
+        self.elapsed = 0.0
+
+    def run(self):
+        start = time.time()
+        values = list(Plot.objects.filter(map_area=self.map_area).values_list(
+            'pk', 'gps_target_lat', 'gps_target_lon', 'gps_confirmed_latitude',
+            'gps_confirmed_longitude', 'target_radius', 'confirmed',
+            'distance_from_target'))
+        self.plots = len(values)
+        if values:
+            changed = self.calculate(values)
+            with transaction.atomic():
+                for index in range(0, len(changed), self.batch_size):
+                    self.update(changed[index:index + self.batch_size])
+        self.elapsed = time.time() - start
+        return self
+
+    def calculate(self, values):
+        """Returns a list of (pk, confirmed, distance_from_target)
+        for the plots that changed.
+        """
+        (pks, target_lats, target_lons, lats, lons, target_radius,
+         confirmed, distance_from_target) = zip(*values)
+        distance = pairwise_distances(target_lats, target_lons, lats, lons)
+        has_point = ~np.isnan(distance)
+        radius = np.array(
+            [np.nan if r is None else r for r in target_radius], dtype=float) * 1000
+        new_confirmed = has_point & (distance <= radius)
+        old_confirmed = np.array(confirmed, dtype=bool)
+        out_of_radius = old_confirmed & ~new_confirmed
+        old_distance = np.array(
+            [np.nan if d is None else d for d in distance_from_target], dtype=float)
+        distance_changed = np.where(
+            has_point,
+            np.isnan(old_distance) | (np.abs(distance - old_distance) > self.tolerance),
+            ~np.isnan(old_distance))
+        changed = ((new_confirmed != old_confirmed) | distance_changed) & ~out_of_radius
+        self.confirmed = int((new_confirmed | out_of_radius).sum())
+        self.out_of_radius = int(out_of_radius.sum())
+        self.changed = int(changed.sum())
+        self.outside_map_area = int((pairwise_distances(
+            self.mapper.center_lat, self.mapper.center_lon, target_lats, target_lons)
+            > self.mapper.radius * 1000).sum())
+        return [(pks[i], bool(new_confirmed[i]),
+                 float(distance[i]) if has_point[i] else None)
+                for i in np.flatnonzero(changed)]
+
+    def update(self, changed):
+        """Updates a batch of changed plots with one UPDATE.
+        """
+        modified = get_utcnow()
+        old_values = plot_summary_values([pk for pk, _, _ in changed])
+        Plot.objects.filter(pk__in=[pk for pk, _, _ in changed]).update(
+            confirmed=Case(
+                *[When(pk=pk, then=Value(confirmed)) for pk, confirmed, _ in changed],
+                output_field=BooleanField()),
+            distance_from_target=Case(
+                *[When(pk=pk, then=Value(distance)) for pk, _, distance in changed],
+                output_field=FloatField()),
+            modified=modified)
+        plots = Plot.objects.in_bulk([pk for pk, _, _ in changed])
+        update_plot_summary(
+            [(old_values[pk], summary_values(plot)) for pk, plot in plots.items()])
+        bulk_create_historical_records(Plot, list(plots.values()), history_type='~')
+        send_post_save(Plot, list(plots.values()), created=False,
+                       update_fields=frozenset(self.update_fields))
@@ -0,0 +1,166 @@
+# coding=utf-8
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from edc_base.utils import get_utcnow
+
+ChangePage = namedtuple('ChangePage', 'rows watermark has_more')
+
+
+class ChangeFeedError(Exception):
+    pass
+
+
+class Watermark(namedtuple('Watermark', 'timestamp pk')):
+
+    """The position of a row in a change feed, the modified or
+    history_date of the row and its primary key.
+
+    Passed between devices as a string, see str() and parse(). A
+    position without a pk, see ChangeFeed.rewind(), is before all
+    the rows of its timestamp.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return f'{self.timestamp.isoformat()}|{self.pk}'
+
+    @classmethod
+    def parse(cls, token):
+        try:
+            timestamp, pk = token.split('|')
+        except (AttributeError, ValueError):
+            timestamp = pk = None
+        timestamp = parse_datetime(timestamp) if timestamp else None
+        if not timestamp or not pk:
+            raise ChangeFeedError(f'Invalid watermark. Got \'{token}\'.')
+        return cls(timestamp, pk)
+
+
+class ChangeFeed:
+
+    """Pages through the rows of a plot model, or its history model,
+    changed since a watermark.
+
+    Rows are ordered by (modified, id), or (history_date, history_id)
+    for a history model, which are indexed, see migration 0009, and
+    seek from the watermark without an OFFSET. Deletes are in the
+    history model with history_type '-'.
+
+    modified and history_date are set when a row is saved, not when
+    its transaction commits, so a row may become visible with a
+    timestamp before a watermark already handed out. Rows modified
+    less than settle_seconds ago are left for the next call and
+    changes() reads again from overlap_seconds before the watermark
+    given. Rows of the overlap are sent again, so the receiver
+    de-duplicates on model, pk and row watermark, which are the same
+    for the same version of a row. A row is still missed if its
+    transaction commits more than settle_seconds + overlap_seconds
+    after it was saved; the bulk paths commit per batch, well
+    within that.
+
+        feed = ChangeFeed(model='plot.plot')
+        for page in feed.changes(watermark=None):
+            ...  # store page.watermark once the rows are applied
+    """
+
+    models = [
+        'plot.plot', 'plot.plotlog', 'plot.plotlogentry',
+        'plot.historicalplot', 'plot.historicalplotlog',
+        'plot.historicalplotlogentry']
+    settle_seconds = 30
+    overlap_seconds = 600
+
+    def __init__(self, model=None, page_size=None, settle_seconds=None,
+                 overlap_seconds=None):
+        if model not in self.models:
+            raise ChangeFeedError(
+                f'Invalid model. Got \'{model}\'. Expected one of {self.models}.')
+        self.model = model
+        self.model_cls = django_apps.get_model(*model.split('.'))
+        self.page_size = page_size or 500
+        if settle_seconds is not None:
+            self.settle_seconds = settle_seconds
+        if overlap_seconds is not None:
+            self.overlap_seconds = overlap_seconds
+        if model.startswith('plot.historical'):
+            self.timestamp_field, self.pk_field = 'history_date', 'history_id'
+        else:
+            self.timestamp_field, self.pk_field = 'modified', 'id'
+
+    def get_watermark(self, obj):
+        return Watermark(
+            getattr(obj, self.timestamp_field), str(getattr(obj, self.pk_field)))
+
+    def queryset(self, watermark=None):
+        """Returns the queryset of the rows after the watermark, in
+        order, up to the settle time.
+        """
+        if isinstance(watermark, str):
+            watermark = Watermark.parse(watermark)
+        queryset = self.model_cls._default_manager.filter(**{
+            f'{self.timestamp_field}__lte':
+                get_utcnow() - timedelta(seconds=self.settle_seconds)})
+        if watermark and watermark.pk is None:
+            queryset = queryset.filter(**{
+                f'{self.timestamp_field}__gte': watermark.timestamp})
+        elif watermark:
+            # a range on the timestamp less the rows of the watermark
+            # timestamp up to and including the watermark pk
+            queryset = queryset.filter(**{
+                f'{self.timestamp_field}__gte': watermark.timestamp}).exclude(
+                    Q(**{self.timestamp_field: watermark.timestamp,
+                         f'{self.pk_field}__lte': watermark.pk}))
+        return queryset.order_by(self.timestamp_field, self.pk_field)
+
+    def page(self, watermark=None):
+        """Returns a ChangePage of up to page_size rows after the
+        watermark, the watermark of the last row, or the watermark
+        given if none, and whether more rows follow.
+        """
+        rows = list(self.queryset(watermark)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if rows:
+            watermark = self.get_watermark(rows[-1])
+        elif isinstance(watermark, str):
+            watermark = Watermark.parse(watermark)
+        return ChangePage(rows, watermark, has_more)
+
+    def rewind(self, watermark):
+        """Returns the position overlap_seconds before the watermark,
+        or None.
+        """
+        if isinstance(watermark, str):
+            watermark = Watermark.parse(watermark)
+        if not watermark:
+            return None
+        return Watermark(
+            watermark.timestamp - timedelta(seconds=self.overlap_seconds), None)
+
+    def changes(self, watermark=None, pages=None):
+        """Yields the ChangePages from overlap_seconds before the
+        watermark, up to `pages` pages, each with the watermark to
+        store, the greater of the watermark given and that of the
+        last row.
+        """
+        if isinstance(watermark, str):
+            watermark = Watermark.parse(watermark)
+        position = self.rewind(watermark)
+        count = 0
+        while True:
+            page = self.page(watermark=position)
+            position = page.watermark
+            count += 1
+            if watermark and (not page.rows or (
+                    position.timestamp, position.pk) <= watermark):
+                page = page._replace(watermark=watermark)
+            yield page
+            if not page.has_more or count == pages:
+                return
@@ -0,0 +1,233 @@
+# coding=utf-8
+
+import threading
+
+from collections import OrderedDict, namedtuple
+from contextlib import ContextDecorator
+from uuid import uuid4
+
+import arrow
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import F
+
+from edc_base.utils import get_utcnow
+
+from .constants import ACCESSIBLE, INACCESSIBLE
+from .history import bulk_create_historical_records, bulk_create_with_history
+from .history import send_post_save
+from .household_reconciler import HouseholdReconciler
+from .plot_summary import summary_deltas, summary_values, update_plot_summary
+
+LogEntryEvent = namedtuple('LogEntryEvent', 'plot_log_id deleted created log_status')
+
+
+def apply_log_entry(plot, log_status, created):
+    """Updates the plot for a saved plot log entry.
+    """
+    if created:
+        plot.access_attempts = (plot.access_attempts or 0) + 1
+    if log_status == INACCESSIBLE:
+        plot.accessible = False
+        plot.confirmed = False
+        plot.gps_confirmed_latitude = None
+        plot.gps_confirmed_longitude = None
+        plot.distance_from_target = None
+        plot.household_count = 0
+    elif log_status == ACCESSIBLE:
+        plot.accessible = True
+
+
+def apply_log_entry_delete(plot):
+    """Updates the plot for a deleted plot log entry.
+    """
+    plot.access_attempts = (plot.access_attempts or 0) - 1
+    plot.access_attempts = 0 if plot.access_attempts < 1 else plot.access_attempts
+    if plot.access_attempts == 0:
+        plot.accessible = True
+        plot.household_count = 0
+        plot.eligible_members = 0
+        plot.status = None
+        plot.time_of_day = None
+        plot.time_of_week = None
+
+
+class DeferredPlotSignals(threading.local):
+
+    """Per thread collector of the plots and plot log entries
+    whose side effects are deferred.
+    """
+
+    log_entry_fields = [
+        'access_attempts', 'accessible', 'confirmed', 'gps_confirmed_latitude',
+        'gps_confirmed_longitude', 'distance_from_target', 'household_count',
+        'eligible_members', 'status', 'time_of_day', 'time_of_week',
+        'location_name']
+
+    def __init__(self):
+        self.depth = 0
+        self.reset()
+
+    def reset(self):
+        self.plots = OrderedDict()  # pk: (plot, created)
+        self.events = []
+        self.summary_deltas = {}
+
+    @property
+    def active(self):
+        return self.depth > 0
+
+    @property
+    def pending(self):
+        return bool(self.plots or self.events or self.summary_deltas)
+
+    def add_plot(self, plot, created):
+        _, was_created = self.plots.get(plot.pk, (None, False))
+        self.plots[plot.pk] = (plot, created or was_created)
+
+    def add_summary_changes(self, changes):
+        summary_deltas(changes, deltas=self.summary_deltas)
+
+    def add_log_entry(self, plot_log_entry, created):
+        self.events.append(LogEntryEvent(
+            plot_log_entry.plot_log_id, False, created, plot_log_entry.log_status))
+
+    def add_deleted_log_entry(self, plot_log_entry):
+        self.events.append(LogEntryEvent(
+            plot_log_entry.plot_log_id, True, None, None))
+
+    def process(self):
+        """Runs the side effects of everything collected until
+        nothing is pending.
+        """
+        while self.pending:
+            plots, events, deltas = self.plots, self.events, self.summary_deltas
+            self.reset()
+            self.process_plots(list(plots.values()))
+            self.process_log_entry_events(events)
+            update_plot_summary(deltas=deltas)
+
+    def process_plots(self, plots):
+        """Reconciles households, see HouseholdReconciler, and bulk
+        creates the PlotLog and ESS PlotLogEntry for created plots.
+
+        The new log entries are collected again and applied to
+        their plots by process_log_entry_events.
+        """
+        PlotLog = django_apps.get_model('plot.plotlog')
+        PlotLogEntry = django_apps.get_model('plot.plotlogentry')
+        app_config = django_apps.get_app_config('plot')
+        plot_logs = []
+        plot_log_entries = []
+        HouseholdReconciler([plot for plot, _ in plots]).reconcile()
+        for plot, created in plots:
+            if created and not app_config.excluded_plot(plot):
+                plot_log = PlotLog(
+                    id=uuid4(), plot=plot, report_datetime=plot.report_datetime)
+                plot_logs.append(plot_log)
+                if plot.ess:
+                    plot_log_entries.append(PlotLogEntry(
+                        id=uuid4(),
+                        plot_log=plot_log,
+                        log_status=ACCESSIBLE,
+                        report_datetime=plot.report_datetime,
+                        report_date=arrow.Arrow.fromdatetime(
+                            plot.report_datetime,
+                            plot.report_datetime.tzinfo).to('utc').date()))
+        if plot_logs:
+            bulk_create_with_history(PlotLog, plot_logs)
+            send_post_save(PlotLog, plot_logs)
+        if plot_log_entries:
+            bulk_create_with_history(PlotLogEntry, plot_log_entries)
+            send_post_save(PlotLogEntry, plot_log_entries)
+
+    def process_log_entry_events(self, events):
+        """Recalculates the summary of the plot logs, applies log
+        entry events to their plots in order and writes the plots
+        with one update per distinct set of values.
+
+        Events of plot logs or plots deleted inside are skipped.
+        The plots are locked and access_attempts is written as a
+        difference, F('access_attempts') + n, so that increments
+        from outside are not lost.
+        """
+        if not events:
+            return
+        Plot = django_apps.get_model('plot.plot')
+        PlotLog = django_apps.get_model('plot.plotlog')
+        plot_ids = dict(PlotLog.objects.filter(
+            pk__in=set(event.plot_log_id for event in events)).values_list(
+                'pk', 'plot_id'))
+        plots = Plot.objects.select_for_update().in_bulk(list(set(plot_ids.values())))
+        events = [event for event in events
+                  if plot_ids.get(event.plot_log_id) in plots]
+        if not events:
+            return
+        PlotLog.objects.update_log_summary(pks=plot_ids)
+        old_values = {pk: summary_values(plot) for pk, plot in plots.items()}
+        access_attempts = {pk: plot.access_attempts or 0 for pk, plot in plots.items()}
+        for event in events:
+            plot = plots[plot_ids[event.plot_log_id]]
+            if event.deleted:
+                apply_log_entry_delete(plot)
+            else:
+                apply_log_entry(plot, event.log_status, event.created)
+            # as Plot.save
+            plot.location_name = plot.location_name or 'plot'
+            if plot.status == INACCESSIBLE:
+                plot.accessible = False
+        modified = get_utcnow()
+        fields = [field for field in self.log_entry_fields if field != 'access_attempts']
+        groups = {}
+        for plot in plots.values():
+            plot.modified = modified
+            values = tuple(
+                (field, getattr(plot, field)) for field in fields + ['modified'])
+            difference = plot.access_attempts - access_attempts[plot.pk]
+            groups.setdefault((values, difference), []).append(plot.pk)
+        for (values, difference), pks in groups.items():
+            Plot.objects.filter(pk__in=pks).update(
+                access_attempts=F('access_attempts') + difference, **dict(values))
+        self.add_summary_changes(
+            [(old_values[pk], summary_values(plot)) for pk, plot in plots.items()])
+        bulk_create_historical_records(
+            Plot, list(plots.values()), history_type='~')
+        send_post_save(
+            Plot, list(plots.values()), created=False,
+            update_fields=frozenset(self.log_entry_fields + ['modified']))
+        HouseholdReconciler(plots.values()).reconcile()
+
+
+deferred_plot_signals = DeferredPlotSignals()
+
+
+class defer_plot_signals(ContextDecorator):
+
+    """Context manager or decorator that defers the side effects
+    of the plot signals in the current thread.
+
+    The plots and plot log entries saved or deleted inside are
+    collected and, on exit without an exception, their side effects
+    run as set-based operations in one transaction. Nested use
+    defers to the outermost.
+
+        with defer_plot_signals():
+            for ...:
+                Plot.objects.create(...)
+    """
+
+    def __enter__(self):
+        deferred_plot_signals.depth += 1
+        return deferred_plot_signals
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if deferred_plot_signals.depth == 1 and not exc_type:
+                with transaction.atomic():
+                    deferred_plot_signals.process()
+        finally:
+            deferred_plot_signals.depth -= 1
+            if not deferred_plot_signals.depth:
+                deferred_plot_signals.reset()
+        return False
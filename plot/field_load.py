@@ -0,0 +1,230 @@
+# coding=utf-8
+
+import random
+import time
+
+from datetime import timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import arrow
+
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from edc_base.utils import get_utcnow
+
+from .constants import ACCESSIBLE, INACCESSIBLE, RESIDENTIAL_HABITABLE
+from .history import bulk_create_with_history, send_post_save
+from .mapper_snapshot import site_mapper_snapshot
+from .models import Plot, PlotLog, PlotLogEntry
+from .plot_importer import GPS_PLACES, PlotImporter, Point
+from .plot_summary import summary_values, update_plot_summary
+from .spatial import pairwise_distances
+
+
+class FieldLoadError(Exception):
+    pass
+
+
+class FieldLoadGenerator:
+
+    """Generates plots, plot log entries and households in map
+    areas as if surveyed for some weeks.
+
+    For each map area, `plots` plots are placed at random inside
+    the mapper radius and `log_entries` plot log entries are spread
+    over them at random, with report_datetimes over the last `weeks`
+    weeks and `inaccessible` of them INACCESSIBLE. A plot whose last
+    entry is ACCESSIBLE is confirmed with a probability of
+    `confirmed`, with 1 to `max_household_count` households.
+
+    Rows are bulk created per batch of plots, each batch in one
+    transaction, with their historical records and PlotSummary, and
+    with the values the save methods and signals would have set,
+    see PlotImporter.get_plot and DeferredPlotSignals. The same seed
+    gives the same plots and entries but for identifiers and pks.
+    As for PlotImporter, only on the central server.
+
+        generator = FieldLoadGenerator(
+            map_areas=['test_community'], plots=10000, log_entries=15000, seed=1)
+        generator.run()
+    """
+
+    def __init__(self, map_areas=None, plots=None, log_entries=None, seed=None,
+                 weeks=None, inaccessible=None, confirmed=None,
+                 max_household_count=None, batch_size=None):
+        snapshot = site_mapper_snapshot.get()
+        self.map_areas = list(map_areas or sorted(snapshot.map_areas))
+        for map_area in self.map_areas:
+            if map_area not in snapshot.map_areas:
+                raise FieldLoadError(
+                    f'Invalid map area. Got \'{map_area}\'. Site mapper expects one '
+                    f'of map_areas={sorted(snapshot.map_areas)}.')
+        if seed is None:
+            raise FieldLoadError('A seed is required.')
+        self.plots = plots or 0
+        self.log_entries = log_entries or 0
+        self.seed = seed
+        self.weeks = weeks or 6
+        self.inaccessible = 0.2 if inaccessible is None else inaccessible
+        self.confirmed = 0.6 if confirmed is None else confirmed
+        app_config = django_apps.get_app_config('plot')
+        self.max_household_count = (
+            3 if max_household_count is None else max_household_count)
+        if not 0 <= self.max_household_count <= app_config.max_households:
+            raise FieldLoadError(
+                f'Invalid max household count. Got {self.max_household_count}. '
+                f'Expected 0 to {app_config.max_households}. See plot.AppConfig')
+        for name in ['inaccessible', 'confirmed']:
+            if not 0 <= getattr(self, name) <= 1:
+                raise FieldLoadError(
+                    f'Invalid {name}. Expected a proportion from 0 to 1. '
+                    f'Got {getattr(self, name)}.')
+        self.batch_size = batch_size or 1000
+        self.household_model = Plot._meta.household_model
+        self.created = dict(plots=0, log_entries=0, confirmed=0, households=0)
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        rows = (self.created['plots'] * 2 + self.created['log_entries']
+                + self.created['households'])  # a plot log per plot
+        return rows / self.elapsed if self.elapsed else 0.0
+
+    def run(self):
+        start = time.time()
+        end_datetime = get_utcnow() - timedelta(minutes=1)
+        start_datetime = end_datetime - timedelta(weeks=self.weeks)
+        for map_area in self.map_areas:
+            self.generate(map_area, start_datetime, end_datetime)
+        self.elapsed = time.time() - start
+        return self
+
+    def generate(self, map_area, start_datetime, end_datetime):
+        """Generates the plots of a map area in batches.
+        """
+        rng = random.Random(f'{self.seed}:{map_area}')
+        importer = PlotImporter(map_area=map_area, ess=False)
+        mapper = site_mapper_snapshot.get().get_mapper(map_area)
+        degrees = min(mapper.radius / 111.32, 0.5) / 2  # stay well inside the radius
+        entry_counts = [0] * self.plots
+        for _ in range(self.log_entries if self.plots else 0):
+            entry_counts[rng.randrange(self.plots)] += 1
+        seconds = (end_datetime - start_datetime).total_seconds()
+        for index in range(0, self.plots, self.batch_size):
+            batch = []
+            for entry_count in entry_counts[index:index + self.batch_size]:
+                point = Point(
+                    None,
+                    Decimal(mapper.center_lat + rng.uniform(-degrees, degrees)).quantize(
+                        GPS_PLACES),
+                    Decimal(mapper.center_lon + rng.uniform(-degrees, degrees)).quantize(
+                        GPS_PLACES))
+                report_datetimes = self.unique_datetimes(sorted(
+                    start_datetime + timedelta(seconds=rng.uniform(0, seconds))
+                    for _ in range(entry_count)))
+                log_statuses = [
+                    INACCESSIBLE if rng.random() < self.inaccessible else ACCESSIBLE
+                    for _ in range(entry_count)]
+                confirmed = (
+                    bool(log_statuses) and log_statuses[-1] == ACCESSIBLE
+                    and rng.random() < self.confirmed)
+                household_count = (
+                    rng.randint(1, self.max_household_count)
+                    if confirmed and self.max_household_count else 0)
+                offset = (rng.uniform(-1e-4, 1e-4), rng.uniform(-1e-4, 1e-4))  # ~11m
+                batch.append((point, report_datetimes, log_statuses, confirmed,
+                              household_count, offset))
+            with transaction.atomic():
+                self.create_batch(importer, batch, start_datetime)
+
+    def create_batch(self, importer, batch, report_datetime):
+        plot_identifiers = importer.allocate_identifiers(len(batch))
+        plots, plot_logs, plot_log_entries = [], [], []
+        for (point, report_datetimes, log_statuses, confirmed, household_count,
+             offset), plot_identifier in zip(batch, plot_identifiers):
+            plot = importer.get_plot(point, plot_identifier, report_datetime)
+            self.apply_log_entries(plot, log_statuses)
+            if confirmed:
+                plot.gps_confirmed_latitude = (
+                    point.latitude + Decimal(offset[0])).quantize(GPS_PLACES)
+                plot.gps_confirmed_longitude = (
+                    point.longitude + Decimal(offset[1])).quantize(GPS_PLACES)
+                plot.status = RESIDENTIAL_HABITABLE
+                plot.household_count = household_count
+            plots.append(plot)
+            plot_log = PlotLog(
+                id=uuid4(), plot=plot, report_datetime=report_datetime,
+                entry_count=len(log_statuses),
+                last_log_status=log_statuses[-1] if log_statuses else None,
+                last_report_datetime=report_datetimes[-1] if report_datetimes else None)
+            plot_logs.append(plot_log)
+            for entry_datetime, log_status in zip(report_datetimes, log_statuses):
+                plot_log_entries.append(PlotLogEntry(
+                    id=uuid4(),
+                    plot_log=plot_log,
+                    log_status=log_status,
+                    report_datetime=entry_datetime,
+                    report_date=arrow.Arrow.fromdatetime(
+                        entry_datetime, entry_datetime.tzinfo).to('utc').date()))
+        self.confirm(plots)
+        bulk_create_with_history(Plot, plots)
+        update_plot_summary([(None, summary_values(plot)) for plot in plots])
+        bulk_create_with_history(PlotLog, plot_logs)
+        bulk_create_with_history(PlotLogEntry, plot_log_entries, batch_size=self.batch_size)
+        households = self.create_households(plots)
+        self.created['plots'] += len(plots)
+        self.created['log_entries'] += len(plot_log_entries)
+        self.created['confirmed'] += len([plot for plot in plots if plot.confirmed])
+        self.created['households'] += len(households)
+
+    def apply_log_entries(self, plot, log_statuses):
+        """Sets the fields of the plot as the plot log entry signals
+        would, see apply_log_entry.
+        """
+        plot.access_attempts = len(log_statuses)
+        if log_statuses:
+            plot.location_name = 'plot'
+            plot.accessible = log_statuses[-1] != INACCESSIBLE
+
+    def confirm(self, plots):
+        """Sets distance_from_target and confirmed of the plots with
+        a confirmation point, see BulkPlotConfirmation.
+        """
+        confirmed = [plot for plot in plots if plot.gps_confirmed_latitude is not None]
+        if not confirmed:
+            return
+        distances = pairwise_distances(
+            [plot.gps_target_lat for plot in confirmed],
+            [plot.gps_target_lon for plot in confirmed],
+            [plot.gps_confirmed_latitude for plot in confirmed],
+            [plot.gps_confirmed_longitude for plot in confirmed])
+        for plot, distance in zip(confirmed, distances):
+            plot.distance_from_target = float(distance)
+            plot.confirmed = bool(distance <= plot.target_radius * 1000)
+
+    def create_households(self, plots):
+        """Bulk creates the households of the confirmed plots, see
+        CreateHouseholdsModelMixin.bulk_create_households.
+        """
+        Household = django_apps.get_model(*self.household_model.split('.'))
+        households = [
+            Household(**plot.get_household_options(n))
+            for plot in plots for n in range(1, plot.household_count + 1)]
+        if households:
+            bulk_create_with_history(Household, households, batch_size=self.batch_size)
+            send_post_save(Household, households)
+        return households
+
+    @staticmethod
+    def unique_datetimes(report_datetimes):
+        """Returns the sorted datetimes with ties moved apart by a
+        microsecond, see the unique_together of PlotLogEntry.
+        """
+        unique = []
+        for report_datetime in report_datetimes:
+            if unique and report_datetime <= unique[-1]:
+                report_datetime = unique[-1] + timedelta(microseconds=1)
+            unique.append(report_datetime)
+        return unique
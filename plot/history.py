@@ -0,0 +1,204 @@
+# coding=utf-8
+
+import sys
+import threading
+
+from collections import OrderedDict
+from contextlib import ContextDecorator
+from uuid import uuid4
+
+from django.db import router, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from edc_base.model_managers import HistoricalRecords
+
+from .instrumentation import instrumented
+
+
+def historical_records(model_cls):
+    """Returns the HistoricalRecords connected to post_save of the
+    model, or None.
+    """
+    for receiver in post_save._live_receivers(model_cls):
+        records = getattr(receiver, '__self__', None)
+        if isinstance(records, HistoricalRecords):
+            return records
+    return None
+
+
+def get_history_user(records, instance):
+    """Returns the history_user of the instance as the
+    HistoricalRecords would set it, e.g. the user of the current
+    request, or None.
+    """
+    if records is None or not hasattr(records, 'get_history_user'):
+        return None
+    return records.get_history_user(instance)
+
+
+def historical_record(instance, history_type, history_date=None,
+                      history_user=None):
+    """Returns an unsaved historical record for the instance as
+    HistoricalRecords would create it on post_save.
+    """
+    history_model = instance.__class__.history.model
+    history_field_names = [
+        field.attname for field in history_model._meta.fields]
+    attrs = {}
+    for field in instance._meta.fields:
+        if field.attname in history_field_names:
+            attrs[field.attname] = getattr(instance, field.attname)
+    return history_model(
+        history_id=uuid4(),
+        history_date=history_date or timezone.now(),
+        history_type=history_type,
+        history_user=history_user,
+        **attrs)
+
+
+@instrumented('history.bulk_create_historical_records')
+def bulk_create_historical_records(model_cls, objs, history_type='+',
+                                   batch_size=None):
+    """Creates the historical records for objects written
+    without post_save, e.g. by bulk_create or update.
+    """
+    history_date = timezone.now()
+    model_records = historical_records(model_cls)
+    records = [historical_record(obj, history_type, history_date=history_date,
+                                 history_user=get_history_user(model_records, obj))
+               for obj in objs]
+    if history_buffer.active:
+        for record in records:
+            history_buffer.add(model_cls, record)
+        return records
+    return model_cls.history.model._default_manager.bulk_create(
+        records, batch_size=batch_size)
+
+
+def bulk_create_with_history(model_cls, objs, batch_size=None):
+    """Bulk creates objects along with their historical records.
+
+    Objects must have their primary key set before calling.
+    """
+    objs = model_cls.objects.bulk_create(objs, batch_size=batch_size)
+    bulk_create_historical_records(
+        model_cls, objs, history_type='+', batch_size=batch_size)
+    return objs
+
+
+def send_post_save(sender, instances, created=True, update_fields=None,
+                   using=None):
+    """Sends post_save for objects written in bulk to every receiver
+    except HistoricalRecords, whose rows are bulk created instead.
+    """
+    using = using or router.db_for_write(sender)
+    receivers = [
+        receiver for receiver in post_save._live_receivers(sender)
+        if not isinstance(getattr(receiver, '__self__', None), HistoricalRecords)]
+    for instance in instances:
+        for receiver in receivers:
+            receiver(signal=post_save, sender=sender, instance=instance,
+                     created=created, update_fields=update_fields,
+                     raw=False, using=using)
+
+
+class HistoryBuffer(threading.local):
+
+    """Per thread buffer of the last historical record of each
+    object changed inside coalesce_history.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.atomic = None
+        self.reset()
+
+    def reset(self):
+        self.records = OrderedDict()  # (model_cls, pk): (first history_type, record)
+
+    @property
+    def active(self):
+        return self.depth > 0
+
+    def add(self, model_cls, record):
+        key = (model_cls, getattr(record, model_cls._meta.pk.attname))
+        first_history_type, _ = self.records.get(key, (record.history_type, None))
+        self.records[key] = (first_history_type, record)
+
+    @instrumented('history.flush')
+    def flush(self):
+        """Bulk creates one historical record per object, the last,
+        as created if the object was created inside and none if it
+        was created and deleted inside.
+        """
+        records = OrderedDict()
+        for (model_cls, _), (first_history_type, record) in self.records.items():
+            if first_history_type == '+':
+                if record.history_type == '-':
+                    continue
+                record.history_type = '+'
+            records.setdefault(model_cls, []).append(record)
+        self.reset()
+        for model_cls, model_records in records.items():
+            model_cls.history.model._default_manager.bulk_create(model_records)
+
+
+history_buffer = HistoryBuffer()
+
+
+class CoalescedHistoricalRecords(HistoricalRecords):
+
+    """HistoricalRecords that, inside coalesce_history, buffers
+    historical records instead of writing them.
+    """
+
+    @instrumented('history.create_historical_record')
+    def create_historical_record(self, instance, history_type, *args, **kwargs):
+        if not history_buffer.active:
+            return super().create_historical_record(
+                instance, history_type, *args, **kwargs)
+        record = historical_record(
+            instance, history_type,
+            history_user=get_history_user(self, instance))
+        history_buffer.add(instance.__class__, record)
+
+
+class coalesce_history(ContextDecorator):
+
+    """Context manager or decorator that runs inside a transaction
+    and writes at most one historical record per Plot, PlotLog
+    and PlotLogEntry, the last state, when it exits without an
+    exception.
+
+    Historical records are not readable inside. Nested use coalesces
+    to the outermost.
+
+        with coalesce_history():
+            plot.save()
+            ...
+    """
+
+    def __enter__(self):
+        if not history_buffer.depth:
+            history_buffer.atomic = transaction.atomic()
+            history_buffer.atomic.__enter__()
+        history_buffer.depth += 1
+        return history_buffer
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        history_buffer.depth -= 1
+        if history_buffer.depth:
+            return False
+        atomic, history_buffer.atomic = history_buffer.atomic, None
+        try:
+            if not exc_type:
+                history_buffer.flush()
+        except Exception:
+            exc_type, exc_value, traceback = sys.exc_info()
+            if not atomic.__exit__(exc_type, exc_value, traceback):
+                raise
+        else:
+            return atomic.__exit__(exc_type, exc_value, traceback)
+        finally:
+            history_buffer.reset()
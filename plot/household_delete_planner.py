@@ -0,0 +1,118 @@
+# coding=utf-8
+
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models.deletion import PROTECT, ProtectedError
+
+DeleteReport = namedtuple('DeleteReport', 'deleted skipped')
+
+
+class HouseholdDeletePlanner:
+
+    """Deletes households, with their household structures and
+    household logs, skipping those with protected upstream data.
+
+    Protected households are found with one query per model in
+    the chain plus one per PROTECT relation into the chain. The
+    rest are deleted in bulk, logs then structures then households.
+
+    Returns a DeleteReport of the deleted household pks and a dict
+    of skipped household pks to the labels of the protecting models.
+
+        planner = HouseholdDeletePlanner(
+            household_model='household.household', pks=[...])
+        report = planner.delete()
+    """
+
+    household_log_model = 'household.householdlog'
+    household_structure_model = 'household.householdstructure'
+
+    def __init__(self, household_model=None, pks=None):
+        self.household_model_cls = django_apps.get_model(
+            *household_model.split('.'))
+        self.household_log_model_cls = django_apps.get_model(
+            *self.household_log_model.split('.'))
+        self.household_structure_model_cls = django_apps.get_model(
+            *self.household_structure_model.split('.'))
+        self.pks = list(pks)
+        self.structures = {}  # household_structure pk: household pk
+        self.logs = {}  # household_log pk: household pk
+        self.skipped = {}
+
+    @property
+    def chain(self):
+        return [self.household_log_model_cls,
+                self.household_structure_model_cls,
+                self.household_model_cls]
+
+    def plan(self):
+        """Finds the structures, logs and protected households.
+        """
+        self.structures = dict(
+            self.household_structure_model_cls.objects.filter(
+                household__pk__in=self.pks).values_list('pk', 'household_id'))
+        self.logs = dict(
+            (pk, self.structures.get(household_structure_id))
+            for pk, household_structure_id in
+            self.household_log_model_cls.objects.filter(
+                household_structure__pk__in=list(self.structures)).values_list(
+                    'pk', 'household_structure_id'))
+        household_pks = {
+            self.household_log_model_cls: self.logs,
+            self.household_structure_model_cls: self.structures,
+            self.household_model_cls: dict((pk, pk) for pk in self.pks)}
+        for model_cls in self.chain:
+            to_household = household_pks.get(model_cls)
+            for rel in self.protecting_relations(model_cls):
+                for pk in rel.related_model.objects.filter(**{
+                        f'{rel.field.name}__in': list(to_household)}).values_list(
+                            rel.field.attname, flat=True).distinct():
+                    self.skip(to_household.get(pk), rel.related_model)
+        return self.skipped
+
+    def protecting_relations(self, model_cls):
+        """Returns the PROTECT relations into model_cls from
+        models outside of the chain.
+        """
+        return [rel for rel in model_cls._meta.related_objects
+                if rel.on_delete is PROTECT and rel.related_model not in self.chain]
+
+    def skip(self, household_pk, model_cls):
+        self.skipped.setdefault(household_pk, set()).add(
+            model_cls._meta.label_lower)
+
+    def delete(self):
+        """Deletes the unprotected households and returns
+        a DeleteReport.
+        """
+        self.plan()
+        pks = [pk for pk in self.pks if pk not in self.skipped]
+        try:
+            with transaction.atomic():
+                self.delete_households(pks)
+        except ProtectedError:
+            # protected further upstream, try one at a time
+            deleted = []
+            for pk in pks:
+                try:
+                    with transaction.atomic():
+                        self.delete_households([pk])
+                except ProtectedError as e:
+                    for obj in e.protected_objects:
+                        self.skip(pk, obj.__class__)
+                else:
+                    deleted.append(pk)
+            pks = deleted
+        return DeleteReport(pks, self.skipped)
+
+    def delete_households(self, pks):
+        pks = set(pks)
+        self.household_log_model_cls.objects.filter(
+            pk__in=[pk for pk, household_pk in self.logs.items()
+                    if household_pk in pks]).delete()
+        self.household_structure_model_cls.objects.filter(
+            pk__in=[pk for pk, household_pk in self.structures.items()
+                    if household_pk in pks]).delete()
+        self.household_model_cls.objects.filter(pk__in=pks).delete()
@@ -0,0 +1,108 @@
+# coding=utf-8
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.utils import IntegrityError
+
+from .history import bulk_create_with_history, send_post_save
+from .household_delete_planner import HouseholdDeletePlanner
+from .model_mixins.create_households_model_mixin import MaxHouseholdsExceededError
+
+
+class HouseholdReconciler:
+
+    """Creates or deletes the households of many plots to equal
+    their household_count, as create_or_delete_households does for
+    one plot.
+
+    The existing households of all the plots are read with one
+    query. Surplus households are deleted as one batch, see
+    HouseholdDeletePlanner, and missing households are bulk
+    created with their historical records and post_save. A plot
+    whose protected households are not deleted is saved with the
+    household_count left.
+
+        reconciler = HouseholdReconciler(plots)
+        reconciler.reconcile()
+    """
+
+    def __init__(self, plots, force=None):
+        self.plots = list(plots)
+        self.force = force
+        self.created = []
+        self.deleted = []
+
+    def reconcile(self):
+        app_config = django_apps.get_app_config('plot')
+        plots = []
+        for plot in self.plots:
+            if plot.household_count > app_config.max_households:
+                raise MaxHouseholdsExceededError(
+                    f'Number of households per plot cannot exceed '
+                    f'{app_config.max_households}. See plot.AppConfig')
+            if (plot.gps_confirmed_longitude and plot.gps_confirmed_latitude
+                    and (self.force or plot.households_changed)):
+                plots.append(plot)
+        if plots:
+            Household = django_apps.get_model(
+                *plots[0]._meta.household_model.split('.'))
+            existing = {}  # plot pk: [(household_sequence, household pk)]
+            for plot_id, household_sequence, pk in Household.objects.filter(
+                    plot__in=[plot.pk for plot in plots]).values_list(
+                        'plot_id', 'household_sequence', 'pk'):
+                existing.setdefault(plot_id, []).append((household_sequence, pk))
+            self.delete_surplus(plots, existing)
+            self.create_missing(Household, plots, existing)
+        for plot in self.plots:
+            plot._reconciled_households = plot.households_state
+        return self
+
+    def delete_surplus(self, plots, existing):
+        """Deletes the households above the household_count of each
+        plot, highest household_sequence first.
+        """
+        surplus = {}
+        for plot in plots:
+            households = sorted(existing.get(plot.pk, []))
+            if len(households) > plot.household_count:
+                surplus[plot.pk] = [pk for _, pk in households[plot.household_count:]]
+        if not surplus:
+            return
+        report = HouseholdDeletePlanner(
+            household_model=plots[0]._meta.household_model,
+            pks=[pk for pks in surplus.values() for pk in pks]).delete()
+        self.deleted = list(report.deleted)
+        deleted = set(report.deleted)
+        for plot in plots:
+            if plot.pk in surplus:
+                household_count = len(existing[plot.pk]) - len(
+                    [pk for pk in surplus[plot.pk] if pk in deleted])
+                if household_count != plot.household_count:
+                    plot.household_count = household_count
+                    plot.save(update_fields=['household_count'])
+
+    def create_missing(self, Household, plots, existing):
+        """Bulk creates the households missing for the
+        household_count of each plot or, if created concurrently,
+        creates them one plot at a time.
+        """
+        missing = []
+        households = []
+        for plot in plots:
+            sequences = set(sequence for sequence, _ in existing.get(plot.pk, []))
+            if len(sequences) < plot.household_count:
+                missing.append(plot)
+                households.extend(
+                    Household(**plot.get_household_options(n))
+                    for n in range(1, plot.household_count + 1) if n not in sequences)
+        if not households:
+            return
+        try:
+            with transaction.atomic():
+                bulk_create_with_history(Household, households)
+                send_post_save(Household, households)
+        except IntegrityError:
+            for plot in missing:
+                plot.create_households()
+        else:
+            self.created = households
@@ -0,0 +1,262 @@
+# coding=utf-8
+
+import math
+import os
+import socket
+import threading
+import time
+
+from collections import deque
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import connection
+
+
+class Stage:
+
+    """Timings and query counts of one instrumented stage, with the
+    last sample_size timings kept for percentiles.
+
+    queried is the number of calls whose queries were counted, see
+    InstrumentationRegistry.
+    """
+
+    __slots__ = ('name', 'count', 'total', 'queries', 'queried', 'samples')
+
+    def __init__(self, name, sample_size):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.queries = 0
+        self.queried = 0
+        self.samples = deque(maxlen=sample_size)
+
+    def add(self, seconds, queries=None):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+        if queries is not None:
+            self.queries += queries
+            self.queried += 1
+
+    def merge(self, values):
+        """Adds the values of a stage of another process, see
+        to_dict().
+        """
+        self.count += values['count']
+        self.total += values['total']
+        self.queries += values['queries']
+        self.queried += values['queried']
+        self.samples.extend(values['samples'])
+
+    def to_dict(self):
+        return dict(count=self.count, total=self.total, queries=self.queries,
+                    queried=self.queried, samples=list(self.samples))
+
+    def percentile(self, percent):
+        """Returns the nearest rank percentile of the samples in
+        seconds, or None.
+        """
+        if not self.samples:
+            return None
+        samples = sorted(self.samples)
+        rank = max(math.ceil(percent / 100 * len(samples)), 1)
+        return samples[rank - 1]
+
+    def summary(self):
+        return dict(
+            stage=self.name,
+            count=self.count,
+            total=self.total,
+            mean=self.total / self.count if self.count else None,
+            p50=self.percentile(50),
+            p95=self.percentile(95),
+            p99=self.percentile(99),
+            queries=self.queries / self.queried if self.queried else None)
+
+
+class Measurement:
+
+    __slots__ = ('registry', 'stage', 'start', 'query_mark')
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.query_mark = query_mark() if connection.queries_logged else False
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        queries = None
+        if self.query_mark is not False:
+            queries = queries_since(self.query_mark)
+        self.registry.record(self.stage, seconds, queries)
+        return False
+
+
+def query_mark():
+    """Returns the last logged query of the connection, or None.
+    """
+    return connection.queries_log[-1] if connection.queries_log else None
+
+
+def queries_since(mark):
+    """Returns the number of queries logged after the mark.
+    """
+    count = 0
+    for query in reversed(connection.queries_log):
+        if query is mark:
+            break
+        count += 1
+    return count
+
+
+class InstrumentationRegistry:
+
+    """Per process registry of the timings of the plot hot paths.
+
+    Off unless enabled, see AppConfig.instrumentation. When off, an
+    instrumented stage costs one attribute check.
+
+    Each process publishes its stages to the cache at most every
+    publish_seconds, keyed by host and pid, and collected() merges
+    the stages of every process that published in the last
+    process_timeout seconds, see plot_stats. The cache must be shared
+    by the processes, e.g. memcached or the database cache, not the
+    default local memory cache. Percentiles of merged stages are over
+    the last samples of each process.
+
+    Queries are counted only where the connection logs them, e.g.
+    DEBUG, as Django 1.11 has no execute wrapper. Otherwise queries
+    is None, shown as n/a.
+
+        with instrumentation.measure('plot.save'):
+            ...
+        instrumentation.summaries()
+        instrumentation.collected()
+    """
+
+    sample_size = 1000
+    cache_alias = 'default'
+    cache_prefix = 'plot.instrumentation'
+    publish_seconds = 10
+    process_timeout = 86400
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.published = time.monotonic()
+        self.process = f'{socket.gethostname()}:{os.getpid()}'
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def processes_key(self):
+        return f'{self.cache_prefix}:processes'
+
+    def measure(self, stage):
+        return Measurement(self, stage)
+
+    def record(self, stage, seconds, queries=None):
+        with self.lock:
+            try:
+                stats = self.stages[stage]
+            except KeyError:
+                stats = self.stages[stage] = Stage(stage, self.sample_size)
+            stats.add(seconds, queries)
+            publish = time.monotonic() - self.published >= self.publish_seconds
+        if publish:
+            self.publish()
+
+    def publish(self):
+        """Writes the stages of this process to the cache and adds
+        the process to the cached list of processes.
+        """
+        with self.lock:
+            self.published = time.monotonic()
+            stages = {name: stage.to_dict() for name, stage in self.stages.items()}
+        key = f'{self.cache_prefix}:{self.process}'
+        self.cache.set(key, stages, self.process_timeout)
+        processes = self.cache.get(self.processes_key) or []
+        if key not in processes:
+            self.cache.set(
+                self.processes_key, processes + [key], self.process_timeout)
+
+    def collected(self):
+        """Returns a list of the summary of each stage by name merged
+        over the processes that published to the cache.
+        """
+        stages = {}
+        processes = self.cache.get(self.processes_key) or []
+        for values in self.cache.get_many(processes).values():
+            for name, stage_values in values.items():
+                stages.setdefault(
+                    name, Stage(name, self.sample_size * len(processes))).merge(
+                        stage_values)
+        return [stages[name].summary() for name in sorted(stages)]
+
+    def summaries(self):
+        """Returns a list of the summary of each stage of this
+        process by name.
+        """
+        with self.lock:
+            return [self.stages[name].summary() for name in sorted(self.stages)]
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+
+    def reset_collected(self):
+        """Removes the published stages of every process from the
+        cache.
+        """
+        processes = self.cache.get(self.processes_key) or []
+        self.cache.delete_many(processes + [self.processes_key])
+
+
+instrumentation = InstrumentationRegistry()
+
+
+def instrumented(stage):
+    """Decorator that records the calls of a function as the stage
+    while instrumentation is enabled.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with instrumentation.measure(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class measure_stage:
+
+    """Context manager that records the block as the stage while
+    instrumentation is enabled.
+    """
+
+    __slots__ = ('stage', 'measurement')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.measurement = None
+
+    def __enter__(self):
+        if instrumentation.enabled:
+            self.measurement = instrumentation.measure(self.stage).__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.measurement:
+            self.measurement.__exit__(exc_type, exc_value, traceback)
+        return False
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...bulk_plot_confirmation import BulkPlotConfirmation, BulkPlotConfirmationError
+from ...mapper_snapshot import site_mapper_snapshot
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Recalculates distance_from_target and confirmed for the plots in '
+        'each map area, e.g. after the mapper or target radius changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'map_areas', nargs='*',
+            help='map areas to recalculate, defaults to all')
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=1000,
+            help='number of plots to write per UPDATE')
+
+    def handle(self, *args, **options):
+        for map_area in options.get('map_areas') or sorted(
+                site_mapper_snapshot.get().map_areas):
+            try:
+                confirmation = BulkPlotConfirmation(
+                    map_area=map_area, batch_size=options.get('batch_size')).run()
+            except BulkPlotConfirmationError as e:
+                raise CommandError(e)
+            self.stdout.write(
+                f'{map_area}: {confirmation.plots} plots, {confirmation.confirmed} '
+                f'confirmed, {confirmation.changed} changed in '
+                f'{confirmation.elapsed:.2f}s')
+            if confirmation.out_of_radius:
+                self.stdout.write(self.style.WARNING(
+                    f'  {confirmation.out_of_radius} confirmed plots are out of '
+                    f'radius and were left confirmed, with their confirmation '
+                    f'point and households.'))
+            if confirmation.outside_map_area:
+                self.stdout.write(self.style.WARNING(
+                    f'  {confirmation.outside_map_area} plots have a target point '
+                    f'outside of the map area.'))
+        self.stdout.write(self.style.SUCCESS('Done.'))
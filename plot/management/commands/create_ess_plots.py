@@ -1,47 +1,52 @@
 from django.core.management.base import BaseCommand, CommandError
 
-from ...models import Plot
-from django.db.utils import IntegrityError
+from ...plot_importer import PlotImporter, PlotImportError, Point
 
 
-def create_ess_plots(points, map_area):
+def create_ess_plots(points, map_area, batch_size=None):
     """Create plot instances.
 
         points: List of list, e.g [[latitude, longitude], [latitude, longitude]]
         map_area: Name of map location, e.g test_community.
     """
-    number_of_points = 0
-    for point in points:
-        latitude = point[0]
-        longitude = point[1]
-        number_of_points += 1
-        try:
-            Plot.objects.create(
-                gps_target_lat=latitude,
-                gps_target_lon=longitude,
-                map_area=map_area,
-                ess=True)
-            print(number_of_points, "number of plots created")
-        except IntegrityError:
-            pass
+    importer = PlotImporter(map_area=map_area, batch_size=batch_size)
+    importer.import_points(
+        Point(line_number, point[0], point[1])
+        for line_number, point in enumerate(points, start=1))
+    return importer
 
 
 class Command(BaseCommand):
 
-    args = (
-        '<community name e.g otse>, file path e.g /Users/django/source/bcpp/plots.csv')
-    help = 'Closes the specified poll for voting'
+    help = (
+        'Imports ESS plots for a map area from a CSV or GeoJSON file '
+        'of target points, e.g. create_ess_plots plots.csv otse')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file', help='path to a CSV or GeoJSON file of target points')
+        parser.add_argument(
+            'map_area', help='map area of the plots, e.g. test_community')
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=500,
+            help='number of plots to commit per transaction')
+        parser.add_argument(
+            '--format', dest='file_format', choices=['csv', 'geojson'],
+            default=None, help='file format, defaults to the file extension')
 
     def handle(self, *args, **options):
-        fname = (
-            '/Users/django/source/pair9/plot_list_metsimotlhabe_75pct_update_201504011622.csv')
-        map_area = 'test_community'
-        f = open(fname, 'r')
-        data = f.readlines()
-        data.pop(0)
-        points = []
-        for point in data:
-            point = point.strip().split(',')
-            points.append([float(point[1]), float(point[2])])
-        create_ess_plots(points, map_area)
-        self.stdout.write(self.style.SUCCESS('Succefully created plots.'))
+        try:
+            importer = PlotImporter(
+                map_area=options.get('map_area'),
+                batch_size=options.get('batch_size'))
+            importer.import_file(
+                options.get('file'), file_format=options.get('file_format'))
+        except (PlotImportError, OSError) as e:
+            raise CommandError(e)
+        for rejected in importer.rejected:
+            self.stdout.write(self.style.WARNING(
+                f'  rejected row {rejected.line_number}: {rejected.reason}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {importer.created} plots, rejected {len(importer.rejected)} '
+            f'rows in {importer.elapsed:.1f}s '
+            f'({importer.rows_per_second:.0f} rows/s).'))
@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...plot_exporter import PlotExporter, PlotExportError
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Streams plots, plot logs or plot log entries to CSV or JSON Lines, '
+        'e.g. export_plots plot.plot plots.csv --decrypt cso_number')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', choices=list(PlotExporter.models),
+            help='model to export')
+        parser.add_argument(
+            'file', help='path of the file to write, or - for stdout')
+        parser.add_argument(
+            '--format', dest='file_format', choices=PlotExporter.formats,
+            default=None, help='file format, defaults to the file extension or csv')
+        parser.add_argument(
+            '--fields', dest='fields', nargs='+', default=None,
+            help='fields to export, defaults to all not encrypted')
+        parser.add_argument(
+            '--decrypt', dest='decrypt', nargs='+', default=None,
+            help='encrypted fields to decrypt and export')
+        parser.add_argument(
+            '--map-area', dest='map_area', default=None,
+            help='export plots of this map area only')
+        parser.add_argument(
+            '--chunk-size', dest='chunk_size', type=int, default=2000,
+            help='rows to write at a time')
+
+    def handle(self, *args, **options):
+        path = options.get('file')
+        file_format = options.get('file_format')
+        if not file_format:
+            file_format = 'jsonl' if path.endswith(('.jsonl', '.json')) else 'csv'
+        try:
+            exporter = PlotExporter(
+                model=options.get('model'),
+                fields=options.get('fields'),
+                decrypt=options.get('decrypt'),
+                map_area=options.get('map_area'),
+                file_format=file_format,
+                chunk_size=options.get('chunk_size'))
+            if path == '-':
+                exporter.export(sys.stdout)
+            else:
+                with open(path, 'w', newline='') as f:
+                    exporter.export(f)
+        except (PlotExportError, OSError) as e:
+            raise CommandError(e)
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {exporter.rows} rows in {exporter.elapsed:.1f}s '
+            f'({exporter.rows_per_second:.0f} rows/s).'))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...field_load import FieldLoadError, FieldLoadGenerator
+from ...plot_importer import PlotImportError
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Generates plots, plot log entries and households in each map area '
+        'for capacity testing, e.g. generate_field_load 1234 --plots 100000 '
+        '--log-entries 150000. Run select_rss_plots afterwards for RSS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'seed', help='seed of the generated data')
+        parser.add_argument(
+            'map_areas', nargs='*',
+            help='map areas to generate plots in, defaults to all')
+        parser.add_argument(
+            '--plots', dest='plots', type=int, default=1000,
+            help='plots per map area')
+        parser.add_argument(
+            '--log-entries', dest='log_entries', type=int, default=1500,
+            help='plot log entries per map area')
+        parser.add_argument(
+            '--weeks', dest='weeks', type=int, default=6,
+            help='weeks of report dates up to now')
+        parser.add_argument(
+            '--inaccessible', dest='inaccessible', type=float, default=0.2,
+            help='proportion of log entries that are inaccessible')
+        parser.add_argument(
+            '--confirmed', dest='confirmed', type=float, default=0.6,
+            help='proportion of accessible plots that are confirmed')
+        parser.add_argument(
+            '--max-household-count', dest='max_household_count', type=int, default=3,
+            help='maximum households of a confirmed plot')
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=1000,
+            help='plots per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            generator = FieldLoadGenerator(
+                map_areas=options.get('map_areas'),
+                plots=options.get('plots'),
+                log_entries=options.get('log_entries'),
+                seed=options.get('seed'),
+                weeks=options.get('weeks'),
+                inaccessible=options.get('inaccessible'),
+                confirmed=options.get('confirmed'),
+                max_household_count=options.get('max_household_count'),
+                batch_size=options.get('batch_size')).run()
+        except (FieldLoadError, PlotImportError) as e:
+            raise CommandError(e)
+        created = generator.created
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created["plots"]} plots ({created["confirmed"]} confirmed), '
+            f'{created["log_entries"]} plot log entries and {created["households"]} '
+            f'households in {generator.elapsed:.2f}s '
+            f'({generator.rows_per_second:.0f} rows/s).'))
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...change_feed import ChangeFeed, ChangeFeedError
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Writes the rows of a plot model changed since a watermark as JSON '
+        'Lines of model, pk and watermark. Rows changed in the overlap '
+        'before the watermark are written again, de-duplicate on model, pk '
+        'and watermark. E.g. '
+        'plot_change_feed plot.plot --since "2017-02-11T11:56:00+00:00|<pk>"')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', choices=ChangeFeed.models,
+            help='model to read changes of')
+        parser.add_argument(
+            '--since', dest='watermark', default=None,
+            help='watermark of the last row received, defaults to the start')
+        parser.add_argument(
+            '--page-size', dest='page_size', type=int, default=500,
+            help='rows per page')
+        parser.add_argument(
+            '--pages', dest='pages', type=int, default=1,
+            help='pages to read, 0 for all')
+        parser.add_argument(
+            '--settle-seconds', dest='settle_seconds', type=int, default=None,
+            help=f'ignore rows modified in the last n seconds, '
+                 f'defaults to {ChangeFeed.settle_seconds}')
+        parser.add_argument(
+            '--overlap-seconds', dest='overlap_seconds', type=int, default=None,
+            help=f'read again from n seconds before the watermark, '
+                 f'defaults to {ChangeFeed.overlap_seconds}')
+
+    def handle(self, *args, **options):
+        try:
+            feed = ChangeFeed(
+                model=options.get('model'),
+                page_size=options.get('page_size'),
+                settle_seconds=options.get('settle_seconds'),
+                overlap_seconds=options.get('overlap_seconds'))
+            watermark = options.get('watermark')
+            page = None
+            rows = 0
+            for page in feed.changes(
+                    watermark=watermark, pages=options.get('pages') or None):
+                for row in page.rows:
+                    self.stdout.write(json.dumps(dict(
+                        model=feed.model,
+                        pk=str(row.id),
+                        history_type=getattr(row, 'history_type', None),
+                        watermark=str(feed.get_watermark(row)))))
+                watermark = page.watermark
+                rows += len(page.rows)
+        except ChangeFeedError as e:
+            raise CommandError(e)
+        self.stderr.write(self.style.SUCCESS(
+            f'Read {rows} changed rows. More: {page.has_more}. '
+            f'Watermark: {watermark or ""}'))
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from ...instrumentation import instrumentation
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Writes the count, p50, p95 and p99 of each instrumented plot stage '
+        'merged over the processes, e.g. web and sync workers, that published '
+        'their stages to the cache. With --run, enables instrumentation, runs '
+        'the command, e.g. plot_stats --run confirm_plots test_community, and '
+        'writes the stages of that run only. Queries are n/a unless the '
+        'process logs queries, e.g. DEBUG.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--run', dest='run', nargs='+', default=None,
+            help='command and arguments to run with instrumentation enabled')
+        parser.add_argument(
+            '--json', dest='json', action='store_true', default=False,
+            help='write the stages as JSON')
+        parser.add_argument(
+            '--reset', dest='reset', action='store_true', default=False,
+            help='reset the stages after writing them')
+
+    def handle(self, *args, **options):
+        if options.get('run'):
+            enabled = instrumentation.enabled
+            instrumentation.reset()
+            instrumentation.enabled = True
+            try:
+                call_command(*options.get('run'))
+            finally:
+                instrumentation.enabled = enabled
+            summaries = instrumentation.summaries()
+        else:
+            summaries = instrumentation.collected()
+        if options.get('json'):
+            self.stdout.write(json.dumps(summaries, indent=2))
+        else:
+            self.write_table(summaries)
+        if options.get('reset'):
+            instrumentation.reset()
+            if not options.get('run'):
+                instrumentation.reset_collected()
+
+    def write_table(self, summaries):
+        if not summaries:
+            self.stdout.write(
+                'No stages recorded. Processes with instrumentation enabled, '
+                'see AppConfig.instrumentation, publish their stages to the '
+                f'cache every {instrumentation.publish_seconds}s.')
+            return
+        width = max(len(summary['stage']) for summary in summaries)
+        self.stdout.write(
+            f'{"stage":<{width}} {"count":>8} {"p50 ms":>9} {"p95 ms":>9} '
+            f'{"p99 ms":>9} {"queries":>8}')
+        for summary in summaries:
+            queries = 'n/a' if summary['queries'] is None else f'{summary["queries"]:.1f}'
+            self.stdout.write(
+                f'{summary["stage"]:<{width}} {summary["count"]:>8} '
+                f'{summary["p50"] * 1000:>9.2f} {summary["p95"] * 1000:>9.2f} '
+                f'{summary["p99"] * 1000:>9.2f} '
+                f'{queries:>8}')
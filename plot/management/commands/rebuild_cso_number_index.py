@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ...blind_index import update_cso_number_index
+from ...models import Plot
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Recalculates the blind index of cso_number for all plots, e.g. '
+        'after changing settings.PLOT_BLIND_INDEX_KEY.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=500,
+            help='number of plots to write per UPDATE')
+
+    def handle(self, *args, **options):
+        updated = update_cso_number_index(Plot, batch_size=options.get('batch_size'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the cso_number index of {updated} plots.'))
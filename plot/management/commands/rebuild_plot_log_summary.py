@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from ...models import PlotLog
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Recalculates entry_count, last_log_status and last_report_datetime '
+        'on PlotLog from the plot log entries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'plot_identifiers', nargs='*',
+            help='plot identifiers to rebuild, defaults to all')
+
+    def handle(self, *args, **options):
+        pks = None
+        if options.get('plot_identifiers'):
+            pks = PlotLog.objects.filter(
+                plot__plot_identifier__in=options.get('plot_identifiers')).values_list(
+                    'pk', flat=True)
+        updated = PlotLog.objects.update_log_summary(pks=pks)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the log summary of {updated} plot logs.'))
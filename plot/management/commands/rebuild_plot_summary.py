@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ...models import PlotSummary
+
+
+class Command(BaseCommand):
+
+    help = 'Recalculates PlotSummary, the plot counts per map area and section.'
+
+    def handle(self, *args, **options):
+        summaries = PlotSummary.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {summaries} plot summaries.'))
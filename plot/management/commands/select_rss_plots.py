@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...constants import TWENTY_PERCENT, FIVE_PERCENT
+from ...rss_selection import RssSelection, RssSelectionError
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Randomly selects the RSS plots of a map area with a seed, '
+        'e.g. select_rss_plots otse 20170301 --by-section')
+
+    def add_arguments(self, parser):
+        parser.add_argument('map_area', help='map area of the plots')
+        parser.add_argument(
+            'seed', help='seed of the selection, keep it to re-run the selection')
+        parser.add_argument(
+            '--by-section', dest='by_section', action='store_true', default=False,
+            help='select within each section')
+        parser.add_argument(
+            '--twenty-percent', dest='twenty_percent', type=float, default=0.20,
+            help='proportion selected as TWENTY_PERCENT')
+        parser.add_argument(
+            '--five-percent', dest='five_percent', type=float, default=0.05,
+            help='proportion selected as FIVE_PERCENT')
+        parser.add_argument(
+            '--dry-run', dest='dry_run', action='store_true', default=False,
+            help='report the selection without saving it')
+
+    def handle(self, *args, **options):
+        try:
+            selection = RssSelection(
+                map_area=options.get('map_area'),
+                seed=options.get('seed'),
+                by_section=options.get('by_section'),
+                twenty_percent=options.get('twenty_percent'),
+                five_percent=options.get('five_percent')).run(
+                    dry_run=options.get('dry_run'))
+        except RssSelectionError as e:
+            raise CommandError(e)
+        for stratum, counts in selection.strata.items():
+            self.stdout.write(
+                f'  {stratum or options.get("map_area")}: '
+                f'{counts[TWENTY_PERCENT]} twenty percent, '
+                f'{counts[FIVE_PERCENT]} five percent, {counts[None]} not selected')
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would change" if options.get("dry_run") else "Changed"} '
+            f'{selection.changed} plots in {selection.elapsed:.2f}s. '
+            f'Digest {selection.digest}.'))
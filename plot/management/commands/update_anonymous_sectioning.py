@@ -1,14 +1,16 @@
 from django.core.management.base import BaseCommand
 
-from edc_map.site_mappers import site_mappers
 from edc_map.models import InnerContainer
 
+from ...mapper_snapshot import site_mapper_snapshot
+
 
 def update_anonymous_sectioning():
-    inner_containers = InnerContainer.objects.filter(map_area=site_mappers.current_map_area)
+    current_mapper = site_mapper_snapshot.get().current_mapper
+    inner_containers = InnerContainer.objects.filter(map_area=current_mapper.map_area)
     count = 0
     for inner_container in inner_containers:
-        ano_plot_dentifier = site_mappers.current_map_code + inner_container.device_id + '00-00'
+        ano_plot_dentifier = current_mapper.map_code + inner_container.device_id + '00-00'
         inner_container.labels = inner_container.labels + ',' + ano_plot_dentifier
         inner_container.save()
         count += 1
@@ -1,23 +1,220 @@
 # coding=utf-8
 
+from math import pi
+
+from django.apps import apps as django_apps
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from edc_base.utils import get_utcnow
+
+from .blind_index import blind_index
+from .natural_key_cache import natural_key_cache
+from .plot_summary import rebuild_plot_summary, summary_counts
+from .spatial import CELL_SIZE, EARTH_RADIUS, METERS_PER_DEGREE
+from .spatial import bounding_box, distances, spatial_cells
+
+
+class NaturalKeysManagerMixin:
+
+    """Adds get_by_natural_keys to a manager and the natural key
+    cache to get_by_natural_key.
+
+    natural_key_lookups are the lookups of the natural key values,
+    in order, and natural_key_select_related what natural_key()
+    of the model needs.
+    """
+
+    natural_key_lookups = []
+    natural_key_select_related = []
+    natural_keys_chunk_size = 500
 
+    def get_by_cached_natural_key(self, *natural_key):
+        try:
+            obj = natural_key_cache.get(self.model, natural_key)
+        except KeyError:
+            return self.get(**dict(zip(self.natural_key_lookups, natural_key)))
+        if obj is None:
+            raise self.model.DoesNotExist(
+                f'{self.model._meta.object_name} matching query does not exist.')
+        return obj
 
-class PlotManager(models.Manager):
+    def get_by_natural_keys(self, natural_keys):
+        """Returns a dict of natural key: object for the natural keys
+        that exist with one query per chunk.
+        """
+        natural_keys = list(set(tuple(natural_key) for natural_key in natural_keys))
+        objs = {}
+        for index in range(0, len(natural_keys), self.natural_keys_chunk_size):
+            chunk = set(natural_keys[index:index + self.natural_keys_chunk_size])
+            lookups = {
+                f'{lookup}__in': set(natural_key[n] for natural_key in chunk)
+                for n, lookup in enumerate(self.natural_key_lookups)}
+            queryset = self.get_queryset().filter(**lookups)
+            if self.natural_key_select_related:
+                queryset = queryset.select_related(*self.natural_key_select_related)
+            for obj in queryset:
+                natural_key = obj.natural_key()
+                # a multi column key matches the product of the values
+                if natural_key in chunk:
+                    objs[natural_key] = obj
+        return objs
+
+
+class PlotManager(NaturalKeysManagerMixin, models.Manager):
+
+    natural_key_lookups = ['plot_identifier']
 
     def get_by_natural_key(self, plot_identifier):
-        return self.get(plot_identifier=plot_identifier)
+        return self.get_by_cached_natural_key(plot_identifier)
+
+    def filter_cso_number(self, cso_number):
+        """Returns a queryset of the plots with the CSO number, an
+        equality lookup on cso_number_index.
+        """
+        return self.get_queryset().filter(cso_number_index=blind_index(cso_number))
+
+    def within_radius(self, latitude, longitude, meters):
+        """Returns a list of the plots with a target point within
+        meters of the point, nearest first.
+
+        Candidates are selected by spatial_cell, or a bounding box if
+        too many cells, as pk and target point only. The plots within
+        meters are then fetched by pk, each with its distance in meters
+        set on `distance`.
+        """
+        return self.fetch_ranked(
+            self.rank_by_distance(latitude, longitude, meters))
+
+    def nearest(self, latitude, longitude, k):
+        """Returns a list of the k plots nearest to the point,
+        nearest first, with `distance` set as for within_radius.
+
+        The search radius doubles from one cell until k plots are
+        found, prefiltered by spatial_cell and then by a bounding box,
+        up to half the circumference of the earth. Only the k nearest
+        are fetched.
+        """
+        meters = CELL_SIZE * METERS_PER_DEGREE
+        while True:
+            ranked = self.rank_by_distance(latitude, longitude, meters)
+            if len(ranked) >= k or meters >= pi * EARTH_RADIUS:
+                return self.fetch_ranked(ranked[:k])
+            meters = min(meters * 2, pi * EARTH_RADIUS)
 
+    def rank_by_distance(self, latitude, longitude, meters):
+        """Returns a list of (pk, distance) of the plots with a target
+        point within meters of the point, nearest first.
+        """
+        candidates = self.get_queryset().exclude(
+            gps_target_lat__isnull=True).exclude(gps_target_lon__isnull=True)
+        cells = spatial_cells(latitude, longitude, meters)
+        if cells is None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(
+                latitude, longitude, meters)
+            candidates = candidates.filter(gps_target_lat__range=(min_lat, max_lat))
+            if max_lon - min_lon < 360:
+                candidates = candidates.filter(gps_target_lon__range=(min_lon, max_lon))
+        else:
+            candidates = candidates.filter(spatial_cell__in=cells)
+        candidates = list(candidates.order_by().values_list(
+            'pk', 'gps_target_lat', 'gps_target_lon'))
+        if not candidates:
+            return []
+        pks, latitudes, longitudes = zip(*candidates)
+        plot_distances = distances(latitude, longitude, latitudes, longitudes)
+        ranked = []
+        for index in plot_distances.argsort(kind='stable'):
+            distance = float(plot_distances[index])
+            if distance > meters:
+                break
+            ranked.append((pks[index], distance))
+        return ranked
 
-class PlotLogManager(models.Manager):
+    def fetch_ranked(self, ranked):
+        """Returns a list of the plots of a list of (pk, distance), in
+        order, with `distance` set.
+        """
+        if not ranked:
+            return []
+        plots = self.get_queryset().in_bulk([pk for pk, _ in ranked])
+        ordered = []
+        for pk, distance in ranked:
+            if pk in plots:  # unless deleted since ranked
+                plots[pk].distance = distance
+                ordered.append(plots[pk])
+        return ordered
+
+
+class PlotLogManager(NaturalKeysManagerMixin, models.Manager):
+
+    natural_key_lookups = ['plot__plot_identifier']
+    natural_key_select_related = ['plot']
 
     def get_by_natural_key(self, plot_identifier):
-        return self.get(plot__plot_identifier=plot_identifier)
+        return self.get_by_cached_natural_key(plot_identifier)
+
+    def update_log_summary(self, pks=None):
+        """Recalculates entry_count, last_log_status and
+        last_report_datetime from the plot log entries with one
+        UPDATE statement and sets modified.
 
+        Updates all plot logs if pks is None.
+        """
+        PlotLogEntry = django_apps.get_model(*'plot.plotlogentry'.split('.'))
+        entries = PlotLogEntry.objects.filter(plot_log=OuterRef('pk'))
+        last_entry = entries.order_by('-report_datetime', '-created')[:1]
+        plot_logs = self.all() if pks is None else self.filter(pk__in=list(pks))
+        return plot_logs.update(
+            entry_count=Coalesce(Subquery(
+                entries.order_by().values('plot_log').annotate(
+                    count=Count('pk')).values('count'),
+                output_field=IntegerField()), 0),
+            last_log_status=Subquery(last_entry.values('log_status')),
+            last_report_datetime=Subquery(last_entry.values('report_datetime')),
+            modified=get_utcnow())
 
-class PlotLogEntryManager(models.Manager):
+
+class PlotLogEntryManager(NaturalKeysManagerMixin, models.Manager):
+
+    natural_key_lookups = ['report_datetime', 'plot_log__plot__plot_identifier']
+    natural_key_select_related = ['plot_log__plot']
 
     def get_by_natural_key(self, report_datetime, plot_identifier):
-        return self.get(
-            report_datetime=report_datetime,
-            plot_log__plot__plot_identifier=plot_identifier)
+        return self.get_by_cached_natural_key(report_datetime, plot_identifier)
+
+
+class PlotIdentifierSequenceManager(models.Manager):
+
+    def get_by_natural_key(self, map_code, device_id):
+        return self.get(map_code=map_code, device_id=device_id)
+
+
+class PlotSummaryManager(models.Manager):
+
+    def get_by_natural_key(self, map_area, section):
+        return self.get(map_area=map_area, section=section)
+
+    def for_map_area(self, map_area):
+        """Returns a dict of the counts of the map area summed over
+        its sections.
+        """
+        totals = self.filter(map_area=map_area).aggregate(
+            **{field: Sum(field) for field in summary_counts})
+        return {field: value or 0 for field, value in totals.items()}
+
+    def for_section(self, map_area, section):
+        """Returns a dict of the counts of the section of the map
+        area.
+        """
+        values = self.filter(
+            map_area=map_area, section=section or '').values(*summary_counts).first()
+        return values or {field: 0 for field in summary_counts}
+
+    def rebuild(self):
+        """Recalculates the summary from the Plot table and returns
+        the number of summaries.
+        """
+        Plot = django_apps.get_model(*'plot.plot'.split('.'))
+        return rebuild_plot_summary(Plot, self.model)
@@ -0,0 +1,88 @@
+# coding=utf-8
+
+from collections import namedtuple
+from threading import Lock
+from types import MappingProxyType
+
+from edc_map.exceptions import MapperError
+from edc_map.site_mappers import site_mappers
+
+MapperInfo = namedtuple(
+    'MapperInfo', 'map_area map_code center_lat center_lon radius location_boundary')
+
+
+class MapperSnapshot:
+
+    """An immutable copy of the site mapper registry.
+    """
+
+    def __init__(self, registry, current_map_area=None):
+        mappers = {}
+        for map_area, mapper in registry.items():
+            mappers[map_area] = MapperInfo(
+                map_area=map_area,
+                map_code=mapper.map_code,
+                center_lat=mapper.center_lat,
+                center_lon=mapper.center_lon,
+                radius=mapper.radius,
+                location_boundary=tuple(getattr(mapper, 'location_boundary', None) or ()))
+        self.mappers = MappingProxyType(mappers)
+        self.map_areas = frozenset(mappers)
+        self.current_map_area = current_map_area
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError(f'MapperSnapshot is immutable. Got {name}.')
+        super().__setattr__(name, value)
+
+    def get_mapper(self, map_area):
+        try:
+            return self.mappers[map_area]
+        except KeyError:
+            raise MapperError(
+                f'Invalid map area. Got \'{map_area}\'. Site mapper expects one '
+                f'of map_areas={sorted(self.map_areas)}.')
+
+    @property
+    def current_mapper(self):
+        return self.get_mapper(self.current_map_area)
+
+
+class SiteMapperSnapshot:
+
+    """Builds the MapperSnapshot once and again only if the site
+    mapper registry is replaced or a mapper is registered.
+
+    Call invalidate() after changing a registered mapper or the
+    current map area in place.
+
+        snapshot = site_mapper_snapshot.get()
+        if map_area in snapshot.map_areas:
+            ...
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.registry = None  # referenced so that its id is not reused
+        self.registry_length = None
+        self.snapshot = None
+
+    def get(self):
+        registry = site_mappers.registry
+        snapshot = self.snapshot
+        if (snapshot is None or registry is not self.registry
+                or len(registry) != self.registry_length):
+            with self.lock:
+                snapshot = MapperSnapshot(
+                    dict(registry),
+                    current_map_area=getattr(site_mappers, 'current_map_area', None))
+                self.snapshot = snapshot
+                self.registry, self.registry_length = registry, len(registry)
+        return snapshot
+
+    def invalidate(self):
+        with self.lock:
+            self.snapshot = None
+
+
+site_mapper_snapshot = SiteMapperSnapshot()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_revision.revision_field
+import edc_base.model_fields.hostname_modification_field
+import edc_base.model_fields.userfield
+import edc_base.model_fields.uuid_auto_field
+import edc_base.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0002_auto_20170211_1156'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlotIdentifierSequence',
+            fields=[
+                ('created', models.DateTimeField(
+                    blank=True, default=edc_base.utils.get_utcnow)),
+                ('modified', models.DateTimeField(
+                    blank=True, default=edc_base.utils.get_utcnow)),
+                ('user_created', edc_base.model_fields.userfield.UserField(
+                    blank=True, max_length=50, verbose_name='user created')),
+                ('user_modified', edc_base.model_fields.userfield.UserField(
+                    blank=True, max_length=50, verbose_name='user modified')),
+                ('hostname_created', models.CharField(
+                    blank=True, help_text='System field. (modified on create only)',
+                    max_length=50)),
+                ('hostname_modified', edc_base.model_fields.hostname_modification_field.HostnameModificationField(
+                    blank=True, help_text='System field. (modified on every save)', max_length=50)),
+                ('revision', django_revision.revision_field.RevisionField(
+                    blank=True, editable=False, help_text='System field. Git repository tag:branch:commit.',
+                    max_length=75, null=True, verbose_name='Revision')),
+                ('id', edc_base.model_fields.uuid_auto_field.UUIDAutoField(
+                    blank=True, editable=False, help_text='System auto field. UUID primary key.',
+                    primary_key=True, serialize=False)),
+                ('map_code', models.CharField(max_length=25, unique=True)),
+                ('last_sequence', models.IntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def update_log_summary(apps, schema_editor):
+    PlotLog = apps.get_model('plot', 'PlotLog')
+    PlotLogEntry = apps.get_model('plot', 'PlotLogEntry')
+    for plot_log in PlotLog.objects.all().iterator():
+        entries = PlotLogEntry.objects.filter(plot_log=plot_log)
+        last_entry = entries.order_by('-report_datetime', '-created').first()
+        if last_entry:
+            PlotLog.objects.filter(pk=plot_log.pk).update(
+                entry_count=entries.count(),
+                last_log_status=last_entry.log_status,
+                last_report_datetime=last_entry.report_datetime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0003_plotidentifiersequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plotlog',
+            name='entry_count',
+            field=models.IntegerField(
+                default=0, editable=False,
+                help_text='Number of plot log entries. Updated by the entry signals.'),
+        ),
+        migrations.AddField(
+            model_name='plotlog',
+            name='last_log_status',
+            field=models.CharField(
+                choices=[('accessible', 'Accessible'), ('inaccessible', 'Inaccessible')],
+                editable=False, help_text='log_status of the latest plot log entry.',
+                max_length=25, null=True),
+        ),
+        migrations.AddField(
+            model_name='plotlog',
+            name='last_report_datetime',
+            field=models.DateTimeField(
+                editable=False, help_text='report_datetime of the latest plot log entry.',
+                null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalplotlog',
+            name='entry_count',
+            field=models.IntegerField(
+                default=0, editable=False,
+                help_text='Number of plot log entries. Updated by the entry signals.'),
+        ),
+        migrations.AddField(
+            model_name='historicalplotlog',
+            name='last_log_status',
+            field=models.CharField(
+                choices=[('accessible', 'Accessible'), ('inaccessible', 'Inaccessible')],
+                editable=False, help_text='log_status of the latest plot log entry.',
+                max_length=25, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalplotlog',
+            name='last_report_datetime',
+            field=models.DateTimeField(
+                editable=False, help_text='report_datetime of the latest plot log entry.',
+                null=True),
+        ),
+        migrations.RunPython(update_log_summary, migrations.RunPython.noop),
+    ]
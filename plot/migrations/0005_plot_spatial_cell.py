@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from plot.spatial import spatial_cell
+
+
+def update_spatial_cell(apps, schema_editor):
+    Plot = apps.get_model('plot', 'Plot')
+    cells = {}
+    for pk, latitude, longitude in Plot.objects.values_list(
+            'pk', 'gps_target_lat', 'gps_target_lon').iterator():
+        cells.setdefault(spatial_cell(latitude, longitude), []).append(pk)
+    for cell, pks in cells.items():
+        for index in range(0, len(pks), 500):
+            Plot.objects.filter(pk__in=pks[index:index + 500]).update(
+                spatial_cell=cell)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0004_plotlog_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plot',
+            name='spatial_cell',
+            field=models.CharField(
+                db_index=True, editable=False,
+                help_text='Grid cell of the target point. See plot.spatial',
+                max_length=25, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalplot',
+            name='spatial_cell',
+            field=models.CharField(
+                db_index=True, editable=False,
+                help_text='Grid cell of the target point. See plot.spatial',
+                max_length=25, null=True),
+        ),
+        migrations.RunPython(update_spatial_cell, migrations.RunPython.noop),
+    ]
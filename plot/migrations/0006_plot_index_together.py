@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0005_plot_spatial_cell'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='plot',
+            index_together=set([
+                ('map_area', 'status'),
+                ('map_area', 'enrolled'),
+                ('map_area', 'accessible'),
+                ('map_area', 'confirmed'),
+                ('map_area', 'rss'),
+                ('map_area', 'selected'),
+                ('map_area', 'ess', 'htc'),
+                ('map_area', 'access_attempts'),
+                ('section', 'sub_section')]),
+        ),
+    ]
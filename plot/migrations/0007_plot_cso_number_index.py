@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from plot.blind_index import update_cso_number_index
+
+
+def update_index(apps, schema_editor):
+    update_cso_number_index(apps.get_model('plot', 'Plot'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0006_plot_index_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plot',
+            name='cso_number_index',
+            field=models.CharField(
+                db_index=True, editable=False,
+                help_text='Blind index of cso_number. See plot.blind_index',
+                max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalplot',
+            name='cso_number_index',
+            field=models.CharField(
+                db_index=True, editable=False,
+                help_text='Blind index of cso_number. See plot.blind_index',
+                max_length=64, null=True),
+        ),
+        migrations.RunPython(update_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_revision.revision_field
+import edc_base.model_fields.hostname_modification_field
+import edc_base.model_fields.userfield
+import edc_base.model_fields.uuid_auto_field
+import edc_base.utils
+
+from plot.plot_summary import rebuild_plot_summary
+
+
+def rebuild_summary(apps, schema_editor):
+    rebuild_plot_summary(
+        apps.get_model('plot', 'Plot'), apps.get_model('plot', 'PlotSummary'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0007_plot_cso_number_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlotSummary',
+            fields=[
+                ('created', models.DateTimeField(
+                    blank=True, default=edc_base.utils.get_utcnow)),
+                ('modified', models.DateTimeField(
+                    blank=True, default=edc_base.utils.get_utcnow)),
+                ('user_created', edc_base.model_fields.userfield.UserField(
+                    blank=True, max_length=50, verbose_name='user created')),
+                ('user_modified', edc_base.model_fields.userfield.UserField(
+                    blank=True, max_length=50, verbose_name='user modified')),
+                ('hostname_created', models.CharField(
+                    blank=True, help_text='System field. (modified on create only)',
+                    max_length=50)),
+                ('hostname_modified', edc_base.model_fields.hostname_modification_field.HostnameModificationField(
+                    blank=True, help_text='System field. (modified on every save)', max_length=50)),
+                ('revision', django_revision.revision_field.RevisionField(
+                    blank=True, editable=False, help_text='System field. Git repository tag:branch:commit.',
+                    max_length=75, null=True, verbose_name='Revision')),
+                ('id', edc_base.model_fields.uuid_auto_field.UUIDAutoField(
+                    blank=True, editable=False, help_text='System auto field. UUID primary key.',
+                    primary_key=True, serialize=False)),
+                ('map_area', models.CharField(max_length=25)),
+                ('section', models.CharField(
+                    default='', help_text='Empty for plots not in a section',
+                    max_length=25)),
+                ('plots', models.IntegerField(default=0)),
+                ('confirmed', models.IntegerField(default=0)),
+                ('accessible', models.IntegerField(default=0)),
+                ('inaccessible', models.IntegerField(default=0)),
+                ('enrolled', models.IntegerField(default=0)),
+                ('rss', models.IntegerField(default=0)),
+                ('htc', models.IntegerField(default=0)),
+                ('ess', models.IntegerField(default=0)),
+                ('household_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='plotsummary',
+            unique_together=set([('map_area', 'section')]),
+        ),
+        migrations.RunPython(rebuild_summary, migrations.RunPython.noop),
+    ]
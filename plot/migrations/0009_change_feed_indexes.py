@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+history_tables = [
+    'plot_historicalplot', 'plot_historicalplotlog', 'plot_historicalplotlogentry']
+
+
+def create_history_indexes(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    for table in history_tables:
+        schema_editor.execute(
+            f'CREATE INDEX {quote_name(table + "_history_date_id")} '
+            f'ON {quote_name(table)} (history_date, history_id)')
+
+
+def drop_history_indexes(apps, schema_editor):
+    for table in history_tables:
+        schema_editor.execute(schema_editor.sql_delete_index % {
+            'table': schema_editor.quote_name(table),
+            'name': schema_editor.quote_name(f'{table}_history_date_id')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0008_plotsummary'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='plot',
+            index_together=set([
+                ('map_area', 'status'),
+                ('map_area', 'enrolled'),
+                ('map_area', 'accessible'),
+                ('map_area', 'confirmed'),
+                ('map_area', 'rss'),
+                ('map_area', 'selected'),
+                ('map_area', 'ess', 'htc'),
+                ('map_area', 'access_attempts'),
+                ('section', 'sub_section'),
+                ('modified', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='plotlog',
+            index_together=set([('modified', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='plotlogentry',
+            index_together=set([('modified', 'id')]),
+        ),
+        # the history models are generated by HistoricalRecords
+        # so their indexes are not in the model state
+        migrations.RunPython(create_history_indexes, drop_history_indexes),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from plot.blind_index import update_search_slugs
+
+
+def update_slugs(apps, schema_editor):
+    for model_name in ['Plot', 'HistoricalPlot']:
+        update_search_slugs(
+            apps.get_model('plot', model_name), ['plot_identifier', 'map_area'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0009_change_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(update_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def delete_sequences(apps, schema_editor):
+    # plot identifiers now include the device, the ledger is seeded
+    # again from IdentifierModel, see plot_identifier_allocator
+    apps.get_model('plot', 'PlotIdentifierSequence').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plot', '0010_plot_slug_without_cso_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_sequences, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='plotidentifiersequence',
+            name='map_code',
+            field=models.CharField(max_length=25),
+        ),
+        migrations.AddField(
+            model_name='plotidentifiersequence',
+            name='device_id',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name='plotidentifiersequence',
+            unique_together=set([('map_code', 'device_id')]),
+        ),
+    ]
@@ -1,12 +1,17 @@
 # coding=utf-8
 
+from uuid import uuid4
+
 from django.apps import apps as django_apps
 from django.core.validators import MaxValueValidator
 from django.db import models, transaction
-from django.db.models import options
-from django.db.models.deletion import ProtectedError
+from django.db.models import Count, options
 from django.db.utils import IntegrityError
 
+from ..history import bulk_create_with_history, send_post_save
+from ..household_delete_planner import HouseholdDeletePlanner
+from ..instrumentation import instrumented
+
 if 'household_model' not in options.DEFAULT_NAMES:
     options.DEFAULT_NAMES = options.DEFAULT_NAMES + ('household_model',)
 
@@ -47,10 +52,47 @@ class CreateHouseholdsModelMixin(models.Model):
         return super().common_clean_exceptions + [
             CreateHouseholdError, MaxHouseholdsExceededError]
 
-    def create_or_delete_households(self):
+    households_state_fields = [
+        'household_count', 'gps_confirmed_longitude', 'gps_confirmed_latitude']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # unknown until loaded or reconciled, so a plot created with
+        # households is reconciled on its first save
+        self._reconciled_households = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields().intersection(cls.households_state_fields):
+            instance._reconciled_households = instance.households_state
+        return instance
+
+    @property
+    def households_state(self):
+        """Returns the values household reconciliation depends on.
+        """
+        return (self.household_count,
+                bool(self.gps_confirmed_longitude and self.gps_confirmed_latitude))
+
+    @property
+    def households_changed(self):
+        """Returns True if household_count or the confirmation
+        changed since loaded or last reconciled, or if neither
+        happened yet.
+        """
+        return self.households_state != self._reconciled_households
+
+    @instrumented('households.create_or_delete_households')
+    def create_or_delete_households(self, force=None):
         """Creates or deletes households to try to equal the
         household_count.
 
+        Does nothing if neither the household_count nor the
+        confirmation changed, unless force=True. Otherwise the
+        difference is found with one aggregate query and surplus
+        households are deleted as one batch.
+
         Delete will fail if household has data upstream.
         """
         app_config = django_apps.get_app_config('plot')
@@ -60,26 +102,78 @@ class CreateHouseholdsModelMixin(models.Model):
                 f'Number of households per plot cannot exceed '
                 f'{app_config.max_households}. See plot.AppConfig')
 
-        if self.gps_confirmed_longitude and self.gps_confirmed_latitude:
+        if (self.gps_confirmed_longitude and self.gps_confirmed_latitude
+                and (force or self.households_changed)):
             Household = django_apps.get_model(
                 *self._meta.household_model.split('.'))
             households = Household.objects.filter(plot=self)
-            to_delete = households.count() - self.household_count
-
-            if to_delete > 0:
-                for household in households:
-                    self.safe_delete(household)
-                    to_delete -= 1
-                    if not to_delete:
-                        break
-            elif households.count() < self.household_count:
+            existing = households.aggregate(count=Count('pk')).get('count')
+
+            if existing > self.household_count:
+                surplus = list(households.order_by(
+                    '-household_sequence').values_list(
+                        'pk', flat=True)[:existing - self.household_count])
+                self.delete_households(surplus)
+            elif existing < self.household_count:
                 self.create_households()
 
-            self.household_count = Household.objects.filter(
-                plot__id=self.id).count()
-            self.save(update_fields=['household_count'])
+            if existing != self.household_count:
+                household_count = households.aggregate(
+                    count=Count('pk')).get('count')
+                if household_count != self.household_count:
+                    self.household_count = household_count
+                    self.save(update_fields=['household_count'])
+        self._reconciled_households = self.households_state
+
+    @instrumented('households.delete_surplus_households')
+    def delete_surplus_households(self):
+        """Deletes the households above the household_count before
+        the plot is written, see Plot.save, and sets household_count
+        to the households left. Does not save.
+
+        Households are created on post_save, see
+        create_or_delete_households.
+        """
+        if (self.gps_confirmed_longitude and self.gps_confirmed_latitude
+                and self.households_changed):
+            Household = django_apps.get_model(
+                *self._meta.household_model.split('.'))
+            households = Household.objects.filter(plot=self)
+            existing = households.aggregate(count=Count('pk')).get('count')
+            if existing > self.household_count:
+                surplus = list(households.order_by(
+                    '-household_sequence').values_list(
+                        'pk', flat=True)[:existing - self.household_count])
+                report = self.delete_households(surplus)
+                self.household_count = existing - len(report.deleted)
+
+    @instrumented('households.delete_households')
+    def delete_households(self, pks):
+        """Deletes the households, their structures and logs as one
+        batch skipping those with protected upstream data.
+
+        Returns a DeleteReport, see HouseholdDeletePlanner.
+        """
+        planner = HouseholdDeletePlanner(
+            household_model=self._meta.household_model, pks=pks)
+        return planner.delete()
 
+    @instrumented('households.create_households')
     def create_households(self):
+        """Creates households to equal the household_count.
+
+        If app_config.bulk_create_households, the default, tries the
+        bulk path first, see bulk_create_households.
+        """
+        app_config = django_apps.get_app_config('plot')
+        if app_config.bulk_create_households:
+            try:
+                with transaction.atomic():
+                    self.bulk_create_households()
+            except IntegrityError:
+                pass  # created concurrently, continue one at a time
+            else:
+                return
         Household = django_apps.get_model(
             *self._meta.household_model.split('.'))
         for n in range(1, self.household_count + 1):
@@ -92,23 +186,57 @@ class CreateHouseholdsModelMixin(models.Model):
                 except IntegrityError:
                     pass
 
+    def bulk_create_households(self):
+        """Inserts the households missing for the household_count in
+        one statement and returns them.
+
+        Existing household_sequence values are read in one query. The
+        historical records are bulk created and post_save is then sent
+        to the remaining receivers for each new household.
+        """
+        Household = django_apps.get_model(
+            *self._meta.household_model.split('.'))
+        existing = set(Household.objects.filter(plot=self).values_list(
+            'household_sequence', flat=True))
+        households = [
+            Household(**self.get_household_options(n))
+            for n in range(1, self.household_count + 1) if n not in existing]
+        if households:
+            bulk_create_with_history(Household, households)
+            send_post_save(Household, households)
+        return households
+
+    def get_household_options(self, household_sequence):
+        """Returns the field values of a new household for the bulk
+        path, including those Household.save would derive.
+        """
+        return dict(
+            id=uuid4(),
+            plot=self,
+            household_sequence=household_sequence,
+            household_identifier=self.get_household_identifier(household_sequence),
+            report_datetime=self.report_datetime)
+
+    def get_household_identifier(self, household_sequence):
+        """Returns the household_identifier Household.save would set
+        for the bulk path.
+
+        Uses the household model's get_household_identifier(
+        plot_identifier, household_sequence) if it has one, otherwise
+        the format of Household.save. test_create_households asserts
+        that both paths give the same identifier.
+        """
+        Household = django_apps.get_model(
+            *self._meta.household_model.split('.'))
+        get_household_identifier = getattr(Household, 'get_household_identifier', None)
+        if get_household_identifier:
+            return get_household_identifier(self.plot_identifier, household_sequence)
+        return '{}-{}'.format(self.plot_identifier, str(household_sequence).rjust(2, '0'))
+
     def safe_delete(self, household):
         """Safe delete households passing on ProtectedErrors.
         """
-        HouseholdLog = django_apps.get_model('household.householdlog')
-        HouseholdStructure = django_apps.get_model(
-            'household.householdstructure')
-        household_structures = HouseholdStructure.objects.filter(
-            household=household)
-        for household_structure in household_structures:
-            try:
-                for household_log in HouseholdLog.objects.filter(
-                        household_structure=household_structure):
-                    household_log.delete()
-                    household_structure.delete()
-                    household.delete()
-            except ProtectedError:
-                pass
+        return self.delete_households([household.pk])
 
     class Meta:
         abstract = True
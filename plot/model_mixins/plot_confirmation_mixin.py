@@ -14,6 +14,37 @@ class PlotConfirmationError(Exception):
 
 class PlotConfirmationMixin(models.Model):
 
+    @property
+    def confirmation_inputs(self):
+        return (
+            self.gps_confirmed_latitude, self.gps_confirmed_longitude,
+            self.gps_target_lat, self.gps_target_lon, self.target_radius,
+            self.map_area)
+
+    def update_confirmation(self):
+        """Calls get_confirmed once for the current confirmation
+        inputs and keeps the MapperError, if any, for common_clean.
+        """
+        inputs = self.confirmation_inputs
+        try:
+            self.get_confirmed()
+        except MapperError as e:
+            self._confirmation = (inputs, e)
+        else:
+            self._confirmation = (inputs, None)
+        return self._confirmation[1]
+
+    @property
+    def confirmation_error(self):
+        """Returns the MapperError raised by get_confirmed, or None,
+        calling it again only if the confirmation inputs changed.
+        """
+        inputs = self.confirmation_inputs
+        confirmation = getattr(self, '_confirmation', None)
+        if confirmation and confirmation[0] == inputs:
+            return confirmation[1]
+        return self.update_confirmation()
+
     def common_clean(self):
         if not self.id:
             if (self.gps_confirmed_latitude or
@@ -21,8 +52,19 @@ class PlotConfirmationMixin(models.Model):
                 raise PlotConfirmationError(
                     'Blocking attempt to confirm non-ESS plot on add.')
         else:
-            if self.gps_confirmed_latitude and self.gps_confirmed_longitude:
-                self.get_confirmed()  # confirmation point is within the radius
+            confirmation_point = bool(
+                self.gps_confirmed_latitude and self.gps_confirmed_longitude)
+            # confirmation point is within the radius
+            error = self.confirmation_error
+            if error:
+                if confirmation_point:
+                    raise error
+                elif self.enrolled:
+                    # once enrolled, dont allow modification to GPS
+                    raise PlotEnrollmentError(
+                        'Plot cannot be unconfirmed. Got plot is '
+                        'already enrolled.')
+            if confirmation_point:
                 try:
                     PlotLog = django_apps.get_model(*'plot.plotlog'.split('.'))
                     PlotLog.objects.get(plot__pk=self.id)
@@ -40,14 +82,6 @@ class PlotConfirmationMixin(models.Model):
                         raise PlotConfirmationError(
                             'Plot cannot be confirmed. '
                             'Got plot log not created.')
-            try:
-                self.get_confirmed()
-            except MapperError:
-                if self.enrolled:
-                    # once enrolled, dont allow modification to GPS
-                    raise PlotEnrollmentError(
-                        'Plot cannot be unconfirmed. Got plot is '
-                        'already enrolled.')
         return super().common_clean()
 
     @property
@@ -80,9 +80,15 @@ class PlotEnrollmentMixin(models.Model):
         return super().common_clean_exceptions + [
             PlotEnrollmentError, PlotCreateError]
 
-    def save(self, *args, **kwargs):
+    def update_rss(self):
+        """Sets rss from selected. Called on save and, for Plot,
+        earlier by update_derived_fields.
+        """
         self.rss = True if self.selected in [
             TWENTY_PERCENT, FIVE_PERCENT] else False
+
+    def save(self, *args, **kwargs):
+        self.update_rss()
         super().save(*args, **kwargs)
 
     class Meta:
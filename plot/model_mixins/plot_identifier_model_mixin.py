@@ -3,7 +3,8 @@
 from django.db import models
 
 from edc_identifier.research_identifier import ResearchIdentifier
-from edc_map.site_mappers import site_mappers
+
+from ..instrumentation import instrumented
 
 
 class PlotIdentifierError(Exception):
@@ -15,7 +16,7 @@ class PlotIdentifier(ResearchIdentifier):
         self.map_code = map_code
         super().__init__(**kwargs)
 
-    template = '{map_code}{sequence}'
+    template = '{map_code}{device_id}{sequence}'
     label = 'plot_identifier'
 
 
@@ -29,16 +30,23 @@ class PlotIdentifierModelMixin(models.Model):
         unique=True,
         editable=False)
 
-    def save(self, *args, **kwargs):
+    @instrumented('plot.allocate_plot_identifier')
+    def allocate_plot_identifier(self):
         """Allocates a plot identifier to a new instance if
-        permissions allow.
+        permissions allow. Called on save and, for Plot, earlier by
+        update_derived_fields.
+
+        Identifiers are allocated from blocks reserved per map_code,
+        see plot_identifier_allocator.
         """
         if not self.id and not self.plot_identifier:
-            self.plot_identifier = PlotIdentifier(
-                map_code=site_mappers.get_mapper(
-                    self.map_area).map_code,
-                site_code=site_mappers.get_mapper(
-                    self.map_area).map_code).identifier
+            from ..mapper_snapshot import site_mapper_snapshot
+            from ..plot_identifier_allocator import plot_identifier_allocator
+            self.plot_identifier = plot_identifier_allocator.next_identifier(
+                site_mapper_snapshot.get().get_mapper(self.map_area).map_code)
+
+    def save(self, *args, **kwargs):
+        self.allocate_plot_identifier()
         super().save(*args, **kwargs)
 
     class Meta:
@@ -1,6 +1,8 @@
 # coding=utf-8
 
+from django.apps import apps as django_apps
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
 from django_revision.modeladmin_mixin import ModelAdminRevisionMixin
 
 from edc_base.modeladmin_mixins import (
@@ -8,6 +10,9 @@ from edc_base.modeladmin_mixins import (
     ModelAdminFormAutoNumberMixin,
     ModelAdminReadOnlyMixin, ModelAdminAuditFieldsMixin)
 
+from .history import coalesce_history
+from .paginators import KeysetPaginator
+
 
 class ModelAdminMixin(ModelAdminFormInstructionsMixin,
                       ModelAdminNextUrlRedirectMixin,
@@ -20,3 +25,77 @@ class ModelAdminMixin(ModelAdminFormInstructionsMixin,
     list_per_page = 10
     date_hierarchy = 'modified'
     empty_value_display = '-'
+
+
+AFTER_VAR = 'after'
+
+
+class KeysetChangeList(ChangeList):
+
+    """A ChangeList whose link to the next page carries the last key
+    of this page, `after`, so that paging forward selects rows from
+    that key with no OFFSET, see KeysetPaginator.page_after.
+
+    Links to other pages drop the key and find the page by number.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.next_after = None
+        if (self.multi_page and not (self.show_all and self.can_show_all)
+                and self.page_num + 1 < self.paginator.num_pages):
+            self.next_after = self.paginator.last_key(self.result_list)
+
+    def get_query_string(self, new_params=None, remove=None):
+        new_params = dict(new_params or {})
+        if AFTER_VAR not in new_params:
+            new_params[AFTER_VAR] = None
+            if (new_params.get(PAGE_VAR) == self.page_num + 1
+                    and getattr(self, 'next_after', None) is not None):
+                new_params[AFTER_VAR] = str(self.next_after)
+        return super().get_query_string(new_params, remove)
+
+
+class KeysetPaginatorModelAdminMixin:
+
+    """Paginates the changelist with estimated counts and keyset
+    pages, see KeysetPaginator and KeysetChangeList, and without
+    the unfiltered count.
+    """
+
+    paginator = KeysetPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            after=request.GET.get(AFTER_VAR))
+
+
+class CoalescedHistoryModelAdminMixin:
+
+    """Writes one historical record per object changed by an add,
+    change or delete view if app_config.coalesce_history, see
+    coalesce_history.
+    """
+
+    def changeform_view(self, *args, **kwargs):
+        if django_apps.get_app_config('plot').coalesce_history:
+            with coalesce_history():
+                return super().changeform_view(*args, **kwargs)
+        return super().changeform_view(*args, **kwargs)
+
+    def delete_view(self, *args, **kwargs):
+        if django_apps.get_app_config('plot').coalesce_history:
+            with coalesce_history():
+                return super().delete_view(*args, **kwargs)
+        return super().delete_view(*args, **kwargs)
@@ -1,3 +1,5 @@
 from .plot import Plot
 from .plot_log import PlotLog
 from .plot_log_entry import PlotLogEntry
+from .plot_identifier_sequence import PlotIdentifierSequence
+from .plot_summary import PlotSummary
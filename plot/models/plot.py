@@ -1,11 +1,9 @@
 # coding=utf-8
 
 from django.apps import apps as django_apps
-from django.core.exceptions import MultipleObjectsReturned
-from django.db import models
+from django.db import models, transaction
 from django_crypto_fields.fields import EncryptedCharField, EncryptedTextField
 
-from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.model_validators import datetime_not_future
 from edc_base.utils import get_utcnow
@@ -15,14 +13,20 @@ from edc_device import DevicePermissions, DeviceAddPermission
 from edc_device import CENTRAL_SERVER
 from edc_map.exceptions import MapperError
 from edc_map.model_mixins import MapperModelMixin
-from edc_map.site_mappers import site_mappers
 from edc_search.model_mixins import SearchSlugModelMixin, SearchSlugManager
 
+from ..blind_index import blind_index
 from ..choices import PLOT_STATUS
 from ..constants import INACCESSIBLE
+from ..deferred_signals import deferred_plot_signals
+from ..history import CoalescedHistoricalRecords
+from ..instrumentation import instrumented, measure_stage
 from ..managers import PlotManager as BasePlotManager
+from ..mapper_snapshot import site_mapper_snapshot
+from ..plot_summary import summary_fields, summary_values
 from ..model_mixins import PlotIdentifierModelMixin, CreateHouseholdsModelMixin
 from ..model_mixins import PlotEnrollmentMixin, PlotConfirmationMixin, PlotEnrollmentError
+from ..spatial import spatial_cell
 
 
 class PlotDeviceAddPermission(DeviceAddPermission):
@@ -46,7 +50,8 @@ class Plot(MapperModelMixin, PlotIdentifierModelMixin,
     """
 
     def get_search_slug_fields(self):
-        return ['plot_identifier', 'map_area', 'cso_number']
+        # not cso_number, the slug is not encrypted. See filter_cso_number
+        return ['plot_identifier', 'map_area']
 
     report_datetime = models.DateTimeField(
         validators=[datetime_not_future],
@@ -65,6 +70,13 @@ class Plot(MapperModelMixin, PlotIdentifierModelMixin,
         null=True,
         help_text=("provide the CSO number or leave BLANK."))
 
+    cso_number_index = models.CharField(
+        max_length=64,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Blind index of cso_number. See plot.blind_index')
+
     time_of_week = models.CharField(
         verbose_name=(
             'Time of week when most of the eligible members will be available'),
@@ -110,49 +122,95 @@ class Plot(MapperModelMixin, PlotIdentifierModelMixin,
             'Number of attempts to access a plot to determine it\'s status.'),
         editable=False)
 
+    spatial_cell = models.CharField(
+        max_length=25,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Grid cell of the target point. See plot.spatial')
+
     objects = PlotManager()
 
-    history = HistoricalRecords()
+    history = CoalescedHistoricalRecords()
 
     def __str__(self):
         return '{} {}'.format(
             self.location_name or 'undetermined', self.plot_identifier)
 
+    @instrumented('plot.save')
     def save(self, *args, **kwargs):
+        """Sets the derived fields and, for an existing plot, deletes
+        surplus households before the one write of the plot so that
+        the household_count written is final.
+
+        Households are created on post_save, see signals, which
+        then does not need to save the plot again.
+
+        Stage plot.write includes common_clean, field encryption,
+        the SQL and the signals.
+        """
+        self.update_derived_fields()
+        if (not self._state.adding and not kwargs.get('update_fields')
+                and not deferred_plot_signals.active):
+            with transaction.atomic():
+                self.delete_surplus_households()
+                with measure_stage('plot.write'):
+                    super().save(*args, **kwargs)
+        else:
+            with measure_stage('plot.write'):
+                super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Keeps the summary fields as loaded so plot_summary_on_pre_save
+        has the previous values without reading the plot again.
+        """
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields().intersection(summary_fields):
+            instance._summary_values = summary_values(instance)
+        return instance
+
+    @instrumented('plot.update_derived_fields')
+    def update_derived_fields(self):
+        """Sets every field derived from other fields of the plot.
+
+        The mixins' save methods call allocate_plot_identifier and
+        update_rss again, which change nothing the second time.
+        """
+        self.allocate_plot_identifier()
+        self.update_rss()
+        self.spatial_cell = spatial_cell(self.gps_target_lat, self.gps_target_lon)
+        self.cso_number_index = blind_index(self.cso_number)
         if self.id and not self.location_name:
             self.location_name = 'plot'
+        if self.id:
+            self.update_confirmation()
         if self.status == INACCESSIBLE:
             self.accessible = False
         else:
             if self.id:
-                PlotLogEntry = django_apps.get_model(
-                    *'plot.plotlogentry'.split('.'))
-                try:
-                    PlotLogEntry.objects.get(plot_log__plot__pk=self.id)
-                except PlotLogEntry.DoesNotExist:
+                PlotLog = django_apps.get_model(*'plot.plotlog'.split('.'))
+                entry_count = PlotLog.objects.filter(
+                    plot__pk=self.id).values_list('entry_count', flat=True).first()
+                if not entry_count:
                     self.accessible = True
-                except MultipleObjectsReturned:
-                    pass
-        super().save(*args, **kwargs)
 
     def natural_key(self):
         return (self.plot_identifier, )
 
+    @instrumented('plot.common_clean')
     def common_clean(self):
         """Asserts the plot map_area is a valid map_area and that
         an enrolled plot cannot be unconfirmed.
         """
-        if self.map_area not in site_mappers.map_areas:
+        map_areas = site_mapper_snapshot.get().map_areas
+        if self.map_area not in map_areas:
             raise MapperError(
                 f'Invalid map area. Got \'{self.map_area}\'. Site mapper expects one '
-                f'of map_areas={site_mappers.map_areas}.')
-        elif self.id:
-            try:
-                self.get_confirmed()
-            except MapperError:
-                if self.enrolled:
-                    raise PlotEnrollmentError(
-                        'Plot is enrolled and may not be unconfirmed')
+                f'of map_areas={sorted(map_areas)}.')
+        elif self.id and self.confirmation_error and self.enrolled:
+            raise PlotEnrollmentError(
+                'Plot is enrolled and may not be unconfirmed')
         super().common_clean()
 
     @property
@@ -171,6 +229,19 @@ class Plot(MapperModelMixin, PlotIdentifierModelMixin,
     class Meta(DeviceModelMixin.Meta):
         ordering = ['-plot_identifier', ]
         unique_together = (('gps_target_lat', 'gps_target_lon'),)
+        # for the PlotAdmin filters, see tests/test_query_plans
+        index_together = (
+            ('map_area', 'status'),
+            ('map_area', 'enrolled'),
+            ('map_area', 'accessible'),
+            ('map_area', 'confirmed'),
+            ('map_area', 'rss'),
+            ('map_area', 'selected'),
+            ('map_area', 'ess', 'htc'),
+            ('map_area', 'access_attempts'),
+            ('section', 'sub_section'),
+            # for the change feed, see change_feed
+            ('modified', 'id'))
         household_model = 'household.household'
         device_permissions = DevicePermissions(
             PlotDeviceAddPermission(device_roles=[CENTRAL_SERVER]))
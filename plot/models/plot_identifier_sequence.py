@@ -0,0 +1,35 @@
+# coding=utf-8
+
+from django.db import models
+
+from edc_base.model_mixins import BaseUuidModel
+
+from ..managers import PlotIdentifierSequenceManager
+
+
+class PlotIdentifierSequence(BaseUuidModel):
+    """A system model of the last plot identifier sequence reserved
+    per map_code and device.
+
+    Not synchronized. See plot_identifier_allocator.
+    """
+
+    map_code = models.CharField(
+        max_length=25)
+
+    device_id = models.CharField(
+        max_length=10)
+
+    last_sequence = models.IntegerField(
+        default=0)
+
+    objects = PlotIdentifierSequenceManager()
+
+    def __str__(self):
+        return f'{self.map_code} {self.device_id} {self.last_sequence}'
+
+    def natural_key(self):
+        return (self.map_code, self.device_id)
+
+    class Meta:
+        unique_together = (('map_code', 'device_id'), )
@@ -3,11 +3,13 @@
 from django.db import models
 from django.db.models.deletion import PROTECT
 
-from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.utils import get_utcnow
 
+from ..choices import PLOT_LOG_STATUS
+from ..history import CoalescedHistoricalRecords
 from ..managers import PlotLogManager
+from ..natural_key_cache import natural_key_cache
 from .plot import Plot
 
 
@@ -22,7 +24,24 @@ class PlotLog(BaseUuidModel):
         verbose_name="Report date",
         default=get_utcnow)
 
-    history = HistoricalRecords()
+    entry_count = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of plot log entries. Updated by the entry signals.')
+
+    last_log_status = models.CharField(
+        max_length=25,
+        choices=PLOT_LOG_STATUS,
+        null=True,
+        editable=False,
+        help_text='log_status of the latest plot log entry.')
+
+    last_report_datetime = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text='report_datetime of the latest plot log entry.')
+
+    history = CoalescedHistoricalRecords()
 
     objects = PlotLogManager()
 
@@ -30,5 +49,10 @@ class PlotLog(BaseUuidModel):
         return self.plot.plot_identifier
 
     def natural_key(self):
-        return self.plot.natural_key()
+        return (natural_key_cache.natural_key(Plot, self.plot_id)
+                or self.plot.natural_key())
     natural_key.dependencies = ['plot.plot']
+
+    class Meta:
+        # for the change feed, see change_feed
+        index_together = (('modified', 'id'), )
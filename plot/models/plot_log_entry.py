@@ -6,13 +6,14 @@ from django.db import models
 from django.db.models.deletion import PROTECT
 from django_crypto_fields.fields import EncryptedTextField
 
-from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.model_validators import datetime_not_future
 from edc_base.utils import get_utcnow
 
 from ..choices import PLOT_LOG_STATUS, INACCESSIBILITY_REASONS
+from ..history import CoalescedHistoricalRecords
 from ..managers import PlotLogEntryManager
+from ..natural_key_cache import natural_key_cache
 from .plot_log import PlotLog
 
 
@@ -63,7 +64,7 @@ class PlotLogEntry(BaseUuidModel):
 
     objects = PlotLogEntryManager()
 
-    history = HistoricalRecords()
+    history = CoalescedHistoricalRecords()
 
     def save(self, *args, **kwargs):
         self.report_date = arrow.Arrow.fromdatetime(
@@ -71,7 +72,9 @@ class PlotLogEntry(BaseUuidModel):
         super().save(*args, **kwargs)
 
     def natural_key(self):
-        return (self.report_datetime, ) + self.plot_log.natural_key()
+        return (self.report_datetime, ) + (
+            natural_key_cache.natural_key(PlotLog, self.plot_log_id)
+            or self.plot_log.natural_key())
     natural_key.dependencies = ['plot.plot_log']
 
     def __str__(self):
@@ -81,3 +84,5 @@ class PlotLogEntry(BaseUuidModel):
     class Meta:
         unique_together = ('plot_log', 'report_datetime')
         ordering = ('report_datetime', )
+        # for the change feed, see change_feed
+        index_together = (('modified', 'id'), )
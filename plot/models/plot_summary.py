@@ -0,0 +1,53 @@
+# coding=utf-8
+
+from django.db import models
+
+from edc_base.model_mixins import BaseUuidModel
+
+from ..managers import PlotSummaryManager
+
+
+class PlotSummary(BaseUuidModel):
+    """A system model of plot counts per map_area and section.
+
+    Updated by the plot signals with the difference of each change.
+    Not synchronized. See plot_summary and the rebuild_plot_summary
+    command.
+    """
+
+    map_area = models.CharField(
+        max_length=25)
+
+    section = models.CharField(
+        max_length=25,
+        default='',
+        help_text='Empty for plots not in a section')
+
+    plots = models.IntegerField(default=0)
+
+    confirmed = models.IntegerField(default=0)
+
+    accessible = models.IntegerField(default=0)
+
+    inaccessible = models.IntegerField(default=0)
+
+    enrolled = models.IntegerField(default=0)
+
+    rss = models.IntegerField(default=0)
+
+    htc = models.IntegerField(default=0)
+
+    ess = models.IntegerField(default=0)
+
+    household_count = models.IntegerField(default=0)
+
+    objects = PlotSummaryManager()
+
+    def __str__(self):
+        return f'{self.map_area} {self.section}'.strip()
+
+    def natural_key(self):
+        return (self.map_area, self.section)
+
+    class Meta:
+        unique_together = (('map_area', 'section'), )
@@ -0,0 +1,161 @@
+# coding=utf-8
+
+import threading
+
+from contextlib import ContextDecorator
+
+from django.apps import apps as django_apps
+
+
+class NaturalKeyCache(threading.local):
+
+    """Per thread cache of objects by natural key for the managers
+    with get_by_natural_keys, filled by prefetch_natural_keys.
+
+    A prefetched natural key that was not found is cached as None
+    so that get_by_natural_key does not query it again. Objects
+    saved while the cache is active are added, see signals.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.reset()
+
+    def reset(self):
+        self.objects = {}  # label_lower: {natural key: obj or None}
+        self.natural_keys = {}  # label_lower: {pk: natural key}
+
+    @property
+    def active(self):
+        return self.depth > 0
+
+    def get(self, model_cls, natural_key):
+        """Returns the cached object, or None if prefetched and not
+        found.
+
+        Raises KeyError if not prefetched.
+        """
+        return self.objects[model_cls._meta.label_lower][tuple(natural_key)]
+
+    def natural_key(self, model_cls, pk):
+        """Returns the natural key of a cached object by pk, or None.
+        """
+        return self.natural_keys.get(model_cls._meta.label_lower, {}).get(pk)
+
+    def add(self, model_cls, objs, natural_keys=None):
+        """Adds a dict of natural key: object and the natural keys
+        not found.
+        """
+        label_lower = model_cls._meta.label_lower
+        cache = self.objects.setdefault(label_lower, {})
+        for natural_key in natural_keys or []:
+            cache.setdefault(natural_key, None)
+        pks = self.natural_keys.setdefault(label_lower, {})
+        for natural_key, obj in objs.items():
+            cache[natural_key] = obj
+            pks[obj.pk] = natural_key
+
+    def add_instance(self, instance):
+        if instance._meta.label_lower in self.objects:
+            self.add(instance.__class__, {instance.natural_key(): instance})
+
+    def remove_instance(self, instance):
+        if instance._meta.label_lower in self.objects:
+            natural_key = self.natural_keys[instance._meta.label_lower].pop(
+                instance.pk, None) or instance.natural_key()
+            self.objects[instance._meta.label_lower][natural_key] = None
+
+
+natural_key_cache = NaturalKeyCache()
+
+
+def cached_models():
+    return [model_cls for model_cls in django_apps.get_app_config('plot').get_models()
+            if hasattr(model_cls._default_manager, 'get_by_natural_keys')]
+
+
+def serialized_natural_key(model_cls, fields):
+    """Returns the natural key of a serialized object from its fields
+    as in the natural key lookups of its manager, or None.
+    """
+    natural_key = ()
+    for lookup in model_cls._default_manager.natural_key_lookups:
+        field = model_cls._meta.get_field(lookup.split('__')[0])
+        value = fields.get(field.name)
+        if field.is_relation:
+            if not isinstance(value, (list, tuple)):
+                return None
+            natural_key += tuple(value)
+        else:
+            natural_key += (field.to_python(value), )
+    return natural_key
+
+
+def referenced_natural_keys(objects):
+    """Returns a dict of model class: set of the natural keys that
+    the serialized (python format) objects refer to, by foreign
+    key or, where pk is not given, as their own.
+    """
+    models = cached_models()
+    natural_keys = {}
+    for obj in objects:
+        try:
+            model_cls = django_apps.get_model(obj['model'])
+        except (KeyError, LookupError, TypeError, ValueError):
+            continue
+        fields = obj.get('fields') or {}
+        for field in model_cls._meta.concrete_fields:
+            value = fields.get(field.name)
+            if (field.is_relation and field.related_model in models
+                    and isinstance(value, (list, tuple))):
+                natural_keys.setdefault(field.related_model, set()).add(tuple(value))
+        if obj.get('pk') is None and model_cls in models:
+            natural_key = serialized_natural_key(model_cls, fields)
+            if natural_key:
+                natural_keys.setdefault(model_cls, set()).add(natural_key)
+    return natural_keys
+
+
+class prefetch_natural_keys(ContextDecorator):
+
+    """Context manager that resolves the natural keys the serialized
+    objects refer to with get_by_natural_keys and caches them for
+    get_by_natural_key in the current thread.
+
+    Nested, only the natural keys not already cached are resolved,
+    e.g. a sync consumer prefetches a batch of transactions and the
+    json Deserializer then finds each payload prefetched.
+
+        objects = json.loads(payload)
+        with prefetch_natural_keys(objects):
+            for obj in serializers.deserialize('python', objects):
+                obj.save()
+    """
+
+    def __init__(self, objects):
+        self.serialized_objects = objects
+
+    def __enter__(self):
+        natural_key_cache.depth += 1
+        try:
+            for model_cls, natural_keys in referenced_natural_keys(
+                    self.serialized_objects).items():
+                # already prefetched by an enclosing prefetch
+                natural_keys -= set(natural_key_cache.objects.get(
+                    model_cls._meta.label_lower, {}))
+                if not natural_keys:
+                    continue
+                natural_key_cache.add(
+                    model_cls,
+                    model_cls._default_manager.get_by_natural_keys(natural_keys),
+                    natural_keys=natural_keys)
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return natural_key_cache
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        natural_key_cache.depth -= 1
+        if not natural_key_cache.depth:
+            natural_key_cache.reset()
+        return False
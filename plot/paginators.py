@@ -0,0 +1,161 @@
+# coding=utf-8
+
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """Returns the number of rows of the queryset estimated from
+    the database statistics, or None if not available.
+
+    Uses the table statistics if the queryset is not filtered and
+    the planner's estimate if it is. Not available on sqlite.
+    """
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            table = queryset.model._meta.db_table
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] is not None else None
+        sql, params = queryset.query.sql_with_params()
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]['Plan']['Plan Rows'])
+        elif connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            row = cursor.fetchone()
+            rows = row[columns.index('rows')] or 0
+            if 'filtered' in columns:
+                rows = rows * (row[columns.index('filtered')] or 100) / 100
+            return int(rows)
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+
+    """A Paginator that uses the estimated count if it is at or
+    above `estimate_above` rows and the exact count otherwise.
+
+    Pages past an estimated count are empty rather than invalid.
+    """
+
+    estimate_above = 100000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= self.estimate_above:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.estimated and int(number) > 1:
+                return int(number)
+            raise
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+
+    """A Paginator for querysets ordered on a unique field, e.g.
+    -plot_identifier, that selects a page by key instead of by
+    OFFSET.
+
+    page(number) finds the first key of the page with an OFFSET on
+    the key column only, which the database answers from the
+    index, and then selects the page rows from that key.
+    page_after(key) continues from the last key of a page with no
+    OFFSET at all, as does page(number) if the paginator was given
+    the last key of the page before, `after`. Querysets not ordered
+    on a unique field are paginated as usual.
+    """
+
+    def __init__(self, *args, after=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.after = after
+
+    @cached_property
+    def key(self):
+        """Returns the ordering of the keyset as (field name,
+        descending), or None.
+        """
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return None
+        ordering = list(query.order_by or self.object_list.model._meta.ordering)
+        if not ordering or not isinstance(ordering[0], str):
+            return None
+        name = ordering[0]
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        opts = self.object_list.model._meta
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation or not (field.primary_key or field.unique):
+            return None
+        return field.attname, descending
+
+    def page(self, number):
+        if self.key is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if bottom == 0:
+            return self._get_page(self.object_list[:self.per_page], number, self)
+        if self.after is not None:
+            try:
+                return self._get_page(self.page_after(self.after), number, self)
+            except (ValidationError, ValueError):
+                pass  # not a valid key, find the page by number
+        name, descending = self.key
+        first_key = self.object_list.values_list(name, flat=True)[bottom:bottom + 1]
+        if not first_key:
+            return self._get_page(self.object_list.none(), number, self)
+        lookup = f'{name}__lte' if descending else f'{name}__gte'
+        return self._get_page(
+            self.object_list.filter(**{lookup: first_key[0]})[:self.per_page],
+            number, self)
+
+    def page_after(self, key):
+        """Returns the rows of the page after the row with the key.
+        """
+        if self.key is None:
+            raise ValueError('Queryset is not ordered on a unique field.')
+        name, descending = self.key
+        lookup = f'{name}__lt' if descending else f'{name}__gt'
+        return self.object_list.filter(**{lookup: key})[:self.per_page]
+
+    def last_key(self, object_list):
+        """Returns the key of the last row of a page's object_list,
+        or None.
+        """
+        rows = list(object_list) if self.key else None
+        if not rows:
+            return None
+        return getattr(rows[-1], self.key[0])
@@ -0,0 +1,136 @@
+# coding=utf-8
+
+import csv
+import json
+import time
+
+from itertools import islice
+
+from django.apps import apps as django_apps
+from django_crypto_fields.fields import EncryptedCharField, EncryptedTextField
+
+from .mapper_snapshot import site_mapper_snapshot
+
+encrypted_field_classes = (EncryptedCharField, EncryptedTextField)
+
+
+class PlotExportError(Exception):
+    pass
+
+
+class PlotExporter:
+
+    """Streams the rows of Plot, PlotLog or PlotLogEntry to CSV or
+    JSON Lines.
+
+    Rows are read with QuerySet.iterator(), a server-side cursor
+    where the database supports it, and written in chunks of
+    chunk_size, so memory does not grow with the number of rows.
+    Encrypted columns are exported, and so decrypted, only if
+    named in `decrypt`.
+
+        exporter = PlotExporter(model='plot.plot', decrypt=['cso_number'])
+        with open('plots.csv', 'w') as f:
+            exporter.export(f)
+    """
+
+    models = {
+        'plot.plot': ['plot_identifier'],
+        'plot.plotlog': ['plot__plot_identifier'],
+        'plot.plotlogentry': ['plot_log__plot__plot_identifier'],
+    }
+    map_area_lookups = {
+        'plot.plot': 'map_area',
+        'plot.plotlog': 'plot__map_area',
+        'plot.plotlogentry': 'plot_log__plot__map_area',
+    }
+    formats = ['csv', 'jsonl']
+
+    def __init__(self, model=None, fields=None, decrypt=None, map_area=None,
+                 file_format=None, chunk_size=None):
+        if model not in self.models:
+            raise PlotExportError(
+                f'Invalid model. Got \'{model}\'. Expected one of {list(self.models)}.')
+        self.model = model
+        self.model_cls = django_apps.get_model(*model.split('.'))
+        self.file_format = file_format or 'csv'
+        if self.file_format not in self.formats:
+            raise PlotExportError(
+                f'Invalid format. Got \'{self.file_format}\'. Expected one of {self.formats}.')
+        if map_area and map_area not in site_mapper_snapshot.get().map_areas:
+            raise PlotExportError(
+                f'Invalid map area. Got \'{map_area}\'. Site mapper expects one '
+                f'of map_areas={sorted(site_mapper_snapshot.get().map_areas)}.')
+        self.map_area = map_area
+        self.chunk_size = chunk_size or 2000
+        self.decrypt = list(decrypt or [])
+        encrypted = self.encrypted_fields
+        for name in self.decrypt:
+            if name not in encrypted:
+                raise PlotExportError(
+                    f'Not an encrypted field of {model}. Got \'{name}\'.')
+        self.fields = list(fields or self.default_fields)
+        for name in self.fields:
+            if name in encrypted and name not in self.decrypt:
+                raise PlotExportError(
+                    f'Field \'{name}\' is encrypted. Add it to decrypt to export it.')
+        self.rows = 0
+        self.elapsed = 0.0
+
+    @property
+    def encrypted_fields(self):
+        return [field.name for field in self.model_cls._meta.concrete_fields
+                if isinstance(field, encrypted_field_classes)]
+
+    @property
+    def default_fields(self):
+        """Returns the concrete fields, less encrypted fields not in
+        decrypt, and the plot identifier of related plots.
+        """
+        fields = [field.attname for field in self.model_cls._meta.concrete_fields
+                  if not isinstance(field, encrypted_field_classes)
+                  or field.name in self.decrypt]
+        return fields + [name for name in self.models[self.model] if name not in fields]
+
+    @property
+    def queryset(self):
+        queryset = self.model_cls.objects.all()
+        if self.map_area:
+            queryset = queryset.filter(**{self.map_area_lookups[self.model]: self.map_area})
+        return queryset.order_by().values_list(*self.fields)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def export(self, f):
+        """Writes the header, if CSV, and the rows to the open
+        file f and returns the number of rows.
+        """
+        start = time.time()
+        if self.file_format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+            write = writer.writerows
+        else:
+            def write(chunk):
+                f.writelines(
+                    json.dumps(dict(zip(self.fields, row)), default=str) + '\n'
+                    for row in chunk)
+        rows = self.queryset.iterator()
+        while True:
+            chunk = [[self.to_text(value) for value in row]
+                     for row in islice(rows, self.chunk_size)]
+            if not chunk:
+                break
+            write(chunk)
+            self.rows += len(chunk)
+        self.elapsed = time.time() - start
+        return self.rows
+
+    def to_text(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        elif hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
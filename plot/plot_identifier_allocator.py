@@ -0,0 +1,197 @@
+# coding=utf-8
+
+from collections import deque
+from threading import Lock
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.functions import Greatest
+from django.db.utils import IntegrityError
+
+from .model_mixins import PlotIdentifier
+
+
+class PlotIdentifierAllocatorError(Exception):
+    pass
+
+
+class PlotIdentifierAllocator:
+
+    """Allocates plot identifiers from blocks of sequences reserved
+    per map_code and device.
+
+    A block is reserved by incrementing PlotIdentifierSequence in one
+    transaction. Sequences not used by the caller are kept in process
+    memory once the reserving transaction commits. If it rolls back
+    they are discarded. Sequences reserved but never used, e.g. on
+    restart, are gaps and are never reissued.
+
+    As ResearchIdentifier does for one identifier, the identifiers
+    allocated are recorded in IdentifierModel, with one bulk insert
+    per call to allocate(). IdentifierModel also seeds the sequence
+    of a new map_code and device. If an identifier is already
+    recorded, e.g. the ledger was lost, the pool is discarded, the
+    ledger is moved past the recorded sequences and the allocation
+    is retried.
+    """
+
+    sequence_model = 'plot.plotidentifiersequence'
+    identifier_model = 'edc_identifier.identifiermodel'
+    plot_model = 'plot.plot'
+    retries = 5
+
+    def __init__(self, block_size=None):
+        self._block_size = block_size
+        self.lock = Lock()
+        self.pools = {}
+
+    @property
+    def block_size(self):
+        if not self._block_size:
+            return django_apps.get_app_config('plot').identifier_block_size
+        return self._block_size
+
+    @property
+    def sequence_model_cls(self):
+        return django_apps.get_model(*self.sequence_model.split('.'))
+
+    @property
+    def identifier_model_cls(self):
+        return django_apps.get_model(*self.identifier_model.split('.'))
+
+    def next_identifier(self, map_code, device_id=None):
+        """Returns the next plot identifier for the map_code.
+        """
+        return self.allocate(map_code, 1, device_id=device_id)[0]
+
+    def allocate(self, map_code, count, device_id=None):
+        """Returns a list of count plot identifiers for the map_code
+        and device, by default this device.
+        """
+        device_id = device_id or django_apps.get_app_config('edc_device').device_id
+        for _ in range(self.retries):
+            sequences = self.take(map_code, device_id, count)
+            identifiers = [
+                self.identifier(map_code, sequence, device_id) for sequence in sequences]
+            try:
+                with transaction.atomic():
+                    self.create_identifier_models(
+                        map_code, device_id, sequences, identifiers)
+            except IntegrityError:
+                self.refresh(map_code, device_id)
+                continue
+            return identifiers
+        raise PlotIdentifierAllocatorError(
+            f'Unable to allocate plot identifiers for map code {map_code}, '
+            f'device {device_id}.')
+
+    def take(self, map_code, device_id, count):
+        """Returns a list of count sequences, from the pool first and
+        from one reserved block for the remainder, if any.
+        """
+        sequences = []
+        with self.lock:
+            pool = self.pools.setdefault((map_code, device_id), deque())
+            while pool and len(sequences) < count:
+                sequences.append(pool.popleft())
+        remaining = count - len(sequences)
+        if remaining:
+            reserved = self.reserve(
+                map_code, max(remaining, self.block_size), device_id=device_id)
+            sequences.extend(reserved[:remaining])
+            surplus = reserved[remaining:]
+            if surplus:
+                transaction.on_commit(
+                    lambda: self.release_to_pool(map_code, device_id, surplus))
+        return sequences
+
+    def create_identifier_models(self, map_code, device_id, sequences, identifiers):
+        """Bulk creates the IdentifierModel rows of the identifiers
+        with the options ResearchIdentifier would use.
+        """
+        protocol_number = django_apps.get_app_config('edc_protocol').protocol_number
+        self.identifier_model_cls.objects.bulk_create([
+            self.identifier_model_cls(
+                name=PlotIdentifier.label,
+                sequence_number=sequence,
+                identifier=identifier,
+                protocol_number=protocol_number,
+                device_id=device_id,
+                model=self.plot_model,
+                study_site=map_code)
+            for sequence, identifier in zip(sequences, identifiers)])
+
+    def release_to_pool(self, map_code, device_id, sequences):
+        with self.lock:
+            self.pools.setdefault((map_code, device_id), deque()).extend(sequences)
+
+    def refresh(self, map_code, device_id):
+        """Discards the pool and moves the ledger past the sequences
+        recorded in IdentifierModel.
+        """
+        with self.lock:
+            self.pools.pop((map_code, device_id), None)
+        self.sequence_model_cls.objects.filter(
+            map_code=map_code, device_id=device_id).update(
+                last_sequence=Greatest(
+                    F('last_sequence'), self.last_allocated(map_code, device_id)))
+
+    def clear(self):
+        """Discards pooled sequences, leaving gaps.
+        """
+        with self.lock:
+            self.pools = {}
+
+    def reserve(self, map_code, count, device_id=None):
+        """Reserves and returns a range of count sequences for the
+        map_code and device in one transaction.
+        """
+        device_id = device_id or django_apps.get_app_config('edc_device').device_id
+        for _ in range(self.retries):
+            try:
+                with transaction.atomic():
+                    last_sequence = self._increment(map_code, device_id, count)
+            except IntegrityError:
+                # another process created the row for this map_code
+                continue
+            return range(last_sequence - count + 1, last_sequence + 1)
+        raise PlotIdentifierAllocatorError(
+            f'Unable to reserve plot identifiers for map code {map_code}.')
+
+    def _increment(self, map_code, device_id, count):
+        sequences = self.sequence_model_cls.objects.filter(
+            map_code=map_code, device_id=device_id)
+        if not sequences.update(last_sequence=F('last_sequence') + count):
+            self.sequence_model_cls.objects.create(
+                map_code=map_code,
+                device_id=device_id,
+                last_sequence=self.last_allocated(map_code, device_id) + count)
+        return sequences.values_list('last_sequence', flat=True).get()
+
+    def last_allocated(self, map_code, device_id):
+        """Returns the highest sequence recorded in IdentifierModel
+        for a plot identifier of the map_code and device.
+        """
+        return self.identifier_model_cls.objects.filter(
+            name=PlotIdentifier.label,
+            identifier__startswith=f'{map_code}{device_id}',
+            device_id=device_id,
+            study_site=map_code).aggregate(
+                last_sequence=Max('sequence_number'))['last_sequence'] or 0
+
+    def identifier(self, map_code, sequence, device_id=None):
+        """Returns the plot identifier of the sequence formatted as
+        PlotIdentifier, which would also query IdentifierModel for
+        the sequence.
+        """
+        identifier = PlotIdentifier.template.format(
+            map_code=map_code,
+            device_id=device_id or django_apps.get_app_config('edc_device').device_id,
+            sequence=str(sequence).rjust(PlotIdentifier.padding, '0'))
+        check_digit = PlotIdentifier.checkdigit.calculate_checkdigit(
+            ''.join(identifier.split('-')))
+        return f'{identifier}-{check_digit}'
+
+
+plot_identifier_allocator = PlotIdentifierAllocator()
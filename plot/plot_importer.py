@@ -0,0 +1,269 @@
+# coding=utf-8
+
+import csv
+import json
+import time
+
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from uuid import uuid4
+
+import arrow
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.utils.text import slugify
+
+from edc_base.utils import get_utcnow
+from edc_device.constants import CENTRAL_SERVER
+
+from .constants import ACCESSIBLE
+from .history import bulk_create_with_history
+from .mapper_snapshot import site_mapper_snapshot
+from .models import Plot, PlotLog, PlotLogEntry
+from .plot_identifier_allocator import plot_identifier_allocator
+from .plot_summary import summary_values, update_plot_summary
+from .spatial import spatial_cell
+
+GPS_PLACES = Decimal('1e-15')
+
+Point = namedtuple('Point', 'line_number latitude longitude')
+Rejected = namedtuple('Rejected', 'line_number reason')
+
+
+class PlotImportError(Exception):
+    pass
+
+
+def read_csv_points(f):
+    """Yields Points from a CSV file object, one row at a time.
+
+    Columns are found by a header of latitude/longitude (or lat/lon),
+    otherwise the legacy layout of [id, latitude, longitude] is assumed.
+    """
+    reader = csv.reader(f)
+    header = [col.strip().lower() for col in next(reader, [])]
+    lat_index, lon_index = 1, 2
+    for lat_name, lon_name in [('latitude', 'longitude'), ('lat', 'lon')]:
+        if lat_name in header and lon_name in header:
+            lat_index, lon_index = header.index(lat_name), header.index(lon_name)
+            break
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            yield Point(line_number, row[lat_index], row[lon_index])
+        except IndexError:
+            yield Point(line_number, None, None)
+
+
+def _read_to_features(f, chunk_size):
+    """Returns the buffer positioned after the opening bracket
+    of the "features" array and the eof flag.
+    """
+    buffer = ''
+    while True:
+        index = buffer.find('"features"')
+        if index >= 0:
+            index = buffer.find('[', index)
+        if index >= 0:
+            return buffer[index + 1:], False
+        chunk = f.read(chunk_size)
+        if not chunk:
+            raise PlotImportError('Invalid GeoJSON. Expected a FeatureCollection.')
+        buffer += chunk
+
+
+def read_geojson_points(f, chunk_size=65536):
+    """Yields Points from a GeoJSON FeatureCollection file object
+    without loading the collection into memory.
+
+    Features are decoded one at a time from the "features" array.
+    The line_number is the feature's position in the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer, eof = _read_to_features(f, chunk_size)
+    position = 0
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer.startswith(']'):
+            return
+        try:
+            feature, index = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise PlotImportError(
+                    f'Invalid GeoJSON. Unable to decode feature {position + 1}.')
+            chunk = f.read(chunk_size)
+            buffer, eof = buffer + chunk, not chunk
+            continue
+        buffer = buffer[index:]
+        position += 1
+        try:
+            longitude, latitude = feature['geometry']['coordinates'][:2]
+        except (KeyError, TypeError, ValueError):
+            yield Point(position, None, None)
+        else:
+            yield Point(position, latitude, longitude)
+
+
+class PlotImporter:
+
+    """Imports plots from a stream of points in batches.
+
+    Each batch is written in one transaction. Plot identifiers are
+    allocated for the batch before the insert and the PlotLog and
+    ESS PlotLogEntry that the post_save signals would otherwise
+    create are bulk inserted along with the plots.
+    """
+
+    readers = {'csv': read_csv_points, 'geojson': read_geojson_points}
+
+    def __init__(self, map_area=None, batch_size=None, ess=None):
+        self.map_area = map_area
+        self.batch_size = batch_size or 500
+        self.ess = True if ess is None else ess
+        self.created = 0
+        self.rejected = []
+        self.elapsed = 0.0
+        snapshot = site_mapper_snapshot.get()
+        if self.map_area not in snapshot.map_areas:
+            raise PlotImportError(
+                f'Invalid map area. Got \'{self.map_area}\'. Site mapper expects one '
+                f'of map_areas={sorted(snapshot.map_areas)}.')
+        self.map_code = snapshot.get_mapper(self.map_area).map_code
+        edc_device_app_config = django_apps.get_app_config('edc_device')
+        if edc_device_app_config.device_role != CENTRAL_SERVER:
+            raise PlotImportError(
+                f'Plots may only be imported on the {CENTRAL_SERVER}. '
+                f'Got {edc_device_app_config.device_role}.')
+        self.device_id = edc_device_app_config.device_id
+        self.excluded = django_apps.get_app_config('plot').excluded_plot(
+            Plot(ess=self.ess))
+
+    @property
+    def rows_per_second(self):
+        processed = self.created + len(self.rejected)
+        return processed / self.elapsed if self.elapsed else 0.0
+
+    def import_file(self, path, file_format=None):
+        file_format = file_format or path.rsplit('.', 1)[-1].lower()
+        if file_format == 'json':
+            file_format = 'geojson'
+        try:
+            reader = self.readers[file_format]
+        except KeyError:
+            raise PlotImportError(
+                f'Invalid file format. Expected one of {list(self.readers)}. '
+                f'Got {file_format}.')
+        with open(path, 'r', newline='') as f:
+            self.import_points(reader(f))
+
+    def import_points(self, points):
+        """Imports an iterable of Points in batches of batch_size.
+        """
+        start = time.time()
+        seen = set()
+        batch = []
+        for point in points:
+            try:
+                latitude = Decimal(str(point.latitude)).quantize(GPS_PLACES)
+                longitude = Decimal(str(point.longitude)).quantize(GPS_PLACES)
+            except (InvalidOperation, ValueError):
+                latitude = longitude = None
+            if (latitude is None or not -90 <= latitude <= 90
+                    or not -180 <= longitude <= 180):
+                self.rejected.append(
+                    Rejected(point.line_number, 'invalid coordinates'))
+                continue
+            if (latitude, longitude) in seen:
+                self.rejected.append(
+                    Rejected(point.line_number, 'duplicate in file'))
+                continue
+            seen.add((latitude, longitude))
+            batch.append(Point(point.line_number, latitude, longitude))
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        self.elapsed = time.time() - start
+
+    def import_batch(self, batch):
+        batch = self.reject_existing(batch)
+        if not batch:
+            return
+        with transaction.atomic():
+            report_datetime = get_utcnow()
+            plot_identifiers = self.allocate_identifiers(len(batch))
+            plots = [self.get_plot(point, plot_identifier, report_datetime)
+                     for point, plot_identifier in zip(batch, plot_identifiers)]
+            bulk_create_with_history(Plot, plots)
+            update_plot_summary([(None, summary_values(plot)) for plot in plots])
+            if not self.excluded:
+                plot_logs = [
+                    PlotLog(id=uuid4(), plot=plot,
+                            report_datetime=report_datetime)
+                    for plot in plots]
+                if self.ess:
+                    for plot_log in plot_logs:
+                        plot_log.entry_count = 1
+                        plot_log.last_log_status = ACCESSIBLE
+                        plot_log.last_report_datetime = report_datetime
+                bulk_create_with_history(PlotLog, plot_logs)
+                if self.ess:
+                    report_date = arrow.Arrow.fromdatetime(
+                        report_datetime, report_datetime.tzinfo).to('utc').date()
+                    bulk_create_with_history(PlotLogEntry, [
+                        PlotLogEntry(id=uuid4(), plot_log=plot_log,
+                                     log_status=ACCESSIBLE,
+                                     report_datetime=report_datetime,
+                                     report_date=report_date)
+                        for plot_log in plot_logs])
+        self.created += len(plots)
+
+    def reject_existing(self, batch):
+        """Returns the batch less points already in the Plot table.
+        """
+        existing = set(Plot.objects.filter(
+            gps_target_lat__in=[point.latitude for point in batch]).values_list(
+                'gps_target_lat', 'gps_target_lon'))
+        existing = set(
+            (Decimal(lat).quantize(GPS_PLACES), Decimal(lon).quantize(GPS_PLACES))
+            for lat, lon in existing)
+        new_points = []
+        for point in batch:
+            if (point.latitude, point.longitude) in existing:
+                self.rejected.append(
+                    Rejected(point.line_number, 'plot already exists'))
+            else:
+                new_points.append(point)
+        return new_points
+
+    def allocate_identifiers(self, count):
+        return plot_identifier_allocator.allocate(self.map_code, count)
+
+    def get_plot(self, point, plot_identifier, report_datetime):
+        """Returns an unsaved plot with the values the save methods
+        and signals would have set.
+        """
+        logged = not self.excluded and self.ess
+        plot = Plot(
+            id=uuid4(),
+            plot_identifier=plot_identifier,
+            report_datetime=report_datetime,
+            map_area=self.map_area,
+            gps_target_lat=point.latitude,
+            gps_target_lon=point.longitude,
+            ess=self.ess,
+            rss=False,
+            selected=None,
+            household_count=0,
+            accessible=True,
+            access_attempts=1 if logged else 0,
+            location_name='plot' if logged else None,
+            device_created=self.device_id,
+            device_modified=self.device_id,
+            spatial_cell=spatial_cell(point.latitude, point.longitude))
+        plot.slug = '|'.join(
+            slugify(getattr(plot, field) or '')
+            for field in plot.get_search_slug_fields())
+        return plot
@@ -0,0 +1,125 @@
+# coding=utf-8
+
+from collections import Counter
+
+from django.apps import apps as django_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+summary_counts = [
+    'plots', 'confirmed', 'accessible', 'inaccessible', 'enrolled',
+    'rss', 'htc', 'ess', 'household_count']
+
+summary_fields = [
+    'map_area', 'section', 'confirmed', 'accessible', 'enrolled',
+    'rss', 'htc', 'ess', 'household_count']
+
+
+def summary_values(plot):
+    """Returns a dict of the summary fields of a plot instance.
+    """
+    return {field: getattr(plot, field) for field in summary_fields}
+
+
+def plot_summary_values(pks, batch_size=500):
+    """Returns a dict of pk: summary fields read from the database.
+    """
+    Plot = django_apps.get_model(*'plot.plot'.split('.'))
+    pks = list(pks)
+    plot_values = {}
+    for index in range(0, len(pks), batch_size):
+        for values in Plot.objects.filter(
+                pk__in=pks[index:index + batch_size]).values('pk', *summary_fields):
+            plot_values[values.pop('pk')] = values
+    return plot_values
+
+
+def contribution(values):
+    """Returns the (map_area, section) key and the counts a plot
+    adds to the summary given its summary fields.
+    """
+    return (values['map_area'], values['section'] or ''), Counter(
+        plots=1,
+        confirmed=int(bool(values['confirmed'])),
+        accessible=int(bool(values['accessible'])),
+        inaccessible=int(not values['accessible']),
+        enrolled=int(bool(values['enrolled'])),
+        rss=int(bool(values['rss'])),
+        htc=int(bool(values['htc'])),
+        ess=int(bool(values['ess'])),
+        household_count=values['household_count'] or 0)
+
+
+def summary_deltas(changes, deltas=None):
+    """Returns a dict of (map_area, section): Counter of the
+    difference of each (old values, new values).
+
+    Old values are None for a created plot and new values are None
+    for a deleted plot.
+    """
+    deltas = {} if deltas is None else deltas
+    for old_values, new_values in changes:
+        if old_values:
+            key, counts = contribution(old_values)
+            deltas.setdefault(key, Counter()).subtract(counts)
+        if new_values:
+            key, counts = contribution(new_values)
+            deltas.setdefault(key, Counter()).update(counts)
+    return deltas
+
+
+def update_plot_summary(changes=None, deltas=None):
+    """Applies the changes, see summary_deltas, to PlotSummary with
+    one UPDATE per changed map_area and section.
+    """
+    PlotSummary = django_apps.get_model(*'plot.plotsummary'.split('.'))
+    deltas = summary_deltas(changes or [], deltas=deltas)
+    for (map_area, section), delta in sorted(deltas.items()):
+        delta = {field: value for field, value in delta.items() if value}
+        if delta:
+            increment(PlotSummary, map_area, section, delta)
+
+
+def increment(model_cls, map_area, section, delta):
+    values = {field: F(field) + value for field, value in delta.items()}
+    summaries = model_cls.objects.filter(map_area=map_area, section=section)
+    if not summaries.update(**values):
+        try:
+            with transaction.atomic():
+                model_cls.objects.create(map_area=map_area, section=section, **delta)
+        except IntegrityError:
+            # created by a concurrent update
+            summaries.update(**values)
+
+
+def rebuild_plot_summary(plot_model_cls, summary_model_cls):
+    """Replaces the rows of the summary model with counts from the
+    plot model calculated with one aggregate query and returns the
+    number of rows.
+    """
+    def count(condition):
+        return Sum(Case(When(condition, then=Value(1)), default=Value(0),
+                        output_field=IntegerField()))
+    rows = plot_model_cls.objects.order_by().values('map_area', 'section').annotate(
+        plots=Count('pk'),
+        confirmed=count(Q(confirmed=True)),
+        accessible=count(Q(accessible=True)),
+        inaccessible=count(Q(accessible=False)),
+        enrolled=count(Q(enrolled=True)),
+        rss=count(Q(rss=True)),
+        htc=count(Q(htc=True)),
+        ess=count(Q(ess=True)),
+        household_count=Coalesce(Sum('household_count'), 0))
+    summaries = {}
+    for row in rows:
+        section = row['section'] or ''
+        summary = summaries.setdefault(
+            (row['map_area'], section),
+            summary_model_cls(map_area=row['map_area'], section=section))
+        for field in summary_counts:
+            setattr(summary, field, getattr(summary, field) + row[field])
+    with transaction.atomic():
+        summary_model_cls.objects.all().delete()
+        summary_model_cls.objects.bulk_create(summaries.values())
+    return len(summaries)
@@ -0,0 +1,138 @@
+# coding=utf-8
+
+import hashlib
+import random
+import time
+
+from collections import OrderedDict
+
+from django.db import transaction
+
+from edc_base.utils import get_utcnow
+
+from .constants import TWENTY_PERCENT, FIVE_PERCENT
+from .history import bulk_create_historical_records, send_post_save
+from .mapper_snapshot import site_mapper_snapshot
+from .models import Plot
+from .plot_summary import plot_summary_values, summary_values, update_plot_summary
+
+
+class RssSelectionError(Exception):
+    pass
+
+
+class RssSelection:
+
+    """Randomly selects plots in a map area for RSS, setting
+    `selected` and `rss`.
+
+    Plots that are htc or ess are not eligible, see
+    PlotEnrollmentMixin.common_clean. Eligible plots are ordered by
+    plot_identifier and shuffled with a random.Random seeded by the
+    seed, map area and stratum. The first `twenty_percent` of each
+    stratum are TWENTY_PERCENT, the next `five_percent` FIVE_PERCENT
+    and the rest None. The same seed on the same plots gives the
+    same selection.
+
+    Strata are the map area or, if by_section, each section.
+
+    Only changed plots are written, with one UPDATE per bucket and
+    batch, a historical record, post_save and their difference in
+    PlotSummary. Enrolled plots may not change.
+
+        selection = RssSelection(map_area='test_community', seed=1234)
+        selection.run()
+    """
+
+    update_fields = ['selected', 'rss', 'modified']
+
+    def __init__(self, map_area=None, seed=None, by_section=None,
+                 twenty_percent=None, five_percent=None, batch_size=None):
+        if map_area not in site_mapper_snapshot.get().map_areas:
+            raise RssSelectionError(
+                f'Invalid map area. Got \'{map_area}\'. Site mapper expects one '
+                f'of map_areas={sorted(site_mapper_snapshot.get().map_areas)}.')
+        if seed is None:
+            raise RssSelectionError('A seed is required.')
+        self.map_area = map_area
+        self.seed = seed
+        self.by_section = by_section
+        self.twenty_percent = 0.20 if twenty_percent is None else twenty_percent
+        self.five_percent = 0.05 if five_percent is None else five_percent
+        self.batch_size = batch_size or 500
+        self.strata = OrderedDict()  # stratum: {selected: count}
+        self.selection = {}  # pk: selected
+        self.changed = 0
+        self.elapsed = 0.0
+
+    def run(self, dry_run=None):
+        """Selects plots and, unless dry_run, writes the changes.
+        """
+        start = time.time()
+        plots = Plot.objects.filter(
+            map_area=self.map_area, htc=False, ess=False).order_by(
+                'plot_identifier').values_list('pk', 'section', 'selected', 'enrolled')
+        current = {}
+        enrolled = set()
+        strata = OrderedDict()
+        for pk, section, selected, is_enrolled in plots:
+            current[pk] = selected
+            if is_enrolled:
+                enrolled.add(pk)
+            strata.setdefault((section or '') if self.by_section else '', []).append(pk)
+        for stratum, pks in strata.items():
+            self.select(stratum, pks)
+        changed = [pk for pk, selected in self.selection.items()
+                   if current[pk] != selected]
+        if enrolled.intersection(changed):
+            raise RssSelectionError(
+                f'Selection would change {len(enrolled.intersection(changed))} '
+                f'enrolled plots in map area {self.map_area}.')
+        self.changed = len(changed)
+        if not dry_run and changed:
+            with transaction.atomic():
+                self.update(changed)
+        self.elapsed = time.time() - start
+        return self
+
+    def select(self, stratum, pks):
+        n = len(pks)
+        n_twenty = int(round(n * self.twenty_percent))
+        n_five = int(round(n * self.five_percent))
+        pks = list(pks)
+        random.Random(f'{self.seed}:{self.map_area}:{stratum}').shuffle(pks)
+        buckets = [(TWENTY_PERCENT, pks[:n_twenty]),
+                   (FIVE_PERCENT, pks[n_twenty:n_twenty + n_five]),
+                   (None, pks[n_twenty + n_five:])]
+        self.strata[stratum] = OrderedDict()
+        for selected, bucket in buckets:
+            self.strata[stratum][selected] = len(bucket)
+            for pk in bucket:
+                self.selection[pk] = selected
+
+    def update(self, changed):
+        modified = get_utcnow()
+        old_values = plot_summary_values(changed)
+        for selected in [TWENTY_PERCENT, FIVE_PERCENT, None]:
+            pks = [pk for pk in changed if self.selection[pk] == selected]
+            for index in range(0, len(pks), self.batch_size):
+                Plot.objects.filter(pk__in=pks[index:index + self.batch_size]).update(
+                    selected=selected,
+                    rss=selected in [TWENTY_PERCENT, FIVE_PERCENT],
+                    modified=modified)
+        for index in range(0, len(changed), self.batch_size):
+            plots = list(Plot.objects.in_bulk(
+                changed[index:index + self.batch_size]).values())
+            update_plot_summary(
+                [(old_values[plot.pk], summary_values(plot)) for plot in plots])
+            bulk_create_historical_records(Plot, plots, history_type='~')
+            send_post_save(Plot, plots, created=False,
+                           update_fields=frozenset(self.update_fields))
+
+    @property
+    def digest(self):
+        """Returns a digest of the selection to compare runs.
+        """
+        return hashlib.sha256(''.join(
+            f'{pk}:{selected or ""};' for pk, selected in sorted(
+                self.selection.items(), key=lambda x: str(x[0]))).encode()).hexdigest()
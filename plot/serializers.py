@@ -0,0 +1,64 @@
+# coding=utf-8
+
+import json
+
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import Serializer  # noqa
+from django.core.serializers.python import Deserializer as PythonDeserializer
+
+from .natural_key_cache import prefetch_natural_keys
+
+
+def Deserializer(stream_or_string, chunk_size=None, **options):
+    """Deserializes JSON as the Django json Deserializer, resolving
+    the natural keys of each chunk of objects with
+    get_by_natural_keys, see prefetch_natural_keys.
+
+    Registered in AppConfig.ready for the json format, unless the
+    project sets SERIALIZATION_MODULES['json'], so that sync payloads
+    deserialized by edc_sync use it, and as the plot_json format,
+    e.g.:
+
+        manage.py dumpdata plot --format plot_json --natural-foreign \\
+            --natural-primary -o plot.plot_json
+        manage.py loaddata plot.plot_json
+
+    or serializers.deserialize('plot_json', payload).
+    """
+    chunk_size = chunk_size or 1000
+    if not isinstance(stream_or_string, (bytes, str)):
+        stream_or_string = stream_or_string.read()
+    if isinstance(stream_or_string, bytes):
+        stream_or_string = stream_or_string.decode('utf-8')
+    try:
+        objects = json.loads(stream_or_string)
+        for index in range(0, len(objects), chunk_size):
+            chunk = objects[index:index + chunk_size]
+            with prefetch_natural_keys(chunk):
+                for obj in PythonDeserializer(chunk, **options):
+                    yield obj
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as e:
+        raise DeserializationError(e) from e
+
+
+def prefetch_payloads(payloads):
+    """Returns a prefetch_natural_keys for the objects of the JSON
+    payloads, e.g. the decrypted tx of a batch of incoming sync
+    transactions, each with one object.
+
+        with prefetch_payloads(payloads):
+            for payload in payloads:
+                for obj in serializers.deserialize('json', payload):
+                    obj.save()
+    """
+    objects = []
+    for payload in payloads:
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+        try:
+            objects.extend(json.loads(payload))
+        except (TypeError, ValueError):
+            pass  # left for the Deserializer to raise
+    return prefetch_natural_keys(objects)
@@ -20,6 +20,9 @@ APP_NAME = 'plot'
 DEBUG = True
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = ')78^w@s3^kt)6lu6()tomqjg#8_%!381-nx5dtu#i=kn@68h_^'
+
+# the same on the server and all clients, see plot.blind_index
+PLOT_BLIND_INDEX_KEY = 'plot-blind-index-test-key'
 CONFIG_FILE = '{}.conf'.format(APP_NAME)
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
@@ -95,6 +98,17 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+if os.environ.get('PLOT_DATABASE') == 'postgresql':
+    # e.g. for the benchmarks, see plot.benchmark
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('PLOT_DATABASE_NAME', 'plot'),
+            'USER': os.environ.get('PLOT_DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('PLOT_DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('PLOT_DATABASE_HOST', 'localhost'),
+        }
+    }
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.mysql',
@@ -1,18 +1,85 @@
 # coding=utf-8
 
 from django.apps import apps as django_apps
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models import BooleanField, Case, CharField, DateTimeField, F
+from django.db.models import IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from .constants import INACCESSIBLE, ACCESSIBLE
+from edc_base.utils import get_utcnow
+
+from .constants import ACCESSIBLE, INACCESSIBLE
+from .deferred_signals import deferred_plot_signals
+from .history import bulk_create_historical_records, send_post_save
+from .instrumentation import instrumented
 from .models import Plot, PlotLog, PlotLogEntry
+from .natural_key_cache import natural_key_cache
+from .plot_summary import plot_summary_values, summary_values
+from .plot_summary import update_plot_summary
+
+
+@receiver(pre_save, weak=False, sender=Plot,
+          dispatch_uid="plot_summary_on_pre_save")
+@instrumented('signals.plot_summary_on_pre_save')
+def plot_summary_on_pre_save(sender, instance, raw, using, **kwargs):
+    """Keeps the summary fields of the plot as last loaded or saved,
+    or None if new, for plot_summary_on_post_save.
+
+    The plot is only read if there is no snapshot, e.g. a raw save
+    of a deserialized plot or a plot loaded with deferred fields.
+    """
+    if instance._state.adding and not raw:
+        old_values = None
+    elif not raw and '_summary_values' in instance.__dict__:
+        old_values = instance.__dict__['_summary_values']
+    else:
+        old_values = plot_summary_values([instance.pk]).get(instance.pk)
+    instance._plot_summary_values = old_values
+
+
+@receiver(post_save, weak=False, sender=Plot,
+          dispatch_uid="plot_summary_on_post_save")
+@instrumented('signals.plot_summary_on_post_save')
+def plot_summary_on_post_save(sender, instance, raw, created, using, **kwargs):
+    """Updates PlotSummary with the difference of a saved plot and
+    keeps the saved values as the snapshot for the next save.
+
+    Plots written in bulk, see send_post_save, have no values from
+    pre_save and are updated by the bulk operation.
+    """
+    if '_plot_summary_values' in instance.__dict__:
+        old_values = instance.__dict__.pop('_plot_summary_values')
+        new_values = summary_values(instance)
+        changes = [(old_values, new_values)]
+        if deferred_plot_signals.active:
+            deferred_plot_signals.add_summary_changes(changes)
+        else:
+            update_plot_summary(changes)
+        instance._summary_values = new_values
+
+
+@receiver(post_delete, weak=False, sender=Plot,
+          dispatch_uid="plot_summary_on_post_delete")
+@instrumented('signals.plot_summary_on_post_delete')
+def plot_summary_on_post_delete(sender, instance, using, **kwargs):
+    changes = [(summary_values(instance), None)]
+    if deferred_plot_signals.active:
+        deferred_plot_signals.add_summary_changes(changes)
+    else:
+        update_plot_summary(changes)
 
 
 @receiver(post_save, weak=False, sender=Plot,
           dispatch_uid="plot_creates_households_on_post_save")
+@instrumented('signals.plot_creates_households_on_post_save')
 def plot_creates_households_on_post_save(
         sender, instance, raw, created, using, update_fields, **kwargs):
     if not raw and not update_fields:
+        if deferred_plot_signals.active:
+            deferred_plot_signals.add_plot(instance, created)
+            return
         instance.create_or_delete_households()
         if created:
             app_config = django_apps.get_app_config('plot')
@@ -29,34 +96,145 @@ def plot_creates_households_on_post_save(
 
 @receiver(post_save, weak=False, sender=PlotLogEntry,
           dispatch_uid="update_plot_on_post_save")
+@instrumented('signals.update_plot_on_post_save')
 def update_plot_on_post_save(sender, instance, raw, created,
                              using, **kwargs):
+    """Updates the plot log summary and the plot with one UPDATE
+    statement each.
+
+    The plot is read once, locked, and the new values are applied
+    to it in memory for common_clean, the PlotSummary and the
+    historical record. access_attempts is incremented by the
+    database so concurrent entries are all counted.
+    """
     if not raw:
-        plot = Plot.objects.get(pk=instance.plot_log.plot.pk)
-        if created:
-            plot.access_attempts = (plot.access_attempts or 0) + 1
-        if instance.log_status == INACCESSIBLE:
-            plot.accessible = False
-            plot.gps_confirmed_latitude = None
-            plot.gps_confirmed_longitude = None
-            plot.distance_from_target = None
-            plot.household_count = 0
-        elif instance.log_status == ACCESSIBLE:
-            plot.accessible = True
-        plot.save()
+        if deferred_plot_signals.active:
+            deferred_plot_signals.add_log_entry(instance, created)
+            return
+        with transaction.atomic():
+            update_log_summary_on_post_save(instance, created)
+            plot = Plot.objects.select_for_update().get(
+                plotlog__pk=instance.plot_log_id)
+            old_values = summary_values(plot)
+            values = dict(
+                location_name=Case(
+                    When(Q(location_name__isnull=True) | Q(location_name=''),
+                         then=Value('plot')),
+                    default=F('location_name'), output_field=CharField()),
+                modified=get_utcnow())
+            plot.location_name = plot.location_name or 'plot'
+            plot.modified = values['modified']
+            if created:
+                values.update(access_attempts=F('access_attempts') + 1)
+                plot.access_attempts = (plot.access_attempts or 0) + 1
+            if instance.log_status == INACCESSIBLE:
+                inaccessible_values = dict(
+                    accessible=False,
+                    confirmed=False,
+                    gps_confirmed_latitude=None,
+                    gps_confirmed_longitude=None,
+                    distance_from_target=None,
+                    household_count=0)
+                for attr, value in inaccessible_values.items():
+                    setattr(plot, attr, value)
+                # validate the unconfirmed plot as Plot.save would
+                plot.common_clean()
+                values.update(inaccessible_values)
+            elif instance.log_status == ACCESSIBLE:
+                values.update(accessible=Case(
+                    When(status=INACCESSIBLE, then=Value(False)),
+                    default=Value(True), output_field=BooleanField()))
+                plot.accessible = plot.status != INACCESSIBLE
+            Plot.objects.filter(pk=plot.pk).update(**values)
+            updated_on_post_save(plot, old_values, update_fields=values)
 
 
 @receiver(post_delete, weak=False, sender=PlotLogEntry,
           dispatch_uid="update_plot_on_plot_log_entry_post_delete")
+@instrumented('signals.update_plot_on_plot_log_entry_post_delete')
 def update_plot_on_plot_log_entry_post_delete(sender, instance, using, **kwargs):
-    plot = Plot.objects.get(pk=instance.plot_log.plot.pk)
-    plot.access_attempts = (plot.access_attempts or 0) - 1
-    plot.access_attempts = 0 if plot.access_attempts < 1 else plot.access_attempts
-    if plot.access_attempts == 0:
-        plot.accessible = True
-        plot.household_count = 0
-        plot.eligible_members = 0
-        plot.status = None
-        plot.time_of_day = None
-        plot.time_of_week = None
-    plot.save()
+    """Updates the plot with one UPDATE statement.
+
+    The plot is read once and locked. access_attempts is
+    decremented by the database and the plot is reset if no
+    attempts remain.
+    """
+    if deferred_plot_signals.active:
+        deferred_plot_signals.add_deleted_log_entry(instance)
+        return
+    with transaction.atomic():
+        PlotLog.objects.update_log_summary(pks=[instance.plot_log_id])
+        plot = Plot.objects.select_for_update().get(plotlog__pk=instance.plot_log_id)
+        old_values = summary_values(plot)
+        values = dict(
+            access_attempts=Greatest(
+                F('access_attempts') - 1, Value(0), output_field=IntegerField()),
+            modified=get_utcnow())
+        plot.access_attempts = max((plot.access_attempts or 0) - 1, 0)
+        plot.modified = values['modified']
+        reset = plot.access_attempts == 0
+        if reset:
+            reset_values = dict(
+                accessible=True,
+                household_count=0,
+                eligible_members=0,
+                status=None,
+                time_of_day=None,
+                time_of_week=None)
+            for attr, value in reset_values.items():
+                setattr(plot, attr, value)
+            values.update(reset_values)
+        Plot.objects.filter(pk=plot.pk).update(**values)
+        updated_on_post_save(plot, old_values, update_fields=values)
+        if reset:
+            plot.create_or_delete_households(force=True)
+
+
+def update_log_summary_on_post_save(plot_log_entry, created):
+    """Increments the plot log summary for a new entry or
+    recalculates it for a changed entry.
+    """
+    if created:
+        is_last = Q(last_report_datetime__isnull=True) | Q(
+            last_report_datetime__lte=plot_log_entry.report_datetime)
+        # last_log_status first, MySQL assigns left to right
+        PlotLog.objects.filter(pk=plot_log_entry.plot_log_id).update(
+            entry_count=F('entry_count') + 1,
+            last_log_status=Case(
+                When(is_last, then=Value(plot_log_entry.log_status)),
+                default=F('last_log_status'), output_field=CharField()),
+            last_report_datetime=Case(
+                When(is_last, then=Value(plot_log_entry.report_datetime)),
+                default=F('last_report_datetime'), output_field=DateTimeField()),
+            modified=get_utcnow())
+    else:
+        PlotLog.objects.update_log_summary(pks=[plot_log_entry.plot_log_id])
+
+
+@receiver(post_save, weak=False,
+          dispatch_uid="natural_key_cache_on_post_save")
+@instrumented('signals.natural_key_cache_on_post_save')
+def natural_key_cache_on_post_save(sender, instance, raw, created, using, **kwargs):
+    """Adds objects saved while prefetched natural keys are cached,
+    e.g. by loaddata, see prefetch_natural_keys.
+    """
+    if natural_key_cache.active and sender in [Plot, PlotLog, PlotLogEntry]:
+        natural_key_cache.add_instance(instance)
+
+
+@receiver(post_delete, weak=False,
+          dispatch_uid="natural_key_cache_on_post_delete")
+@instrumented('signals.natural_key_cache_on_post_delete')
+def natural_key_cache_on_post_delete(sender, instance, using, **kwargs):
+    if natural_key_cache.active and sender in [Plot, PlotLog, PlotLogEntry]:
+        natural_key_cache.remove_instance(instance)
+
+
+def updated_on_post_save(plot, old_values, update_fields=None):
+    """Updates PlotSummary, writes the historical record and sends
+    post_save for a plot updated by a plot log entry signal.
+    """
+    update_plot_summary([(old_values, summary_values(plot))])
+    bulk_create_historical_records(Plot, [plot], history_type='~')
+    send_post_save(Plot, [plot], created=False,
+                   update_fields=frozenset(update_fields))
@@ -0,0 +1,66 @@
+# coding=utf-8
+
+from math import cos, floor, radians
+
+import numpy as np
+
+CELL_SIZE = 0.001  # degrees, about 110m
+EARTH_RADIUS = 6371008.8  # meters
+METERS_PER_DEGREE = 111320.0
+MAX_CELLS = 2500  # above this, prefilter with a bounding box instead
+
+
+def spatial_cell(latitude, longitude):
+    """Returns the grid cell of a point as 'row:col', or None.
+    """
+    if latitude is None or longitude is None:
+        return None
+    return cell(floor(float(latitude) / CELL_SIZE),
+                floor(float(longitude) / CELL_SIZE))
+
+
+def cell(row, col):
+    return f'{row}:{col}'
+
+
+def bounding_box(latitude, longitude, meters):
+    """Returns (min_lat, max_lat, min_lon, max_lon) of a box
+    enclosing the circle of radius meters around the point.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    delta_lat = meters / METERS_PER_DEGREE
+    delta_lon = meters / (METERS_PER_DEGREE * max(cos(radians(latitude)), 0.01))
+    return (latitude - delta_lat, latitude + delta_lat,
+            longitude - delta_lon, longitude + delta_lon)
+
+
+def spatial_cells(latitude, longitude, meters):
+    """Returns the grid cells covering the circle of radius
+    meters around the point, or None if there are more than
+    MAX_CELLS.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, meters)
+    rows = range(floor(min_lat / CELL_SIZE), floor(max_lat / CELL_SIZE) + 1)
+    cols = range(floor(min_lon / CELL_SIZE), floor(max_lon / CELL_SIZE) + 1)
+    if len(rows) * len(cols) > MAX_CELLS:
+        return None
+    return [cell(row, col) for row in rows for col in cols]
+
+
+def distances(latitude, longitude, latitudes, longitudes):
+    """Returns a numpy array of the haversine distances in meters
+    from the point to each of the latitudes, longitudes.
+    """
+    return pairwise_distances(latitude, longitude, latitudes, longitudes)
+
+
+def pairwise_distances(latitudes1, longitudes1, latitudes2, longitudes2):
+    """Returns a numpy array of the haversine distances in meters
+    between each pair of points. Missing coordinates give nan.
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.array(values, dtype=float))
+        for values in [latitudes1, longitudes1, latitudes2, longitudes2])
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
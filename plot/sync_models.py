@@ -4,10 +4,13 @@ from edc_base.model_mixins import ListModelMixin
 from edc_sync.site_sync_models import site_sync_models
 from edc_sync.sync_model import SyncModel
 
+not_sync_models = ['plot.plotidentifiersequence', 'plot.plotsummary']
+
 sync_models = []
 app_config = django_apps.get_app_config('plot')
 for model in app_config.get_models():
-    if not issubclass(model, ListModelMixin):
+    if (not issubclass(model, ListModelMixin)
+            and model._meta.label_lower not in not_sync_models):
         sync_models.append(model._meta.label_lower)
 
 site_sync_models.register(sync_models, SyncModel)
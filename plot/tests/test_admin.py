@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls.base import reverse
+
+from edc_map.site_mappers import site_mappers
+
+from ..admin_site import plot_admin
+from ..constants import ACCESSIBLE
+from ..models import PlotLog, PlotLogEntry
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('admin')
+class TestAdminQueryCount(TestCase):
+
+    """Asserts a changelist page costs the same number of queries
+    for 10 or 100 rows.
+    """
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        user = User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        self.client.force_login(user)
+
+    def add_plots(self, count):
+        for _ in range(count):
+            plot = self.plot_helper.make_plot()
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+
+    def changelist_queries(self, model):
+        model_admin = plot_admin._registry[model]
+        url = reverse(
+            f'plot_admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        with patch.object(model_admin, 'list_per_page', 100):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, model):
+        self.add_plots(10)
+        queries = self.changelist_queries(model)
+        self.add_plots(90)
+        self.assertEqual(model.objects.all().count(), 100)
+        self.assertEqual(self.changelist_queries(model), queries)
+
+    def test_plot_log_changelist(self):
+        self.assertConstantQueries(PlotLog)
+
+    def test_plot_log_entry_changelist(self):
+        self.assertConstantQueries(PlotLogEntry)
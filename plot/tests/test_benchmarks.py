@@ -0,0 +1,205 @@
+import os
+import random
+import sys
+
+import tempfile
+
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase, tag
+from django.urls.base import reverse
+
+from edc_device.constants import CENTRAL_SERVER
+from edc_map.site_mappers import site_mappers
+from survey.tests import SurveyTestHelper
+
+from ..benchmark import Baseline, BenchmarkResult, WorkflowBenchmark, seed_plots
+from ..admin import PlotAdmin
+from ..constants import ACCESSIBLE, INACCESSIBLE
+from ..mapper_snapshot import site_mapper_snapshot
+from ..models import Plot, PlotLog
+from ..paginators import KeysetPaginator
+from ..utils import get_anonymous_plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+
+def paginate(paginator_cls, number):
+    """Returns a workflow that reads a page of the plot changelist
+    ordering, or the last page if there are fewer pages.
+    """
+    def func():
+        paginator = paginator_cls(
+            Plot.objects.order_by('-plot_identifier', '-pk'), PlotAdmin.list_per_page)
+        return list(paginator.page(min(number, paginator.num_pages)).object_list)
+    return func
+
+
+def load_fixture(format):
+    """Returns a workflow that loads a fixture with the serialization
+    format.
+    """
+    def func(fixture):
+        for obj in serializers.deserialize(format, fixture):
+            obj.save()
+    return func
+
+
+@tag('benchmark')
+class TestBaseline(TestCase):
+
+    def test_compare(self):
+        with tempfile.TemporaryDirectory() as path:
+            baseline = Baseline(os.path.join(path, 'baseline.json'))
+            result = BenchmarkResult('make_plot', 1000, 20, 0.1, 100000)
+            self.assertEqual(len(baseline.compare(result, vendor='sqlite')), 1)
+            baseline.update(result, vendor='sqlite')
+            baseline.save()
+            baseline = Baseline(os.path.join(path, 'baseline.json'))
+            self.assertEqual(baseline.compare(result, vendor='sqlite'), [])
+            self.assertEqual(len(baseline.compare(
+                result._replace(queries=21), vendor='sqlite')), 1)
+            self.assertEqual(len(baseline.compare(
+                result, vendor='postgresql')), 1)
+
+
+@tag('benchmark')
+@skipUnless(os.environ.get('PLOT_BENCHMARK'), 'Set PLOT_BENCHMARK=1 to run.')
+class TestPlotBenchmarks(TestCase):
+
+    """Measures the plot workflows at each number of existing plots
+    and compares them with the stored baseline.
+
+        PLOT_BENCHMARK=1 python manage.py test plot --tag benchmark
+
+    PLOT_BENCHMARK_SIZES sets the numbers of plots, default
+    1000,10000,100000. PLOT_BENCHMARK_UPDATE=1 stores the results as
+    the baseline instead. The spatial queries, map area validation,
+    natural key loading and paging at page 1 and 5000 are workflows
+    here too. Workflows with no baseline for the database vendor and
+    size are listed and the test is skipped, unless another workflow
+    regressed.
+    PLOT_DATABASE=postgresql runs against PostgreSQL, see settings.
+    """
+
+    plot_helper = PlotTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        django_apps.app_configs['edc_device'].device_role = CENTRAL_SERVER
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        user = User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        self.client.force_login(user)
+        self.sizes = [int(size) for size in os.environ.get(
+            'PLOT_BENCHMARK_SIZES', '1000,10000,100000').split(',')]
+        self.baseline = Baseline(BASELINE)
+        self.benchmark = WorkflowBenchmark(repeat=3)
+
+    def workflows(self, plots):
+        """Returns a list of (workflow, setup, func) at the number of
+        existing plots.
+        """
+        helper = self.plot_helper
+        rng = random.Random(plots)
+
+        def make_plot_with_entry():
+            plot = helper.make_plot()
+            helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+            return plot
+
+        def make_confirmed_plot(household_count=0):
+            return helper.make_confirmed_plot(household_count=household_count)
+
+        def set_household_count(household_count):
+            def func(plot):
+                plot.household_count = household_count
+                plot.save()
+            return func
+
+        def target_point():
+            return Plot.objects.exclude(gps_target_lat__isnull=True).order_by(
+                'plot_identifier').values_list(
+                    'gps_target_lat', 'gps_target_lon')[rng.randrange(plots)]
+
+        def unsaved_plots():
+            map_areas = sorted(site_mapper_snapshot.get().map_areas)
+            return [Plot(map_area=map_areas[n % len(map_areas)]) for n in range(10000)]
+
+        def plot_log_fixture():
+            return serializers.serialize(
+                'json', PlotLog.objects.select_related('plot').order_by('pk')[:5000],
+                use_natural_foreign_keys=True, use_natural_primary_keys=True)
+
+        changelist = reverse('plot_admin:plot_plot_changelist')
+        return [
+            ('make_plot', None, helper.make_plot),
+            ('confirm_plot', make_plot_with_entry,
+             lambda plot: helper.confirm_plot(plot, household_count=1)),
+            ('accessible_log_entry', make_confirmed_plot,
+             lambda plot: helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)),
+            ('inaccessible_log_entry', make_confirmed_plot,
+             lambda plot: helper.add_plot_log_entry(plot=plot, log_status=INACCESSIBLE)),
+            ('delete_log_entry',
+             lambda: helper.add_plot_log_entry(
+                 plot=make_confirmed_plot(), log_status=ACCESSIBLE),
+             lambda entry: entry.delete()),
+            ('household_count_0_to_9', make_confirmed_plot, set_household_count(9)),
+            ('household_count_9_to_0', lambda: make_confirmed_plot(household_count=9),
+             set_household_count(0)),
+            ('get_anonymous_plot', get_anonymous_plot, lambda plot: get_anonymous_plot()),
+            ('admin_changelist', None, lambda: self.client.get(changelist)),
+            ('paginator_page_1', None, paginate(Paginator, 1)),
+            ('paginator_page_5000', None, paginate(Paginator, 5000)),
+            ('keyset_paginator_page_1', None, paginate(KeysetPaginator, 1)),
+            ('keyset_paginator_page_5000', None, paginate(KeysetPaginator, 5000)),
+            ('within_radius', target_point,
+             lambda point: Plot.objects.within_radius(*point, 25)),
+            ('nearest', target_point, lambda point: Plot.objects.nearest(*point, 5)),
+            ('map_area_in_site_mappers_10000', unsaved_plots,
+             lambda unsaved: [plot.map_area in site_mappers.map_areas
+                              for plot in unsaved]),
+            ('map_area_in_snapshot_10000', unsaved_plots,
+             lambda unsaved: [plot.map_area in site_mapper_snapshot.get().map_areas
+                              for plot in unsaved]),
+            ('common_clean_10000', unsaved_plots,
+             lambda unsaved: [plot.common_clean() for plot in unsaved]),
+            # before and after bulk natural key resolution
+            ('load_plot_logs_json', plot_log_fixture, load_fixture('json')),
+            ('load_plot_logs_plot_json', plot_log_fixture, load_fixture('plot_json')),
+        ]
+
+    def test_workflows(self):
+        regressions, missing = [], []
+        for size in self.sizes:
+            seed_plots(size, map_area=TestPlotMapper.map_area)
+            plots = Plot.objects.all().count()
+            for workflow, setup, func in self.workflows(plots):
+                result = self.benchmark.measure(workflow, size, func, setup=setup)
+                sys.stderr.write(
+                    f'{connection.vendor} {plots} plots {workflow}: '
+                    f'{result.queries} queries, {result.seconds * 1000:.1f}ms, '
+                    f'{result.peak_memory / 1024:.0f}KiB\n')
+                if os.environ.get('PLOT_BENCHMARK_UPDATE'):
+                    self.baseline.update(result)
+                elif self.baseline.get(result) is None:
+                    missing.append(f'{workflow} at {size} plots')
+                else:
+                    regressions.extend(self.baseline.compare(result))
+        if os.environ.get('PLOT_BENCHMARK_UPDATE'):
+            self.baseline.save()
+        self.assertEqual(regressions, [], msg='\n'.join(regressions))
+        if missing:
+            self.skipTest(
+                f'No {connection.vendor} baseline in {BASELINE} for '
+                f'{", ".join(missing)}. Record it with PLOT_BENCHMARK_UPDATE=1.')
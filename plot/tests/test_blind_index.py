@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, tag
+from django.test.client import RequestFactory
+
+from edc_map.site_mappers import site_mappers
+
+from ..admin_site import plot_admin
+from ..blind_index import blind_index, update_search_slugs
+from ..models import Plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('blind_index')
+class TestBlindIndex(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.plot = self.plot_helper.make_plot(cso_number='12345')
+        self.other_plot = self.plot_helper.make_plot(cso_number='67890')
+        self.plot_without = self.plot_helper.make_plot()
+
+    def test_blind_index(self):
+        self.assertEqual(blind_index(' 12 345 '), blind_index('12345'))
+        self.assertNotEqual(blind_index('12345'), blind_index('12346'))
+        self.assertNotEqual(blind_index('12345', key='a'), blind_index('12345', key='b'))
+        self.assertIsNone(blind_index(''))
+        self.assertIsNone(blind_index(None))
+
+    def test_index_on_save(self):
+        plot = Plot.objects.get(pk=self.plot.pk)
+        self.assertEqual(plot.cso_number_index, blind_index('12345'))
+        self.assertNotIn('12345', plot.cso_number_index)
+        plot.cso_number = '11111'
+        plot.save()
+        self.assertEqual(
+            Plot.objects.get(pk=self.plot.pk).cso_number_index, blind_index('11111'))
+        self.assertIsNone(Plot.objects.get(pk=self.plot_without.pk).cso_number_index)
+
+    def test_filter_cso_number(self):
+        self.assertEqual(
+            [plot.pk for plot in Plot.objects.filter_cso_number('12345')],
+            [self.plot.pk])
+        self.assertFalse(Plot.objects.filter_cso_number('99999').exists())
+
+    def test_rebuild(self):
+        Plot.objects.update(cso_number_index=None)
+        modified = Plot.objects.get(pk=self.plot_without.pk).modified
+        call_command('rebuild_cso_number_index', stdout=StringIO())
+        plot = Plot.objects.get(pk=self.plot.pk)
+        self.assertEqual(plot.cso_number_index, blind_index('12345'))
+        self.assertGreater(plot.modified, modified)
+        plot_without = Plot.objects.get(pk=self.plot_without.pk)
+        self.assertIsNone(plot_without.cso_number_index)
+        # unchanged, so not sent again by the change feed
+        self.assertEqual(plot_without.modified, modified)
+
+    def test_key_required(self):
+        with self.settings():
+            del settings.PLOT_BLIND_INDEX_KEY
+            self.assertRaises(ImproperlyConfigured, blind_index, '12345')
+        with self.settings(PLOT_BLIND_INDEX_KEY='other'):
+            self.assertNotEqual(blind_index('12345'), self.plot.cso_number_index)
+
+    def test_slug_without_cso_number(self):
+        plot = Plot.objects.get(pk=self.plot.pk)
+        self.assertIn(plot.plot_identifier, plot.slug)
+        self.assertNotIn('12345', plot.slug)
+        self.assertFalse(Plot.objects.filter(slug__contains='12345').exists())
+        self.assertFalse(Plot.history.filter(slug__contains='12345').exists())
+
+    def test_update_search_slugs(self):
+        Plot.objects.filter(pk=self.plot.pk).update(slug='12345')
+        Plot.history.filter(id=self.plot.pk).update(slug='12345')
+        update_search_slugs(Plot, ['plot_identifier', 'map_area'])
+        update_search_slugs(Plot.history.model, ['plot_identifier', 'map_area'])
+        self.assertNotIn('12345', Plot.objects.get(pk=self.plot.pk).slug)
+        self.assertFalse(Plot.history.filter(slug__contains='12345').exists())
+
+    def test_admin_search(self):
+        model_admin = plot_admin._registry[Plot]
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        queryset, _ = model_admin.get_search_results(
+            request, Plot.objects.all(), '12345')
+        self.assertEqual([plot.pk for plot in queryset], [self.plot.pk])
+        queryset, _ = model_admin.get_search_results(
+            request, Plot.objects.exclude(pk=self.plot.pk), '12345')
+        self.assertFalse(queryset.exists())
@@ -0,0 +1,93 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..bulk_plot_confirmation import BulkPlotConfirmation, BulkPlotConfirmationError
+from ..models import Plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('confirmation')
+class TestBulkPlotConfirmation(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.confirmed_plot = self.plot_helper.make_confirmed_plot()
+        self.plot = self.plot_helper.make_plot()
+
+    def test_recalculates_confirmed_and_distance(self):
+        Plot.objects.filter(pk=self.confirmed_plot.pk).update(
+            confirmed=False, distance_from_target=None)
+        confirmation = BulkPlotConfirmation(map_area='test_community').run()
+        self.assertEqual(confirmation.plots, 2)
+        self.assertEqual(confirmation.confirmed, 1)
+        self.assertEqual(confirmation.changed, 1)
+        plot = Plot.objects.get(pk=self.confirmed_plot.pk)
+        self.assertTrue(plot.confirmed)
+        self.assertAlmostEqual(
+            plot.distance_from_target, self.confirmed_plot.distance_from_target,
+            places=1)
+        self.assertFalse(Plot.objects.get(pk=self.plot.pk).confirmed)
+
+    def test_unchanged_not_written(self):
+        BulkPlotConfirmation(map_area='test_community').run()
+        count = Plot.history.all().count()
+        confirmation = BulkPlotConfirmation(map_area='test_community').run()
+        self.assertEqual(confirmation.changed, 0)
+        self.assertEqual(Plot.history.all().count(), count)
+
+    def test_target_radius_reduced(self):
+        """Asserts a confirmed plot out of radius is left as it is,
+        as Plot.save would refuse it.
+        """
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        Plot.objects.filter(pk__in=[plot.pk, self.confirmed_plot.pk]).update(
+            target_radius=0)
+        count = Plot.history.all().count()
+        confirmation = BulkPlotConfirmation(map_area='test_community').run()
+        self.assertEqual(confirmation.out_of_radius, 2)
+        self.assertEqual(confirmation.changed, 0)
+        self.assertEqual(Plot.history.all().count(), count)
+        plot = Plot.objects.get(pk=plot.pk)
+        self.assertTrue(plot.confirmed)
+        self.assertIsNotNone(plot.gps_confirmed_latitude)
+        self.assertEqual(plot.household_count, 2)
+
+    def test_enrolled_not_unconfirmed(self):
+        Plot.objects.filter(pk=self.confirmed_plot.pk).update(
+            target_radius=0, enrolled=True)
+        confirmation = BulkPlotConfirmation(map_area='test_community').run()
+        self.assertEqual(confirmation.out_of_radius, 1)
+        self.assertTrue(Plot.objects.get(pk=self.confirmed_plot.pk).confirmed)
+
+    def test_get_confirmed_once(self):
+        """Asserts save and common_clean call get_confirmed once
+        for the same confirmation inputs.
+        """
+        plot = Plot.objects.get(pk=self.confirmed_plot.pk)
+        with patch.object(
+                Plot, 'get_confirmed', autospec=True,
+                side_effect=Plot.get_confirmed) as get_confirmed:
+            plot.save()
+            plot.common_clean()
+        self.assertEqual(get_confirmed.call_count, 1)
+
+    def test_invalid_map_area(self):
+        self.assertRaises(
+            BulkPlotConfirmationError, BulkPlotConfirmation, map_area='blahblah')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('confirm_plots', 'test_community', stdout=out)
+        self.assertIn('test_community: 2 plots, 1 confirmed', out.getvalue())
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+
+from edc_base.utils import get_utcnow
+from edc_map.site_mappers import site_mappers
+
+from ..change_feed import ChangeFeed, ChangeFeedError, Watermark
+from ..constants import ACCESSIBLE
+from ..models import Plot, PlotLog
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('change_feed')
+class TestChangeFeed(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.plots = [self.plot_helper.make_plot() for _ in range(7)]
+        # the same modified for all, ties are ordered by pk
+        Plot.objects.update(modified=get_utcnow() - timedelta(minutes=5))
+
+    def read_all(self, feed, watermark=None):
+        rows = []
+        while True:
+            page = feed.page(watermark=watermark)
+            rows.extend(page.rows)
+            watermark = page.watermark
+            if not page.has_more:
+                return rows, watermark
+
+    def test_pages_return_every_row_once(self):
+        feed = ChangeFeed(model='plot.plot', page_size=3)
+        rows, _ = self.read_all(feed)
+        self.assertEqual(
+            sorted(str(plot.pk) for plot in rows),
+            sorted(str(plot.pk) for plot in self.plots))
+
+    def test_only_changed_since_watermark(self):
+        feed = ChangeFeed(model='plot.plot', page_size=3, settle_seconds=0)
+        _, watermark = self.read_all(feed)
+        plot = Plot.objects.get(pk=self.plots[2].pk)
+        plot.save()
+        rows, _ = self.read_all(feed, watermark=str(watermark))
+        self.assertEqual([row.pk for row in rows], [plot.pk])
+
+    def test_recent_rows_left_to_settle(self):
+        feed = ChangeFeed(model='plot.plot')
+        _, watermark = self.read_all(feed)
+        Plot.objects.get(pk=self.plots[0].pk).save()
+        rows, _ = self.read_all(feed, watermark=watermark)
+        self.assertEqual(rows, [])
+
+    def test_changes_read_again_the_overlap(self):
+        feed = ChangeFeed(model='plot.plot', settle_seconds=0, overlap_seconds=120)
+        _, watermark = self.read_all(feed)
+        # saved before the watermark but committed after it was read
+        Plot.objects.filter(pk=self.plots[1].pk).update(
+            modified=watermark.timestamp - timedelta(seconds=60))
+        Plot.objects.filter(pk=self.plots[2].pk).update(
+            modified=watermark.timestamp - timedelta(seconds=300))
+        pages = list(feed.changes(watermark=str(watermark)))
+        rows = [row.pk for page in pages for row in page.rows]
+        self.assertEqual(rows.count(self.plots[1].pk), 1)
+        self.assertNotIn(self.plots[2].pk, rows)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(pages[-1].watermark, watermark)
+
+    def test_log_entry_changes_plot_log(self):
+        feed = ChangeFeed(model='plot.plotlog', settle_seconds=0)
+        PlotLog.objects.update(modified=get_utcnow() - timedelta(minutes=5))
+        _, watermark = self.read_all(feed)
+        self.plot_helper.add_plot_log_entry(plot=self.plots[0], log_status=ACCESSIBLE)
+        rows, _ = self.read_all(feed, watermark=watermark)
+        self.assertEqual([row.plot_id for row in rows], [self.plots[0].pk])
+
+    def test_history_has_deletes(self):
+        feed = ChangeFeed(model='plot.historicalplot', settle_seconds=0)
+        _, watermark = self.read_all(feed)
+        plot = self.plot_helper.make_plot()
+        PlotLog.objects.filter(plot=plot).delete()
+        plot.delete()
+        rows, _ = self.read_all(feed, watermark=watermark)
+        self.assertEqual(
+            [row.history_type for row in rows if row.id == plot.pk][-1], '-')
+
+    def test_watermark(self):
+        watermark = Watermark(get_utcnow(), str(self.plots[0].pk))
+        self.assertEqual(Watermark.parse(str(watermark)), watermark)
+        self.assertRaises(ChangeFeedError, Watermark.parse, 'erik')
+        self.assertRaises(ChangeFeedError, ChangeFeed, model='plot.plotsummary')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('plot_change_feed', 'plot.plot', '--pages', '0',
+                     '--page-size', '2', stdout=out, stderr=StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 7)
@@ -0,0 +1,113 @@
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..constants import ACCESSIBLE, INACCESSIBLE
+from ..history import coalesce_history, history_buffer
+from ..models import Plot, PlotLog, PlotLogEntry
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('history')
+class TestCoalesceHistory(TestCase):
+
+    """Counts the historical records written by each step of the
+    plot workflow with and without coalesce_history.
+    """
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def history_counts(self, plot_pk):
+        plot_log_pks = list(PlotLog.objects.filter(
+            plot_id=plot_pk).values_list('pk', flat=True))
+        return dict(
+            plot=Plot.history.filter(id=plot_pk).count(),
+            plot_log=PlotLog.history.filter(plot_id=plot_pk).count(),
+            plot_log_entry=PlotLogEntry.history.filter(
+                plot_log_id__in=plot_log_pks).count())
+
+    def workflow(self, coalesce):
+        """Returns a list of the history counts added by each step.
+        """
+        def step(func):
+            before = self.history_counts(self.plot.pk) if self.plot else None
+            if coalesce:
+                with coalesce_history():
+                    func()
+            else:
+                func()
+            after = self.history_counts(self.plot.pk)
+            counts.append({name: count - (before or {}).get(name, 0)
+                           for name, count in after.items()})
+        counts = []
+        self.plot = None
+
+        def make_plot():
+            self.plot = self.plot_helper.make_plot(ess=True)
+
+        def add_entry():
+            self.plot_helper.add_plot_log_entry(plot=self.plot, log_status=ACCESSIBLE)
+
+        def confirm():
+            self.plot = self.plot_helper.confirm_plot(
+                Plot.objects.get(pk=self.plot.pk), household_count=3)
+
+        def add_inaccessible_entry():
+            self.plot_helper.add_plot_log_entry(
+                plot=self.plot, log_status=INACCESSIBLE)
+
+        for func in [make_plot, add_entry, confirm, add_inaccessible_entry]:
+            step(func)
+        return counts
+
+    def test_at_most_one_record_per_object_per_step(self):
+        for counts in self.workflow(coalesce=True):
+            with self.subTest(counts=counts):
+                for count in counts.values():
+                    self.assertLessEqual(count, 1)
+
+    def test_fewer_records_than_without(self):
+        coalesced = self.workflow(coalesce=True)
+        uncoalesced = self.workflow(coalesce=False)
+        for with_, without in zip(coalesced, uncoalesced):
+            with self.subTest(coalesced=with_, uncoalesced=without):
+                for name, count in with_.items():
+                    self.assertLessEqual(count, without[name])
+                    self.assertEqual(bool(count), bool(without[name]))
+
+    def test_record_is_last_state(self):
+        plot = self.plot_helper.make_plot()
+        with coalesce_history():
+            plot = self.plot_helper.confirm_plot(plot, household_count=3)
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        record = Plot.history.filter(id=plot.pk).order_by('-history_date').first()
+        plot = Plot.objects.get(pk=plot.pk)
+        self.assertEqual(record.history_type, '~')
+        self.assertEqual(record.household_count, plot.household_count)
+        self.assertEqual(record.access_attempts, plot.access_attempts)
+        self.assertEqual(record.confirmed, plot.confirmed)
+
+    def test_created_inside_is_created(self):
+        with coalesce_history():
+            plot = self.plot_helper.make_plot()
+            plot.save()
+        self.assertEqual(
+            list(Plot.history.filter(id=plot.pk).values_list('history_type', flat=True)),
+            ['+'])
+
+    def test_rolled_back_on_exception(self):
+        with self.assertRaises(ValueError):
+            with coalesce_history():
+                self.plot_helper.make_plot()
+                raise ValueError
+        self.assertFalse(history_buffer.active)
+        self.assertEqual(Plot.objects.all().count(), 0)
+        self.assertEqual(Plot.history.all().count(), 0)
@@ -0,0 +1,200 @@
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from edc_base.utils import get_utcnow
+from edc_map.site_mappers import site_mappers
+
+from household.models import Household
+from survey.tests import SurveyTestHelper
+
+from ..constants import RESIDENTIAL_HABITABLE
+from ..deferred_signals import defer_plot_signals
+from ..household_delete_planner import HouseholdDeletePlanner
+from ..mommy_recipes import fake
+from ..models import Plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('households')
+class TestBulkCreateHouseholds(TestCase):
+
+    plot_helper = PlotTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.app_config = django_apps.get_app_config('plot')
+        self.bulk_create_households = self.app_config.bulk_create_households
+        self.app_config.bulk_create_households = True
+
+    def tearDown(self):
+        self.app_config.bulk_create_households = self.bulk_create_households
+
+    def inserts(self, queries, model_cls):
+        table = connection.ops.quote_name(model_cls._meta.db_table)
+        return [query for query in queries
+                if query['sql'].startswith(f'INSERT INTO {table}')]
+
+    def create_households(self, household_count):
+        plot = self.plot_helper.make_confirmed_plot()
+        plot.household_count = household_count
+        with CaptureQueriesContext(connection) as context:
+            households = plot.bulk_create_households()
+        self.assertEqual(len(households), household_count)
+        self.assertEqual(
+            Household.objects.filter(plot=plot).count(), household_count)
+        return context.captured_queries
+
+    def test_bulk_creates_households(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=3)
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 3)
+        plot.household_count = 5
+        plot.save()
+        self.assertEqual(
+            sorted(Household.objects.filter(plot=plot).values_list(
+                'household_sequence', flat=True)), [1, 2, 3, 4, 5])
+
+    def test_inserts_do_not_grow_with_household_count(self):
+        for household_count in [1, 9]:
+            with self.subTest(household_count=household_count):
+                queries = self.create_households(household_count)
+                self.assertEqual(len(self.inserts(queries, Household)), 1)
+                self.assertEqual(
+                    len(self.inserts(queries, Household.history.model)), 1)
+
+    def test_same_identifiers_as_household_save(self):
+        self.app_config.bulk_create_households = False
+        plot = self.plot_helper.make_confirmed_plot(household_count=3)
+        saved = list(Household.objects.filter(plot=plot).order_by(
+            'household_sequence').values_list('household_identifier', flat=True))
+        self.assertEqual(
+            saved, [plot.get_household_identifier(n) for n in [1, 2, 3]])
+
+    def test_only_missing_households_created(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        plot.household_count = 4
+        self.assertEqual(
+            [h.household_sequence for h in plot.bulk_create_households()], [3, 4])
+        self.assertEqual(plot.bulk_create_households(), [])
+
+
+@tag('households')
+class TestReconcileHouseholds(TestCase):
+
+    plot_helper = PlotTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def household_queries(self, queries):
+        table = connection.ops.quote_name(Household._meta.db_table)
+        return [query for query in queries if table in query['sql']]
+
+    def test_unchanged_household_count_does_nothing(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=3)
+        plot.eligible_members = 3
+        with CaptureQueriesContext(connection) as context:
+            plot.save()
+        self.assertEqual(self.household_queries(context.captured_queries), [])
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 3)
+
+    def test_unchanged_after_reload_does_nothing(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=3)
+        plot = plot.__class__.objects.get(pk=plot.pk)
+        self.assertFalse(plot.households_changed)
+        with CaptureQueriesContext(connection) as context:
+            plot.create_or_delete_households()
+        self.assertEqual(context.captured_queries, [])
+
+    def test_created_confirmed_with_households(self):
+        plot = Plot.objects.create(
+            map_area=TestPlotMapper.map_area,
+            report_datetime=get_utcnow(),
+            gps_target_lat=fake.target_latitude(),
+            gps_target_lon=fake.target_longitude(),
+            gps_confirmed_latitude=fake.confirmed_latitude(),
+            gps_confirmed_longitude=fake.confirmed_longitude(),
+            household_count=3,
+            status=RESIDENTIAL_HABITABLE)
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 3)
+
+    def test_created_confirmed_with_households_deferred(self):
+        with defer_plot_signals():
+            plot = Plot.objects.create(
+                map_area=TestPlotMapper.map_area,
+                report_datetime=get_utcnow(),
+                gps_target_lat=fake.target_latitude(),
+                gps_target_lon=fake.target_longitude(),
+                gps_confirmed_latitude=fake.confirmed_latitude(),
+                gps_confirmed_longitude=fake.confirmed_longitude(),
+                household_count=3,
+                status=RESIDENTIAL_HABITABLE)
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 3)
+
+    def test_deletes_surplus_households(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=5)
+        plot.household_count = 2
+        plot.save()
+        self.assertEqual(
+            sorted(Household.objects.filter(plot=plot).values_list(
+                'household_sequence', flat=True)), [1, 2])
+        self.assertEqual(plot.__class__.objects.get(pk=plot.pk).household_count, 2)
+
+
+@tag('households')
+class TestHouseholdDeletePlanner(TestCase):
+
+    plot_helper = PlotTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_deletes_households_across_plots(self):
+        plots = [self.plot_helper.make_confirmed_plot(household_count=3)
+                 for _ in range(3)]
+        pks = list(Household.objects.filter(plot__in=plots).values_list(
+            'pk', flat=True))
+        planner = HouseholdDeletePlanner(
+            household_model='household.household', pks=pks)
+        report = planner.delete()
+        self.assertEqual(sorted(report.deleted), sorted(pks))
+        self.assertEqual(report.skipped, {})
+        self.assertFalse(Household.objects.filter(plot__in=plots).exists())
+
+    def test_plan_query_count_does_not_grow(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=1)
+        pks = list(Household.objects.filter(plot=plot).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as context:
+            HouseholdDeletePlanner(
+                household_model='household.household', pks=pks).plan()
+        plot = self.plot_helper.make_confirmed_plot(household_count=9)
+        pks = list(Household.objects.filter(plot=plot).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as context9:
+            HouseholdDeletePlanner(
+                household_model='household.household', pks=pks).plan()
+        self.assertEqual(
+            len(context.captured_queries), len(context9.captured_queries))
+
+    def test_safe_delete(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        household = Household.objects.filter(plot=plot).first()
+        report = plot.safe_delete(household)
+        self.assertEqual(report.deleted, [household.pk])
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 1)
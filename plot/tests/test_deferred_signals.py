@@ -0,0 +1,122 @@
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+
+from edc_map.site_mappers import site_mappers
+
+from household.models import Household
+
+from ..constants import ACCESSIBLE, INACCESSIBLE
+from ..deferred_signals import defer_plot_signals, deferred_plot_signals
+from ..mommy_recipes import fake
+from ..models import Plot, PlotLog, PlotLogEntry
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('deferred')
+class TestDeferredSignals(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_defers_plot_log_creation(self):
+        with defer_plot_signals():
+            plots = [mommy.make_recipe('plot.plot', ess=True) for _ in range(5)]
+            self.assertEqual(PlotLog.objects.all().count(), 0)
+        self.assertFalse(deferred_plot_signals.active)
+        for plot in plots:
+            plot = Plot.objects.get(pk=plot.pk)
+            self.assertEqual(
+                PlotLogEntry.objects.filter(
+                    plot_log__plot=plot, log_status=ACCESSIBLE).count(), 1)
+            self.assertEqual(plot.access_attempts, 1)
+            self.assertTrue(plot.accessible)
+
+    def test_deferred_log_entries_applied_in_order(self):
+        plot = self.plot_helper.make_confirmed_plot()
+        with defer_plot_signals():
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=INACCESSIBLE)
+            self.assertTrue(Plot.objects.get(pk=plot.pk).accessible)
+        plot = Plot.objects.get(pk=plot.pk)
+        self.assertFalse(plot.accessible)
+        self.assertIsNone(plot.gps_confirmed_latitude)
+        self.assertFalse(plot.confirmed)
+        self.assertEqual(plot.access_attempts, 2)
+
+    def test_deferred_delete(self):
+        plot = self.plot_helper.make_confirmed_plot()
+        with defer_plot_signals():
+            PlotLogEntry.objects.filter(plot_log__plot=plot).delete()
+        plot = Plot.objects.get(pk=plot.pk)
+        self.assertEqual(plot.access_attempts, 0)
+        self.assertTrue(plot.accessible)
+
+    def test_same_as_undeferred(self):
+        plot = mommy.make_recipe('plot.plot', ess=True)
+        with defer_plot_signals():
+            deferred_plot = mommy.make_recipe('plot.plot', ess=True)
+        plot = Plot.objects.get(pk=plot.pk)
+        deferred_plot = Plot.objects.get(pk=deferred_plot.pk)
+        for field in ['access_attempts', 'accessible', 'household_count']:
+            self.assertEqual(getattr(plot, field), getattr(deferred_plot, field))
+
+    def test_exception_discards(self):
+        try:
+            with defer_plot_signals():
+                mommy.make_recipe('plot.plot', ess=True)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(deferred_plot_signals.pending)
+        self.assertEqual(PlotLog.objects.all().count(), 0)
+
+    def test_deleted_plot_log_skipped(self):
+        plot = self.plot_helper.make_plot()
+        self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        other_plot = self.plot_helper.make_plot()
+        with defer_plot_signals():
+            self.plot_helper.add_plot_log_entry(plot=other_plot, log_status=ACCESSIBLE)
+            PlotLogEntry.objects.filter(plot_log__plot=plot).delete()
+            PlotLog.objects.filter(plot=plot).delete()
+            Plot.objects.filter(pk=plot.pk).delete()
+        self.assertFalse(Plot.objects.filter(pk=plot.pk).exists())
+        self.assertEqual(Plot.objects.get(pk=other_plot.pk).access_attempts, 1)
+
+    def test_access_attempts_written_as_difference(self):
+        plot = self.plot_helper.make_plot()
+        with defer_plot_signals():
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+            with CaptureQueriesContext(connection) as context:
+                deferred_plot_signals.process()
+        self.assertEqual(Plot.objects.get(pk=plot.pk).access_attempts, 1)
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')
+                   and '"access_attempts" = ("' in query['sql'].replace('`', '"')]
+        self.assertTrue(updates)
+
+    def test_households_reconciled_in_bulk(self):
+        plots = [self.plot_helper.make_plot() for _ in range(5)]
+        for plot in plots:
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        plots = [Plot.objects.get(pk=plot.pk) for plot in plots]
+        table = connection.ops.quote_name(Household._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            with defer_plot_signals():
+                for plot in plots:
+                    plot.gps_confirmed_latitude = fake.confirmed_latitude()
+                    plot.gps_confirmed_longitude = fake.confirmed_longitude()
+                    plot.household_count = 2
+                    plot.save()
+        for plot in plots:
+            self.assertEqual(Household.objects.filter(plot=plot).count(), 2)
+        inserts = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith(f'INSERT INTO {table}')]
+        self.assertEqual(len(inserts), 1)
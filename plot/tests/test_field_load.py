@@ -0,0 +1,100 @@
+from django.apps import apps as django_apps
+from django.db.models import Count
+from django.test import TestCase, tag
+
+from edc_device.constants import CENTRAL_SERVER
+from edc_map.site_mappers import site_mappers
+
+from household.models import Household
+
+from ..constants import INACCESSIBLE
+from ..field_load import FieldLoadError, FieldLoadGenerator
+from ..models import Plot, PlotLog, PlotLogEntry, PlotSummary
+from .mappers import TestPlotMapper
+
+
+@tag('field_load')
+class TestFieldLoad(TestCase):
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        django_apps.app_configs['edc_device'].device_role = CENTRAL_SERVER
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def generate(self, **options):
+        options.setdefault('map_areas', ['test_community'])
+        options.setdefault('seed', 1234)
+        return FieldLoadGenerator(**options).run()
+
+    def test_creates_rows(self):
+        generator = self.generate(plots=50, log_entries=80, batch_size=20)
+        self.assertEqual(Plot.objects.all().count(), 50)
+        self.assertEqual(PlotLog.objects.all().count(), 50)
+        self.assertEqual(PlotLogEntry.objects.all().count(), 80)
+        self.assertEqual(Plot.history.all().count(), 50)
+        self.assertEqual(PlotLogEntry.history.all().count(), 80)
+        self.assertEqual(generator.created['plots'], 50)
+        self.assertEqual(generator.created['log_entries'], 80)
+        self.assertEqual(
+            Household.objects.all().count(), generator.created['households'])
+
+    def test_derived_fields(self):
+        self.generate(plots=50, log_entries=80, confirmed=1.0)
+        for plot_log in PlotLog.objects.select_related('plot'):
+            entries = list(PlotLogEntry.objects.filter(
+                plot_log=plot_log).order_by('report_datetime'))
+            plot = plot_log.plot
+            self.assertEqual(plot_log.entry_count, len(entries))
+            self.assertEqual(plot.access_attempts, len(entries))
+            if entries:
+                self.assertEqual(plot_log.last_log_status, entries[-1].log_status)
+                self.assertEqual(
+                    plot.accessible, entries[-1].log_status != INACCESSIBLE)
+                self.assertEqual(plot.confirmed, plot.accessible)
+                self.assertEqual(plot.location_name, 'plot')
+            else:
+                self.assertTrue(plot.accessible)
+                self.assertFalse(plot.confirmed)
+            self.assertEqual(
+                Household.objects.filter(plot=plot).count(), plot.household_count)
+            self.assertEqual(plot.confirmed, plot.household_count > 0)
+
+    def test_plot_summary(self):
+        self.generate(plots=50, log_entries=80)
+        summary = PlotSummary.objects.get(map_area='test_community', section='')
+        self.assertEqual(summary.plots, 50)
+        self.assertEqual(
+            summary.confirmed, Plot.objects.filter(confirmed=True).count())
+        self.assertEqual(
+            summary.inaccessible, Plot.objects.filter(accessible=False).count())
+
+    def test_seed(self):
+        self.generate(plots=20, log_entries=30, max_household_count=0)
+        first = list(Plot.objects.order_by('gps_target_lat').values_list(
+            'gps_target_lat', 'access_attempts', 'household_count'))
+        entries = list(PlotLogEntry.objects.order_by('report_datetime').values_list(
+            'log_status', flat=True))
+        PlotLogEntry.objects.all().delete()
+        PlotLog.objects.all().delete()
+        Plot.objects.all().delete()
+        self.generate(plots=20, log_entries=30, max_household_count=0)
+        self.assertEqual(first, list(Plot.objects.order_by('gps_target_lat').values_list(
+            'gps_target_lat', 'access_attempts', 'household_count')))
+        self.assertEqual(entries, list(PlotLogEntry.objects.order_by(
+            'report_datetime').values_list('log_status', flat=True)))
+
+    def test_unique_log_entries(self):
+        self.generate(plots=2, log_entries=200)
+        self.assertFalse(PlotLogEntry.objects.values(
+            'plot_log', 'report_datetime').annotate(
+                count=Count('pk')).filter(count__gt=1).exists())
+
+    def test_invalid_options(self):
+        self.assertRaises(
+            FieldLoadError, FieldLoadGenerator, map_areas=['blahblah'], seed=1)
+        self.assertRaises(FieldLoadError, FieldLoadGenerator, seed=None)
+        self.assertRaises(FieldLoadError, FieldLoadGenerator, seed=1, confirmed=2)
+        self.assertRaises(
+            FieldLoadError, FieldLoadGenerator, seed=1, max_household_count=10)
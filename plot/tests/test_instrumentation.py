@@ -0,0 +1,122 @@
+import json
+
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..constants import ACCESSIBLE
+from ..instrumentation import InstrumentationRegistry, instrumentation, measure_stage
+from ..models import Plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('instrumentation')
+class TestInstrumentation(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        instrumentation.reset()
+        instrumentation.enabled = True
+
+    def tearDown(self):
+        instrumentation.enabled = False
+        instrumentation.reset()
+        instrumentation.reset_collected()
+
+    def stages(self):
+        return {summary['stage']: summary for summary in instrumentation.summaries()}
+
+    def test_percentiles(self):
+        registry = InstrumentationRegistry()
+        for ms in range(1, 101):
+            registry.record('stage', ms / 1000)
+        summary = registry.summaries()[0]
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50'], 0.050)
+        self.assertAlmostEqual(summary['p95'], 0.095)
+        self.assertAlmostEqual(summary['p99'], 0.099)
+        self.assertIsNone(summary['queries'])
+
+    def test_samples_bounded(self):
+        registry = InstrumentationRegistry()
+        registry.sample_size = 10
+        for ms in range(100):
+            registry.record('stage', ms / 1000)
+        self.assertEqual(registry.stages['stage'].count, 100)
+        self.assertEqual(len(registry.stages['stage'].samples), 10)
+
+    def test_disabled_records_nothing(self):
+        instrumentation.enabled = False
+        self.plot_helper.make_confirmed_plot(household_count=2)
+        with measure_stage('test'):
+            pass
+        self.assertEqual(instrumentation.summaries(), [])
+
+    def test_plot_save_stages(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        plot = Plot.objects.get(pk=plot.pk)
+        plot.household_count = 1
+        plot.save()
+        stages = self.stages()
+        for stage in ['plot.save', 'plot.write', 'plot.update_derived_fields',
+                      'plot.common_clean', 'plot.allocate_plot_identifier',
+                      'households.delete_surplus_households',
+                      'households.create_households',
+                      'history.create_historical_record',
+                      'signals.plot_creates_households_on_post_save']:
+            with self.subTest(stage=stage):
+                self.assertIn(stage, stages)
+                self.assertGreater(stages[stage]['count'], 0)
+
+    def test_exception_recorded(self):
+        with self.assertRaises(ValueError):
+            with measure_stage('test'):
+                raise ValueError
+        self.assertEqual(self.stages()['test']['count'], 1)
+
+    def test_collected_merges_processes(self):
+        registry = InstrumentationRegistry()
+        registry.cache_prefix = 'test.instrumentation'
+        registry.record('stage', 0.001)
+        registry.publish()
+        other = InstrumentationRegistry()
+        other.cache_prefix = registry.cache_prefix
+        other.process = 'other:1'
+        other.record('stage', 0.003)
+        other.publish()
+        summary = registry.collected()[0]
+        self.assertEqual(summary['count'], 2)
+        self.assertAlmostEqual(summary['p99'], 0.003)
+        registry.reset_collected()
+        self.assertEqual(registry.collected(), [])
+
+    def test_plot_stats_command(self):
+        self.plot_helper.make_confirmed_plot(household_count=2)
+        instrumentation.publish()
+        out = StringIO()
+        call_command('plot_stats', '--json', '--reset', stdout=out)
+        stages = {summary['stage']: summary for summary in json.loads(out.getvalue())}
+        self.assertIn('plot.save', stages)
+        self.assertEqual(instrumentation.summaries(), [])
+        self.assertEqual(instrumentation.collected(), [])
+        out = StringIO()
+        call_command('plot_stats', stdout=out)
+        self.assertIn('No stages recorded', out.getvalue())
+
+    def test_plot_stats_queries_not_logged(self):
+        instrumentation.record('stage', 0.001)
+        instrumentation.publish()
+        out = StringIO()
+        call_command('plot_stats', stdout=out)
+        self.assertIn('n/a', out.getvalue())
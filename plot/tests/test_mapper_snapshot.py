@@ -0,0 +1,55 @@
+from django.test import TestCase, tag
+
+from edc_map.exceptions import MapperError
+from edc_map.site_mappers import site_mappers
+
+from ..mapper_snapshot import site_mapper_snapshot
+from .mappers import TestPlotMapper
+
+
+class TestPlotMapper2(TestPlotMapper):
+
+    map_area = 'test_community2'
+    map_code = '02'
+
+
+@tag('snapshot')
+class TestMapperSnapshot(TestCase):
+
+    def setUp(self):
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_snapshot(self):
+        snapshot = site_mapper_snapshot.get()
+        self.assertEqual(snapshot.map_areas, frozenset(['test_community']))
+        mapper = snapshot.get_mapper('test_community')
+        self.assertEqual(mapper.map_code, '01')
+        self.assertEqual(mapper.center_lat, TestPlotMapper.center_lat)
+        self.assertEqual(mapper.radius, TestPlotMapper.radius)
+
+    def test_snapshot_reused(self):
+        self.assertIs(site_mapper_snapshot.get(), site_mapper_snapshot.get())
+
+    def test_snapshot_immutable(self):
+        snapshot = site_mapper_snapshot.get()
+        self.assertRaises(AttributeError, setattr, snapshot, 'map_areas', None)
+        self.assertRaises(
+            TypeError, snapshot.mappers.__setitem__, 'test_community', None)
+
+    def test_invalidated_on_register(self):
+        snapshot = site_mapper_snapshot.get()
+        site_mappers.register(TestPlotMapper2)
+        self.assertIsNot(site_mapper_snapshot.get(), snapshot)
+        self.assertIn('test_community2', site_mapper_snapshot.get().map_areas)
+
+    def test_invalidated_on_new_registry(self):
+        site_mappers.registry = {}
+        site_mappers.register(TestPlotMapper2)
+        self.assertEqual(
+            site_mapper_snapshot.get().map_areas, frozenset(['test_community2']))
+
+    def test_invalid_map_area(self):
+        self.assertRaises(
+            MapperError, site_mapper_snapshot.get().get_mapper, 'blahblah')
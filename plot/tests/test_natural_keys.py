@@ -1,11 +1,26 @@
+import json
+import os
+import tempfile
+
+from datetime import timedelta
+
 from django.apps import apps as django_apps
+from django.core import serializers
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
 
+from edc_map.site_mappers import site_mappers
 from edc_sync.models import OutgoingTransaction
 from edc_sync.tests import SyncTestHelper
 from survey.tests import SurveyTestHelper
 
+from ..models import Plot, PlotLog, PlotLogEntry
+from ..natural_key_cache import prefetch_natural_keys
+from ..serializers import prefetch_payloads
 from ..sync_models import sync_models
+from .mappers import TestPlotMapper
 from .plot_test_helper import PlotTestHelper
 
 
@@ -43,3 +58,115 @@ class TestNaturalKey(TestCase):
         completed_model_objs.update({'plot': model_objs})
         self.sync_helper.sync_test_natural_keys(
             completed_model_objs, verbose=verbose)
+
+
+@tag('natural_keys')
+class TestGetByNaturalKeys(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.plots = [self.plot_helper.make_plot() for _ in range(5)]
+        for plot in self.plots:
+            for days in range(3):
+                self.plot_helper.add_plot_log_entry(
+                    plot=plot, report_datetime=plot.report_datetime - timedelta(days=days + 1))
+
+    def test_get_by_natural_keys(self):
+        for model_cls in [Plot, PlotLog, PlotLogEntry]:
+            with self.subTest(model=model_cls):
+                natural_keys = [obj.natural_key() for obj in model_cls.objects.all()]
+                with self.assertNumQueries(1):
+                    objs = model_cls.objects.get_by_natural_keys(
+                        natural_keys + [natural_keys[0]])
+                self.assertEqual(sorted(objs, key=str), sorted(natural_keys, key=str))
+                for natural_key, obj in objs.items():
+                    self.assertEqual(obj.natural_key(), natural_key)
+
+    def test_get_by_natural_keys_missing(self):
+        objs = Plot.objects.get_by_natural_keys(
+            [('erik', ), self.plots[0].natural_key()])
+        self.assertEqual(list(objs), [self.plots[0].natural_key()])
+
+    def test_get_by_natural_keys_chunks(self):
+        natural_keys = [obj.natural_key() for obj in PlotLogEntry.objects.all()]
+        PlotLogEntry.objects.natural_keys_chunk_size = 4
+        try:
+            with self.assertNumQueries(4):
+                objs = PlotLogEntry.objects.get_by_natural_keys(natural_keys)
+        finally:
+            del PlotLogEntry.objects.natural_keys_chunk_size
+        self.assertEqual(len(objs), 15)
+
+    def test_prefetched_get_by_natural_key(self):
+        objects = json.loads(serializers.serialize(
+            'json', PlotLogEntry.objects.all(), use_natural_foreign_keys=True,
+            use_natural_primary_keys=True))
+        objects.append({'model': 'plot.plotlogentry', 'fields': {
+            'plot_log': ['erik'], 'report_datetime': objects[0]['fields']['report_datetime']}})
+        with prefetch_natural_keys(objects):
+            with self.assertNumQueries(0):
+                plot_log = PlotLog.objects.get_by_natural_key(self.plots[0].plot_identifier)
+                self.assertEqual(plot_log.plot_id, self.plots[0].pk)
+                self.assertRaises(
+                    PlotLog.DoesNotExist, PlotLog.objects.get_by_natural_key, 'erik')
+        with self.assertNumQueries(1):
+            PlotLog.objects.get_by_natural_key(self.plots[0].plot_identifier)
+
+    def test_deserialize_fixture(self):
+        """Asserts loading entries with natural keys does not query
+        per entry.
+        """
+        fixture = serializers.serialize(
+            'json', PlotLogEntry.objects.all(), use_natural_foreign_keys=True,
+            use_natural_primary_keys=True)
+        for entry in PlotLogEntry.objects.filter(plot_log__plot__in=self.plots[:2]):
+            entry.delete()
+        with CaptureQueriesContext(connection) as context:
+            for obj in serializers.deserialize('plot_json', fixture):
+                obj.save()
+        selects = [query for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 5)
+        self.assertEqual(PlotLogEntry.objects.all().count(), 15)
+
+    def test_sync_payloads(self):
+        """Asserts deserializing a batch of edc_sync style payloads,
+        one object each, as json does not query per payload.
+        """
+        payloads = [
+            serializers.serialize(
+                'json', [entry], ensure_ascii=True, use_natural_foreign_keys=True,
+                use_natural_primary_keys=False)
+            for entry in PlotLogEntry.objects.all()]
+        with CaptureQueriesContext(connection) as context:
+            with prefetch_payloads(payloads):
+                for payload in payloads:
+                    for obj in serializers.deserialize('json', payload):
+                        self.assertIsInstance(obj.object, PlotLogEntry)
+        selects = [query for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 2)
+
+    def test_loaddata(self):
+        """Asserts loaddata of a .plot_json fixture uses
+        plot.serializers.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'entries.plot_json')
+            call_command(
+                'dumpdata', 'plot.plotlogentry', format='plot_json',
+                use_natural_foreign_keys=True, use_natural_primary_keys=True,
+                output=path, verbosity=0)
+            for entry in PlotLogEntry.objects.filter(plot_log__plot__in=self.plots[:2]):
+                entry.delete()
+            with CaptureQueriesContext(connection) as context:
+                call_command('loaddata', path, verbosity=0)
+        selects = [query for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 5)
+        self.assertEqual(PlotLogEntry.objects.all().count(), 15)
@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from edc_map.site_mappers import site_mappers
+from model_mommy import mommy
+
+from ..admin_site import plot_admin
+from ..modeladmin_mixins import AFTER_VAR
+from ..models import Plot
+from ..paginators import KeysetPaginator
+from .mappers import TestPlotMapper
+
+
+@tag('paginators')
+class TestKeysetPaginator(TestCase):
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        mommy.make_recipe('plot.plot', _quantity=25)
+
+    def pks(self, page):
+        return [obj.pk for obj in page.object_list]
+
+    def test_pages_match_default(self):
+        queryset = Plot.objects.order_by('-plot_identifier', '-pk')
+        paginator = Paginator(queryset, 10)
+        keyset_paginator = KeysetPaginator(queryset, 10)
+        self.assertEqual(keyset_paginator.key, ('plot_identifier', True))
+        self.assertEqual(keyset_paginator.count, 25)
+        for number in paginator.page_range:
+            with self.subTest(number=number):
+                self.assertEqual(
+                    self.pks(keyset_paginator.page(number)),
+                    self.pks(paginator.page(number)))
+
+    def test_ascending_and_pk(self):
+        for ordering in ['plot_identifier', 'pk', '-pk']:
+            with self.subTest(ordering=ordering):
+                queryset = Plot.objects.order_by(ordering)
+                self.assertEqual(
+                    self.pks(KeysetPaginator(queryset, 10).page(3)),
+                    self.pks(Paginator(queryset, 10).page(3)))
+
+    def test_page_after(self):
+        queryset = Plot.objects.order_by('-plot_identifier')
+        paginator = KeysetPaginator(queryset, 10)
+        last = list(paginator.page(1).object_list)[-1]
+        self.assertEqual(
+            [obj.pk for obj in paginator.page_after(last.plot_identifier)],
+            self.pks(Paginator(queryset, 10).page(2)))
+
+    def test_page_with_after(self):
+        queryset = Plot.objects.order_by('-plot_identifier')
+        last = KeysetPaginator(queryset, 10).page(1).object_list[9].plot_identifier
+        paginator = KeysetPaginator(queryset, 10, after=last)
+        with CaptureQueriesContext(connection) as context:
+            pks = self.pks(paginator.page(2))
+        self.assertEqual(pks, self.pks(Paginator(queryset, 10).page(2)))
+        self.assertFalse(
+            [query for query in context.captured_queries if 'OFFSET' in query['sql']])
+
+    def test_page_with_invalid_after(self):
+        queryset = Plot.objects.order_by('-pk')
+        self.assertEqual(
+            self.pks(KeysetPaginator(queryset, 10, after='invalid').page(2)),
+            self.pks(Paginator(queryset, 10).page(2)))
+
+    def test_not_unique_ordering(self):
+        queryset = Plot.objects.order_by('map_area', 'pk')
+        paginator = KeysetPaginator(queryset, 10)
+        self.assertIsNone(paginator.key)
+        self.assertEqual(
+            self.pks(paginator.page(2)), self.pks(Paginator(queryset, 10).page(2)))
+
+    def test_estimated_count(self):
+        queryset = Plot.objects.order_by('-plot_identifier')
+        with patch('plot.paginators.estimated_count', return_value=200000):
+            paginator = KeysetPaginator(queryset, 10)
+            self.assertEqual(paginator.count, 200000)
+            self.assertTrue(paginator.estimated)
+            self.assertEqual(list(paginator.page(100).object_list), [])
+        with patch('plot.paginators.estimated_count', return_value=20):
+            paginator = KeysetPaginator(queryset, 10)
+            self.assertEqual(paginator.count, 25)
+            self.assertRaises(EmptyPage, paginator.page, 100)
+
+
+@tag('paginators')
+class TestKeysetChangeList(TestCase):
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        mommy.make_recipe('plot.plot', _quantity=70)
+        self.user = User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        self.model_admin = plot_admin._registry[Plot]
+
+    def changelist(self, params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        model_admin = self.model_admin
+        ChangeList = model_admin.get_changelist(request)
+        list_display = model_admin.get_list_display(request)
+        return ChangeList(
+            request, model_admin.model, list_display,
+            model_admin.get_list_display_links(request, list_display),
+            model_admin.get_list_filter(request), model_admin.date_hierarchy,
+            model_admin.get_search_fields(request),
+            model_admin.get_list_select_related(request),
+            model_admin.list_per_page, model_admin.list_max_show_all,
+            model_admin.list_editable, model_admin)
+
+    def test_next_page_by_key(self):
+        changelist = self.changelist({})
+        query_string = changelist.get_query_string({'p': 1})
+        self.assertIn(f'{AFTER_VAR}=', query_string)
+        self.assertNotIn(AFTER_VAR, changelist.get_query_string({'p': 2}))
+        params = dict(
+            param.split('=') for param in query_string.lstrip('?').split('&'))
+        with CaptureQueriesContext(connection) as context:
+            next_changelist = self.changelist(params)
+            rows = [obj.pk for obj in next_changelist.result_list]
+        self.assertFalse(
+            [query for query in context.captured_queries if 'OFFSET' in query['sql']])
+        self.assertEqual(
+            rows, [obj.pk for obj in self.changelist({'p': 1}).result_list])
+        self.assertEqual(
+            rows, [obj.pk for obj in Plot.objects.order_by(
+                '-plot_identifier')[30:60]])
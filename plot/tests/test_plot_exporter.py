@@ -0,0 +1,72 @@
+import csv
+import json
+
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..constants import ACCESSIBLE
+from ..plot_exporter import PlotExporter, PlotExportError
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('export')
+class TestPlotExporter(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        for n in range(5):
+            plot = self.plot_helper.make_plot(cso_number=f'1234{n}')
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+
+    def test_csv_without_encrypted(self):
+        f = StringIO()
+        exporter = PlotExporter(model='plot.plot', chunk_size=2)
+        self.assertEqual(exporter.export(f), 5)
+        f.seek(0)
+        rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 5)
+        self.assertIn('plot_identifier', rows[0])
+        self.assertNotIn('cso_number', rows[0])
+        self.assertNotIn('description', rows[0])
+
+    def test_decrypt(self):
+        f = StringIO()
+        PlotExporter(
+            model='plot.plot', fields=['plot_identifier', 'cso_number'],
+            decrypt=['cso_number']).export(f)
+        f.seek(0)
+        self.assertEqual(
+            sorted(row['cso_number'] for row in csv.DictReader(f)),
+            [f'1234{n}' for n in range(5)])
+
+    def test_encrypted_requires_decrypt(self):
+        self.assertRaises(
+            PlotExportError, PlotExporter, model='plot.plot', fields=['cso_number'])
+        self.assertRaises(
+            PlotExportError, PlotExporter, model='plot.plot', decrypt=['map_area'])
+
+    def test_jsonl_log_entries(self):
+        f = StringIO()
+        PlotExporter(model='plot.plotlogentry', file_format='jsonl').export(f)
+        rows = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['log_status'], ACCESSIBLE)
+        self.assertIn('plot_log__plot__plot_identifier', rows[0])
+        self.assertNotIn('comment', rows[0])
+
+    def test_map_area(self):
+        f = StringIO()
+        exporter = PlotExporter(model='plot.plotlog', map_area='test_community')
+        self.assertEqual(exporter.export(f), 5)
+        self.assertRaises(
+            PlotExportError, PlotExporter, model='plot.plotlog', map_area='blahblah')
@@ -0,0 +1,114 @@
+from threading import Thread
+
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..models import PlotIdentifierSequence, PlotLog
+from ..plot_identifier_allocator import PlotIdentifierAllocator
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('allocator')
+class TestPlotIdentifierAllocator(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_reserves_block(self):
+        allocator = PlotIdentifierAllocator(block_size=10)
+        self.assertEqual(allocator.reserve('01', 10), range(1, 11))
+        self.assertEqual(allocator.reserve('01', 10), range(11, 21))
+        self.assertEqual(allocator.reserve('02', 10), range(1, 11))
+        self.assertEqual(allocator.reserve('01', 10, device_id='98'), range(1, 11))
+        self.assertEqual(
+            PlotIdentifierSequence.objects.get(
+                map_code='01', device_id='99').last_sequence, 20)
+
+    def test_identifier_format(self):
+        allocator = PlotIdentifierAllocator(block_size=10)
+        identifier = allocator.identifier('01', 1)
+        self.assertTrue(identifier.startswith('019900001-'))
+
+    def test_devices_do_not_share_identifiers(self):
+        allocator = PlotIdentifierAllocator(block_size=10)
+        identifiers = allocator.allocate('01', 3)
+        self.assertFalse(
+            set(identifiers) & set(allocator.allocate('01', 3, device_id='98')))
+
+    def test_allocate_unique(self):
+        allocator = PlotIdentifierAllocator(block_size=3)
+        identifiers = allocator.allocate('01', 10)
+        self.assertEqual(len(set(identifiers)), 10)
+
+    def test_allocate_creates_identifier_models(self):
+        IdentifierModel = django_apps.get_model('edc_identifier', 'identifiermodel')
+        allocator = PlotIdentifierAllocator(block_size=10)
+        identifiers = allocator.allocate('01', 3)
+        self.assertEqual(
+            sorted(IdentifierModel.objects.filter(name='plot_identifier').values_list(
+                'identifier', flat=True)),
+            sorted(identifiers))
+        plot = self.plot_helper.make_plot()
+        self.assertTrue(IdentifierModel.objects.filter(
+            identifier=plot.plot_identifier, model='plot.plot').exists())
+
+    def test_seeds_from_identifier_model(self):
+        plot = self.plot_helper.make_plot()
+        PlotLog.objects.filter(plot=plot).delete()
+        plot.delete()
+        PlotIdentifierSequence.objects.all().delete()
+        allocator = PlotIdentifierAllocator(block_size=5)
+        self.assertNotIn(plot.plot_identifier, allocator.allocate('01', 5))
+
+    def test_allocated_identifier_retried(self):
+        allocator = PlotIdentifierAllocator(block_size=5)
+        identifiers = allocator.allocate('01', 2)
+        # the ledger is lost with sequences of this block in the pool
+        PlotIdentifierSequence.objects.all().delete()
+        allocator.clear()
+        allocator.release_to_pool('01', '99', [1, 2, 3])
+        allocated = allocator.allocate('01', 2)
+        self.assertFalse(set(identifiers) & set(allocated))
+        self.assertEqual(len(set(allocated)), 2)
+
+    def test_plot_save_allocates(self):
+        plot1 = self.plot_helper.make_plot()
+        plot2 = self.plot_helper.make_plot()
+        self.assertNotEqual(plot1.plot_identifier, plot2.plot_identifier)
+        self.assertTrue(plot1.plot_identifier.startswith('01'))
+
+
+@tag('allocator')
+class TestPlotIdentifierAllocatorConcurrency(TransactionTestCase):
+
+    def test_no_duplicates_across_threads(self):
+        allocator = PlotIdentifierAllocator(block_size=7)
+        allocated = []
+        errors = []
+
+        def allocate():
+            try:
+                for _ in range(20):
+                    allocated.extend(allocator.allocate('01', 3))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=allocate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(allocated), 4 * 20 * 3)
+        self.assertEqual(len(set(allocated)), len(allocated))
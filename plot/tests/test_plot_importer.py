@@ -0,0 +1,91 @@
+import json
+
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+
+from edc_device.constants import CENTRAL_SERVER
+from edc_map.site_mappers import site_mappers
+
+from ..constants import ACCESSIBLE
+from ..models import Plot, PlotLog, PlotLogEntry
+from ..plot_importer import PlotImporter, PlotImportError
+from ..plot_importer import read_csv_points, read_geojson_points
+from .mappers import TestPlotMapper
+
+
+@tag('importer')
+class TestPlotImporter(TestCase):
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        django_apps.app_configs['edc_device'].device_role = CENTRAL_SERVER
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.csv = StringIO(
+            'id,latitude,longitude\n'
+            '1,-24.557709,25.807963\n'
+            '2,-24.557719,25.807973\n'
+            '3,-24.557709,25.807963\n'
+            '4,bad,25.807963\n'
+            '5,-24.557729,25.807983\n')
+
+    def test_reads_csv(self):
+        points = list(read_csv_points(self.csv))
+        self.assertEqual(len(points), 5)
+        self.assertEqual(points[0].line_number, 2)
+        self.assertEqual(points[0].latitude, '-24.557709')
+        self.assertEqual(points[0].longitude, '25.807963')
+
+    def test_reads_legacy_csv(self):
+        points = list(read_csv_points(StringIO(
+            'plot,lat_column,lon_column\n1,-24.557709,25.807963\n')))
+        self.assertEqual(points[0].latitude, '-24.557709')
+
+    def test_reads_geojson(self):
+        feature_collection = {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature',
+                 'geometry': {'type': 'Point', 'coordinates': [25.8079 + n / 10000, -24.5577]}}
+                for n in range(10)]}
+        points = list(read_geojson_points(
+            StringIO(json.dumps(feature_collection)), chunk_size=16))
+        self.assertEqual(len(points), 10)
+        self.assertEqual(points[0].latitude, -24.5577)
+        self.assertEqual(points[0].longitude, 25.8079)
+
+    def test_import_creates_plots_logs_and_entries(self):
+        importer = PlotImporter(map_area='test_community', batch_size=2)
+        importer.import_points(read_csv_points(self.csv))
+        self.assertEqual(importer.created, 3)
+        self.assertEqual(Plot.objects.filter(ess=True).count(), 3)
+        self.assertEqual(PlotLog.objects.all().count(), 3)
+        self.assertEqual(
+            PlotLogEntry.objects.filter(log_status=ACCESSIBLE).count(), 3)
+        self.assertEqual(Plot.history.all().count(), 3)
+        for plot in Plot.objects.all():
+            self.assertTrue(plot.plot_identifier)
+            self.assertEqual(plot.access_attempts, 1)
+
+    def test_import_reports_rejected(self):
+        importer = PlotImporter(map_area='test_community')
+        importer.import_points(read_csv_points(self.csv))
+        self.assertEqual(
+            [(r.line_number, r.reason) for r in importer.rejected],
+            [(4, 'duplicate in file'), (5, 'invalid coordinates')])
+
+    def test_import_rejects_existing(self):
+        PlotImporter(map_area='test_community').import_points(
+            read_csv_points(self.csv))
+        self.csv.seek(0)
+        importer = PlotImporter(map_area='test_community')
+        importer.import_points(read_csv_points(self.csv))
+        self.assertEqual(importer.created, 0)
+        self.assertEqual(Plot.objects.all().count(), 3)
+
+    def test_import_invalid_map_area(self):
+        self.assertRaises(
+            PlotImportError, PlotImporter, map_area='blahblah')
@@ -0,0 +1,131 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+from model_mommy import mommy
+
+from edc_map.site_mappers import site_mappers
+
+from ..constants import INACCESSIBLE
+from ..deferred_signals import defer_plot_signals
+from ..models import Plot, PlotSummary
+from ..rss_selection import RssSelection
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('plot_summary')
+class TestPlotSummary(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.map_area = TestPlotMapper.map_area
+
+    def summaries(self):
+        return list(PlotSummary.objects.order_by('map_area', 'section').values_list(
+            'map_area', 'section', 'plots', 'confirmed', 'accessible',
+            'inaccessible', 'enrolled', 'rss', 'htc', 'ess', 'household_count'))
+
+    def assertRebuildEqual(self):
+        """Asserts the incrementally updated summary equals the
+        rebuilt summary, less sections with no plots left.
+        """
+        incremental = [row for row in self.summaries() if any(row[2:])]
+        PlotSummary.objects.rebuild()
+        self.assertEqual(incremental, self.summaries())
+
+    def test_created_plots_counted(self):
+        self.plot_helper.make_plot(section='A')
+        self.plot_helper.make_plot(section='A')
+        self.plot_helper.make_plot(section='B', ess=True)
+        self.assertEqual(
+            PlotSummary.objects.for_section(self.map_area, 'A')['plots'], 2)
+        summary = PlotSummary.objects.for_map_area(self.map_area)
+        self.assertEqual(summary['plots'], 3)
+        self.assertEqual(summary['ess'], 1)
+        self.assertRebuildEqual()
+
+    def test_confirmed_plot_counted(self):
+        self.plot_helper.make_confirmed_plot(household_count=3)
+        summary = PlotSummary.objects.for_map_area(self.map_area)
+        self.assertEqual(summary['confirmed'], 1)
+        self.assertEqual(summary['household_count'], 3)
+        self.assertRebuildEqual()
+
+    def test_inaccessible_log_entry_counted(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        self.plot_helper.add_plot_log_entry(plot=plot, log_status=INACCESSIBLE)
+        summary = PlotSummary.objects.for_map_area(self.map_area)
+        self.assertEqual(summary['inaccessible'], 1)
+        self.assertEqual(summary['confirmed'], 0)
+        self.assertEqual(summary['household_count'], 0)
+        self.assertRebuildEqual()
+
+    def test_saved_plot_not_read_again(self):
+        """Asserts the previous summary values come from the plot as
+        loaded or last saved, not from another SELECT.
+        """
+        plot = Plot.objects.get(pk=self.plot_helper.make_plot(section='A').pk)
+        with patch('plot.signals.plot_summary_values') as plot_summary_values:
+            plot.section = 'B'
+            plot.save()
+            plot.ess = True
+            plot.save()
+        plot_summary_values.assert_not_called()
+        self.assertEqual(
+            PlotSummary.objects.for_section(self.map_area, 'B')['ess'], 1)
+        self.assertRebuildEqual()
+
+    def test_deleted_plot_subtracted(self):
+        plot = self.plot_helper.make_plot()
+        self.plot_helper.make_plot()
+        Plot.objects.get(pk=plot.pk).delete()
+        self.assertEqual(
+            PlotSummary.objects.for_map_area(self.map_area)['plots'], 1)
+        self.assertRebuildEqual()
+
+    def test_deferred_plots_counted(self):
+        with defer_plot_signals():
+            for _ in range(5):
+                mommy.make_recipe('plot.plot', ess=True)
+        summary = PlotSummary.objects.for_map_area(self.map_area)
+        self.assertEqual(summary['plots'], 5)
+        self.assertEqual(summary['ess'], 5)
+        self.assertRebuildEqual()
+
+    def test_rss_selection_counted(self):
+        for _ in range(20):
+            self.plot_helper.make_plot()
+        RssSelection(map_area=self.map_area, seed=1234).run()
+        self.assertEqual(
+            PlotSummary.objects.for_map_area(self.map_area)['rss'],
+            Plot.objects.filter(rss=True).count())
+        self.assertRebuildEqual()
+
+    def test_read_is_one_query(self):
+        for n in range(10):
+            self.plot_helper.make_plot(section='A' if n % 2 else 'B')
+        with self.assertNumQueries(1):
+            PlotSummary.objects.for_map_area(self.map_area)
+
+    def test_unknown_map_area_is_zero(self):
+        self.assertEqual(
+            PlotSummary.objects.for_map_area('erik')['plots'], 0)
+        self.assertEqual(
+            PlotSummary.objects.for_section('erik', 'A')['plots'], 0)
+
+    def test_command(self):
+        self.plot_helper.make_plot()
+        PlotSummary.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_plot_summary', stdout=out)
+        self.assertIn('Rebuilt 1 plot summaries', out.getvalue())
+        self.assertEqual(
+            PlotSummary.objects.for_map_area(self.map_area)['plots'], 1)
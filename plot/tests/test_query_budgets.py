@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from edc_map.site_mappers import site_mappers
+
+from household.models import Household
+
+from ..constants import ACCESSIBLE, INACCESSIBLE
+from ..history import send_post_save
+from ..models import Plot
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('query_budgets')
+class TestQueryBudgets(TestCase):
+
+    """Asserts each plot workflow writes the plot row once and stays
+    within its query budget.
+
+    Each budget is the query count of the workflow plus a small margin.
+    Raise a budget only with a reason, budgets include the
+    historical records, households and sync transactions written
+    by each workflow.
+    """
+
+    plot_helper = PlotTestHelper()
+
+    budgets = {
+        'confirm': 40,
+        'change_household_count': 35,
+        'accessible_log_entry': 18,
+        'inaccessible_log_entry': 18,
+    }
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.plot = self.plot_helper.make_plot()
+        self.plot_helper.add_plot_log_entry(plot=self.plot, log_status=ACCESSIBLE)
+
+    def assertWorkflow(self, name, func):
+        table = connection.ops.quote_name(Plot._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            func()
+        writes = [query['sql'] for query in context.captured_queries
+                  if query['sql'].startswith((f'UPDATE {table} ', f'INSERT INTO {table} '))]
+        self.assertEqual(len(writes), 1, msg=f'{name}: {writes}')
+        self.assertLessEqual(
+            len(context.captured_queries), self.budgets[name],
+            msg=f'{name}: {len(context.captured_queries)} queries')
+
+    def confirm(self, household_count=3):
+        return self.plot_helper.confirm_plot(
+            Plot.objects.get(pk=self.plot.pk), household_count=household_count)
+
+    def test_confirm(self):
+        self.assertWorkflow('confirm', self.confirm)
+        self.assertEqual(Household.objects.filter(plot=self.plot).count(), 3)
+
+    def plot_queries(self, household_count):
+        """Returns the number of queries to confirm a new plot with
+        household_count households, less those of the receivers of
+        each new household's post_save, which are the household
+        app's.
+        """
+        receiver_queries = []
+
+        def send_household_post_save(*args, **kwargs):
+            with CaptureQueriesContext(connection) as context:
+                send_post_save(*args, **kwargs)
+            receiver_queries.append(len(context.captured_queries))
+
+        self.plot = self.plot_helper.make_plot()
+        self.plot_helper.add_plot_log_entry(plot=self.plot, log_status=ACCESSIBLE)
+        with patch('plot.model_mixins.create_households_model_mixin.send_post_save',
+                   side_effect=send_household_post_save):
+            with CaptureQueriesContext(connection) as context:
+                self.confirm(household_count=household_count)
+        return len(context.captured_queries) - sum(receiver_queries)
+
+    def test_confirm_constant_in_household_count(self):
+        self.assertEqual(self.plot_queries(1), self.plot_queries(9))
+
+    def test_change_household_count(self):
+        self.confirm()
+        plot = Plot.objects.get(pk=self.plot.pk)
+        plot.household_count = 1
+        self.assertWorkflow('change_household_count', plot.save)
+        self.assertEqual(Household.objects.filter(plot=self.plot).count(), 1)
+        self.assertEqual(Plot.objects.get(pk=self.plot.pk).household_count, 1)
+
+    def test_accessible_log_entry(self):
+        self.confirm()
+        self.assertWorkflow('accessible_log_entry', lambda: (
+            self.plot_helper.add_plot_log_entry(plot=self.plot, log_status=ACCESSIBLE)))
+
+    def test_inaccessible_log_entry(self):
+        self.assertWorkflow('inaccessible_log_entry', lambda: (
+            self.plot_helper.add_plot_log_entry(plot=self.plot, log_status=INACCESSIBLE)))
+        self.assertFalse(Plot.objects.get(pk=self.plot.pk).accessible)
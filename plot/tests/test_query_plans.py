@@ -0,0 +1,126 @@
+import json
+
+from unittest import SkipTest
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.client import RequestFactory
+
+from edc_map.site_mappers import site_mappers
+from model_mommy import mommy
+
+from ..admin_site import plot_admin
+from ..constants import RESIDENTIAL_HABITABLE, TWENTY_PERCENT
+from ..models import Plot
+from .mappers import TestPlotMapper
+
+
+def explain(queryset):
+    """Returns a list of (table, detail, scan) for the query plan
+    of the queryset, where scan is True for a full table or index
+    scan.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = []
+            for row in cursor.fetchall():
+                detail = row[-1]
+                words = detail.split()
+                table = words[2] if words[1] == 'TABLE' else words[1]
+                plan.append((table, detail, words[0] == 'SCAN'))
+            return plan
+        elif connection.vendor == 'postgresql':
+            # the test tables are small enough that a Seq Scan is
+            # cheapest, so only use one where no index applies
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return list(postgresql_nodes(plan[0]['Plan']))
+        elif connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            return [(row[columns.index('table')], str(row),
+                     row[columns.index('type')] in ['ALL', 'index'])
+                    for row in cursor.fetchall()]
+    raise SkipTest(f'Query plans not supported for {connection.vendor}.')
+
+
+def postgresql_nodes(node):
+    """Yields (table, detail, scan) for each node of a PostgreSQL
+    JSON plan that reads a table, where scan is True for a Seq Scan.
+    """
+    if 'Relation Name' in node:
+        yield (node['Relation Name'], f'{node["Node Type"]} on {node["Relation Name"]}',
+               node['Node Type'] == 'Seq Scan')
+    for child in node.get('Plans', []):
+        yield from postgresql_nodes(child)
+
+
+@tag('query_plans')
+class TestQueryPlans(TestCase):
+
+    """Asserts the PlotAdmin changelist filters for the common
+    access patterns are answered with an index.
+    """
+
+    filters = [
+        {'map_area': 'test_community'},
+        {'map_area': 'test_community', 'status__exact': RESIDENTIAL_HABITABLE},
+        {'map_area': 'test_community', 'enrolled__exact': '1'},
+        {'map_area': 'test_community', 'accessible__exact': '0'},
+        {'map_area': 'test_community', 'confirmed__exact': '1'},
+        {'map_area': 'test_community', 'rss__exact': '1'},
+        {'map_area': 'test_community', 'selected__exact': TWENTY_PERCENT},
+        {'map_area': 'test_community', 'ess__exact': '1'},
+        {'map_area': 'test_community', 'ess__exact': '0', 'htc__exact': '0'},
+        {'map_area': 'test_community', 'access_attempts': '2'},
+        {'section': 'A'},
+        {'section': 'A', 'sub_section': '1'},
+    ]
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        mommy.make_recipe('plot.plot', _quantity=50, section='A', sub_section='1')
+        mommy.make_recipe('plot.plot', _quantity=50, section='B', sub_section='2')
+        self.user = User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        self.model_admin = plot_admin._registry[Plot]
+
+    def changelist_queryset(self, params):
+        """Returns the queryset of a changelist page as
+        PlotAdmin.changelist_view would.
+        """
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        model_admin = self.model_admin
+        ChangeList = model_admin.get_changelist(request)
+        list_display = model_admin.get_list_display(request)
+        changelist = ChangeList(
+            request, model_admin.model, list_display,
+            model_admin.get_list_display_links(request, list_display),
+            model_admin.get_list_filter(request), model_admin.date_hierarchy,
+            model_admin.get_search_fields(request),
+            model_admin.get_list_select_related(request),
+            model_admin.list_per_page, model_admin.list_max_show_all,
+            model_admin.list_editable, model_admin)
+        return changelist.queryset[:model_admin.list_per_page]
+
+    def test_changelist_filters_use_index(self):
+        for params in self.filters:
+            with self.subTest(params=params):
+                queryset = self.changelist_queryset(params)
+                scans = [detail for table, detail, scan in explain(queryset)
+                         if scan and table == Plot._meta.db_table]
+                self.assertEqual(scans, [], msg=f'{params}: {explain(queryset)}')
+
+    def test_scan_detected(self):
+        queryset = Plot.objects.filter(eligible_members=1)
+        self.assertTrue(
+            [scan for table, detail, scan in explain(queryset) if scan])
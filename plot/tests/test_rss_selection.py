@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..constants import TWENTY_PERCENT, FIVE_PERCENT
+from ..models import Plot
+from ..rss_selection import RssSelection, RssSelectionError
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('rss')
+class TestRssSelection(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        for n in range(40):
+            self.plot_helper.make_plot(section='A' if n < 20 else 'B')
+        self.ess_plot = self.plot_helper.make_plot(ess=True)
+
+    def selected(self):
+        return dict(Plot.objects.values_list('pk', 'selected'))
+
+    def test_selects_proportions(self):
+        RssSelection(map_area='test_community', seed=1).run()
+        self.assertEqual(Plot.objects.filter(selected=TWENTY_PERCENT).count(), 8)
+        self.assertEqual(Plot.objects.filter(selected=FIVE_PERCENT).count(), 2)
+        self.assertEqual(Plot.objects.filter(rss=True).count(), 10)
+        self.assertIsNone(Plot.objects.get(pk=self.ess_plot.pk).selected)
+
+    def test_by_section(self):
+        selection = RssSelection(
+            map_area='test_community', seed=1, by_section=True).run()
+        self.assertEqual(list(selection.strata), ['A', 'B'])
+        for section in ['A', 'B']:
+            self.assertEqual(Plot.objects.filter(
+                section=section, selected=TWENTY_PERCENT).count(), 4)
+            self.assertEqual(Plot.objects.filter(
+                section=section, selected=FIVE_PERCENT).count(), 1)
+
+    def test_rerun_is_exact(self):
+        selection = RssSelection(map_area='test_community', seed=1).run()
+        selected = self.selected()
+        RssSelection(map_area='test_community', seed=2).run()
+        self.assertNotEqual(self.selected(), selected)
+        rerun = RssSelection(map_area='test_community', seed=1).run()
+        self.assertEqual(self.selected(), selected)
+        self.assertEqual(rerun.digest, selection.digest)
+        self.assertEqual(
+            RssSelection(map_area='test_community', seed=1).run().changed, 0)
+
+    def test_dry_run(self):
+        selection = RssSelection(map_area='test_community', seed=1).run(dry_run=True)
+        self.assertEqual(selection.changed, 10)
+        self.assertFalse(Plot.objects.filter(rss=True).exists())
+
+    def test_history(self):
+        count = Plot.history.all().count()
+        RssSelection(map_area='test_community', seed=1).run()
+        self.assertEqual(Plot.history.all().count(), count + 10)
+
+    def test_enrolled_not_changed(self):
+        RssSelection(map_area='test_community', seed=1).run()
+        Plot.objects.filter(selected=TWENTY_PERCENT).update(enrolled=True)
+        self.assertRaises(
+            RssSelectionError,
+            RssSelection(map_area='test_community', seed=2).run)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('select_rss_plots', 'test_community', '1', stdout=out)
+        self.assertIn('Changed 10 plots', out.getvalue())
@@ -0,0 +1,186 @@
+from datetime import timedelta
+from io import StringIO
+from threading import Thread
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, tag
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from edc_base.model_managers import HistoricalRecords
+
+from edc_map.site_mappers import site_mappers
+
+from household.models import Household
+
+from ..constants import ACCESSIBLE, INACCESSIBLE
+from ..deferred_signals import defer_plot_signals
+from ..models import Plot, PlotLog, PlotLogEntry
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('signals')
+class TestPlotLogEntrySignals(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_access_attempts_incremented_in_database(self):
+        plot = self.plot_helper.make_plot()
+        for _ in range(3):
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        self.assertEqual(Plot.objects.get(pk=plot.pk).access_attempts, 3)
+
+    def test_accessible_entry_does_not_touch_households(self):
+        plot = self.plot_helper.make_confirmed_plot(household_count=2)
+        table = connection.ops.quote_name(Household._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        self.assertFalse(
+            [q for q in context.captured_queries if table in q['sql']])
+        self.assertEqual(Household.objects.filter(plot=plot).count(), 2)
+
+    def test_history_written_for_update(self):
+        plot = self.plot_helper.make_plot()
+        count = Plot.history.filter(id=plot.pk).count()
+        self.plot_helper.add_plot_log_entry(plot=plot, log_status=ACCESSIBLE)
+        self.assertEqual(Plot.history.filter(id=plot.pk).count(), count + 1)
+        self.assertEqual(
+            Plot.history.filter(id=plot.pk).order_by(
+                '-history_date').first().access_attempts, 1)
+
+    def test_history_user_for_update(self):
+        plot = self.plot_helper.make_plot()
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_user('erik', 'erik@example.com', 'pass')
+        HistoricalRecords.thread.request = request
+        self.addCleanup(delattr, HistoricalRecords.thread, 'request')
+        self.plot_helper.add_plot_log_entry(plot=plot, log_status=INACCESSIBLE)
+        self.assertEqual(
+            Plot.history.filter(id=plot.pk).order_by(
+                '-history_date').first().history_user, request.user)
+
+    def test_plot_read_once(self):
+        plot = self.plot_helper.make_plot()
+        table = connection.ops.quote_name(Plot._meta.db_table)
+        join = connection.ops.quote_name(PlotLog._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            self.plot_helper.add_plot_log_entry(plot=plot, log_status=INACCESSIBLE)
+        selects = [q['sql'] for q in context.captured_queries
+                   if q['sql'].startswith('SELECT') and f'FROM {table} ' in q['sql']
+                   and join in q['sql']]
+        self.assertEqual(len(selects), 1, msg=selects)
+
+
+@tag('signals')
+class TestPlotLogSummary(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.plot = self.plot_helper.make_plot()
+        self.first = self.plot_helper.add_plot_log_entry(
+            plot=self.plot, log_status=ACCESSIBLE,
+            report_datetime=self.plot.report_datetime - timedelta(days=2))
+        self.second = self.plot_helper.add_plot_log_entry(
+            plot=self.plot, log_status=INACCESSIBLE,
+            report_datetime=self.plot.report_datetime - timedelta(days=1))
+
+    def assertSummary(self, entry_count, last_entry):
+        plot_log = PlotLog.objects.get(plot=self.plot)
+        self.assertEqual(plot_log.entry_count, entry_count)
+        self.assertEqual(
+            plot_log.last_log_status, last_entry.log_status if last_entry else None)
+        self.assertEqual(
+            plot_log.last_report_datetime,
+            last_entry.report_datetime if last_entry else None)
+
+    def test_summary_on_create(self):
+        self.assertSummary(2, self.second)
+
+    def test_summary_on_create_older_entry(self):
+        self.plot_helper.add_plot_log_entry(
+            plot=self.plot, log_status=ACCESSIBLE,
+            report_datetime=self.plot.report_datetime - timedelta(days=3))
+        self.assertSummary(3, self.second)
+
+    def test_summary_on_change(self):
+        self.second.report_datetime = self.plot.report_datetime - timedelta(days=3)
+        self.second.save()
+        self.assertSummary(2, self.first)
+
+    def test_summary_on_delete(self):
+        self.second.delete()
+        self.assertSummary(1, self.first)
+        self.first.delete()
+        self.assertSummary(0, None)
+
+    def test_summary_deferred(self):
+        with defer_plot_signals():
+            entry = self.plot_helper.add_plot_log_entry(
+                plot=self.plot, log_status=ACCESSIBLE)
+        self.assertSummary(3, entry)
+
+    def test_rebuild_command(self):
+        PlotLog.objects.update(
+            entry_count=0, last_log_status=None, last_report_datetime=None)
+        call_command('rebuild_plot_log_summary', stdout=StringIO())
+        self.assertSummary(2, self.second)
+
+    def test_plot_save_does_not_query_entries(self):
+        plot = Plot.objects.get(pk=self.plot.pk)
+        table = connection.ops.quote_name(PlotLogEntry._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            plot.save()
+        self.assertFalse(
+            [q for q in context.captured_queries if table in q['sql']])
+
+
+@tag('signals')
+class TestPlotLogEntrySignalsConcurrency(TransactionTestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+
+    def test_no_lost_increments(self):
+        plot = self.plot_helper.make_plot()
+        plot_log = PlotLog.objects.get(plot=plot)
+        errors = []
+
+        def add_entries(thread_number):
+            try:
+                for n in range(5):
+                    PlotLogEntry.objects.create(
+                        plot_log=plot_log, log_status=ACCESSIBLE,
+                        report_datetime=plot.report_datetime - timedelta(
+                            days=thread_number * 5 + n + 1))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=add_entries, args=(n, )) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Plot.objects.get(pk=plot.pk).access_attempts, 20)
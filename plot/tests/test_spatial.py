@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+
+from ..models import Plot
+from ..spatial import distances, spatial_cell, spatial_cells
+from .mappers import TestPlotMapper
+from .plot_test_helper import PlotTestHelper
+
+
+@tag('spatial')
+class TestSpatial(TestCase):
+
+    plot_helper = PlotTestHelper()
+
+    def setUp(self):
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestPlotMapper)
+        self.latitude = -24.557709
+        self.longitude = 25.807963
+        # about 0, 11, 22, 55, 111 and 1113 meters north
+        for offset in [0, 0.0001, 0.0002, 0.0005, 0.001, 0.01]:
+            self.plot_helper.make_plot(
+                gps_target_lat=Decimal(str(self.latitude + offset)),
+                gps_target_lon=Decimal(str(self.longitude)))
+
+    def brute_force(self, meters=None):
+        plots = list(Plot.objects.all())
+        plot_distances = distances(
+            self.latitude, self.longitude,
+            [p.gps_target_lat for p in plots], [p.gps_target_lon for p in plots])
+        return [plot.pk for distance, plot in sorted(
+            zip(plot_distances, plots), key=lambda x: x[0])
+            if meters is None or distance <= meters]
+
+    def test_spatial_cell_on_save(self):
+        for plot in Plot.objects.all():
+            self.assertEqual(
+                plot.spatial_cell,
+                spatial_cell(plot.gps_target_lat, plot.gps_target_lon))
+
+    def test_cells_cover_radius(self):
+        self.assertIn(
+            spatial_cell(self.latitude + 0.0002, self.longitude),
+            spatial_cells(self.latitude, self.longitude, 25))
+
+    def test_within_radius(self):
+        for meters in [1, 25, 60, 200, 2000]:
+            with self.subTest(meters=meters):
+                plots = Plot.objects.within_radius(
+                    self.latitude, self.longitude, meters)
+                self.assertEqual(
+                    [plot.pk for plot in plots], self.brute_force(meters))
+
+    def test_within_radius_distance(self):
+        plots = Plot.objects.within_radius(self.latitude, self.longitude, 25)
+        self.assertEqual(len(plots), 3)
+        self.assertAlmostEqual(plots[0].distance, 0, places=3)
+        self.assertAlmostEqual(plots[1].distance, 11.1, places=0)
+
+    def test_within_radius_large_uses_bounding_box(self):
+        plots = Plot.objects.within_radius(self.latitude, self.longitude, 50000)
+        self.assertEqual([plot.pk for plot in plots], self.brute_force())
+
+    def test_nearest(self):
+        for k in [1, 3, 5, 6, 10]:
+            with self.subTest(k=k):
+                plots = Plot.objects.nearest(self.latitude, self.longitude, k)
+                self.assertEqual(
+                    [plot.pk for plot in plots], self.brute_force()[:k])
+
+    def test_within_radius_query_count(self):
+        # the candidates as values, then the plots within the radius
+        with self.assertNumQueries(2):
+            Plot.objects.within_radius(self.latitude, self.longitude, 25)
+
+    def test_nearest_beyond_the_cells(self):
+        plots = Plot.objects.nearest(self.latitude + 1, self.longitude, 2)
+        self.assertEqual(
+            [plot.pk for plot in plots],
+            [plot.pk for plot in Plot.objects.within_radius(
+                self.latitude + 1, self.longitude, 200000)][:2])
+
+    def test_nearest_fetches_k(self):
+        with self.assertNumQueries(2):
+            plots = Plot.objects.nearest(self.latitude, self.longitude, 1)
+        self.assertEqual([plot.pk for plot in plots], self.brute_force()[:1])
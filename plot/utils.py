@@ -2,36 +2,36 @@ from django.apps import apps as django_apps
 from django.core.exceptions import ObjectDoesNotExist
 from edc_base.utils import get_utcnow
 from edc_device.constants import NODE_SERVER
-from edc_map.site_mappers import site_mappers
 
 from .constants import RESIDENTIAL_HABITABLE
+from .mapper_snapshot import site_mapper_snapshot
 
 
 def get_anonymous_plot(plot_model=None, **kwargs):
     """Return a clinic plot or an anonymous plot.
     """
     plot = None
+    current_mapper = site_mapper_snapshot.get().current_mapper
     if not plot_model:
         plot_model = 'plot.plot'
     plot_model_cls = django_apps.get_model(plot_model)
-    device_id = django_apps.get_app_config(
-        'edc_device').device_id
-    device_role = django_apps.get_app_config(
-        'edc_device').device_role
+    edc_device_app_config = django_apps.get_app_config('edc_device')
+    device_id = edc_device_app_config.device_id
+    device_role = edc_device_app_config.device_role
     plot_identifier = django_apps.get_app_config(
         'plot').anonymous_plot_identifier
     try:
         plot = plot_model_cls.objects.get(plot_identifier=plot_identifier)
     except ObjectDoesNotExist:
-        lat = (site_mappers.current_mapper.center_lat
+        lat = (current_mapper.center_lat
                + float('.000000{}'.format(device_id)))
-        lon = (site_mappers.current_mapper.center_lon
+        lon = (current_mapper.center_lon
                + float('.000000{}'.format(device_id)))
         if not device_role == NODE_SERVER:
             plot = plot_model_cls.objects.create(
                 plot_identifier=plot_identifier,
                 report_datetime=get_utcnow(),
-                map_area=site_mappers.current_map_area,
+                map_area=current_mapper.map_area,
                 description='anonymous',
                 comment='anonymous',
                 status=RESIDENTIAL_HABITABLE,